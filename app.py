@@ -3,17 +3,50 @@ LPL Heritage Hub - Main Application
 A Flask web server for processing paperwork and summarizing portfolios using AWS services.
 """
 
-from flask import Flask, jsonify, request
+import time
+
+# Cold-start timing begins before the imports, which are most of it
+STARTUP_STARTED = time.perf_counter()
+
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
+import atexit
+import gzip
+import hashlib
+import itertools
 import os
-import boto3
+import re
+import uuid
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import json
 from datetime import datetime
+from responses import compress_response, parse_list_param, project_payload
+from aws_stubs import StubS3Client, StubTextractClient
+from textract_jobs import TextractJobPipeline
+from case_store import CaseRepository
+from upload_queue import UploadQueue
+from storage import create_storage
+import portfolio_codec
+import metrics
+from aws_clients import AWSClientFactory
+from stage_dag import Stage, run_stages
+from process_pool import ProcessPool
+from gamification import GamificationStore
+from goal_generator import generate_goals_from_portfolio, goal_item_result, goal_result
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from textract_blocks import BlockIndex, looks_like_currency, parse_amount
+from textract_cache import TextractCache, cached_textract_call
+from response_cache import ResponseCache, mentor_cache_key
+from streaming import GoalCardStreamParser, demo_token_stream, sse_event
+from bedrock_invoker import AIMDLimiter, BedrockInvoker, BedrockThrottledError, bedrock_client_config
+from nigo_rules import (DEFAULT_RULE_PACK_PATH, analyze_nigo, analyze_nigo_in_worker, get_rule_set,
+                        start_rule_pack_watcher)
 
 # Load environment variables from .env file
 load_dotenv()
+metrics.startup_seconds.set(time.perf_counter() - STARTUP_STARTED, phase='imports')
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
@@ -23,41 +56,238 @@ app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
 app.config['PORT'] = int(os.getenv('PORT', 5000))
 app.config['AWS_REGION'] = os.getenv('AWS_REGION', 'us-east-1')
 app.config['DEMO_MODE'] = os.getenv('DEMO_MODE', 'True').lower() == 'true'  # Default to demo mode
-
-# Initialize AWS clients (only if not in demo mode and credentials are provided)
+app.config['NIGO_RULES_PATH'] = os.getenv('NIGO_RULES_PATH', DEFAULT_RULE_PACK_PATH)
+app.config['NIGO_RULES_RELOAD_INTERVAL'] = float(os.getenv('NIGO_RULES_RELOAD_INTERVAL', 5))  # Seconds, 0 disables hot reload
+app.config['TEXTRACT_CACHE_ENABLED'] = os.getenv('TEXTRACT_CACHE_ENABLED', 'True').lower() == 'true'
+app.config['DATA_DIR'] = os.getenv('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'data'))
+app.config['TEXTRACT_CACHE_DB'] = os.getenv('TEXTRACT_CACHE_DB', os.path.join(app.config['DATA_DIR'], 'textract_cache.db'))
+app.config['TEXTRACT_CACHE_MEMORY_MB'] = int(os.getenv('TEXTRACT_CACHE_MEMORY_MB', 64))
+app.config['RESPONSE_COMPRESSION'] = os.getenv('RESPONSE_COMPRESSION', 'True').lower() == 'true'
+app.config['RESPONSE_COMPRESSION_MIN_BYTES'] = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+app.json.compact = True  # No pretty-printed JSON, even in debug mode
+app.config['S3_BUCKET_NAME'] = os.getenv('S3_BUCKET_NAME', 'lpl-heritage-hub-portfolios')
+app.config['TEXTRACT_JOB_WORKERS'] = int(os.getenv('TEXTRACT_JOB_WORKERS', 4))
+app.config['TEXTRACT_JOB_POLL_INTERVAL'] = float(os.getenv('TEXTRACT_JOB_POLL_INTERVAL', 2))
+app.config['TEXTRACT_JOB_TIMEOUT'] = int(os.getenv('TEXTRACT_JOB_TIMEOUT', 900))
+app.config['CASES_DB'] = os.getenv('CASES_DB', os.path.join(app.config['DATA_DIR'], 'cases.db'))
+app.config['UPLOAD_DIR'] = os.getenv('UPLOAD_DIR', os.path.join(app.config['DATA_DIR'], 'uploads'))
+app.config['GAMIFICATION_DB'] = os.getenv('GAMIFICATION_DB', os.path.join(app.config['DATA_DIR'], 'gamification.db'))
+app.config['GAMIFICATION_FLUSH_INTERVAL'] = float(os.getenv('GAMIFICATION_FLUSH_INTERVAL', 2))  # Seconds between write-behind flushes
+app.config['UPLOAD_WORKERS'] = int(os.getenv('UPLOAD_WORKERS', 4))
+app.config['UPLOAD_STAGE_WORKERS'] = int(os.getenv('UPLOAD_STAGE_WORKERS', 8))
+app.config['TEXTRACT_BATCH_CONCURRENCY'] = int(os.getenv('TEXTRACT_BATCH_CONCURRENCY', 8))  # Textract calls in flight across all batches
+app.config['TEXTRACT_BATCH_MAX_DOCUMENTS'] = int(os.getenv('TEXTRACT_BATCH_MAX_DOCUMENTS', 500))
+app.config['NIGO_WORKERS'] = int(os.getenv('NIGO_WORKERS', min(4, os.cpu_count() or 1)))  # Processes; 0 runs inline
+app.config['GOALS_BULK_WORKERS'] = int(os.getenv('GOALS_BULK_WORKERS', min(4, os.cpu_count() or 1)))  # Processes; 0 runs inline
+app.config['GOALS_BULK_BATCH_SIZE'] = int(os.getenv('GOALS_BULK_BATCH_SIZE', 500))
+app.config['GOALS_BULK_MAX_ITEMS'] = int(os.getenv('GOALS_BULK_MAX_ITEMS', 10000))
+app.config['UPLOAD_SUMMARY_TIMEOUT'] = float(os.getenv('UPLOAD_SUMMARY_TIMEOUT', 90))  # Seconds
+app.config['UPLOAD_S3_TIMEOUT'] = float(os.getenv('UPLOAD_S3_TIMEOUT', 30))
+app.config['STORAGE_BACKEND'] = os.getenv('STORAGE_BACKEND', 's3').lower()  # s3, local or sqlite
+app.config['STORAGE_DIR'] = os.getenv('STORAGE_DIR', os.path.join(app.config['DATA_DIR'], 'storage'))
+app.config['STORAGE_DB'] = os.getenv('STORAGE_DB', os.path.join(app.config['DATA_DIR'], 'storage.db'))
+app.config['STORAGE_MULTIPART_THRESHOLD_MB'] = int(os.getenv('STORAGE_MULTIPART_THRESHOLD_MB', 8))
+app.config['STORAGE_WRITE_BEHIND'] = os.getenv('STORAGE_WRITE_BEHIND', 'False').lower() == 'true'
+app.config['PORTFOLIO_FORMAT'] = portfolio_codec.resolve_format(os.getenv('PORTFOLIO_FORMAT', 'json').lower())  # json or msgpack (gzipped)
+app.config['BEDROCK_ENDPOINT_URL'] = os.getenv('BEDROCK_ENDPOINT_URL') or None  # Point at a local fake for load testing
+app.config['TEXTRACT_ENDPOINT_URL'] = os.getenv('TEXTRACT_ENDPOINT_URL') or None  # e.g. benchmarks/fake_aws.py
+app.config['S3_ENDPOINT_URL'] = os.getenv('S3_ENDPOINT_URL') or None
+app.config['BEDROCK_MAX_POOL_CONNECTIONS'] = int(os.getenv('BEDROCK_MAX_POOL_CONNECTIONS', 50))
+app.config['BEDROCK_READ_TIMEOUT'] = int(os.getenv('BEDROCK_READ_TIMEOUT', 120))
+app.config['BEDROCK_INITIAL_CONCURRENCY'] = int(os.getenv('BEDROCK_INITIAL_CONCURRENCY', 8))
+app.config['BEDROCK_MAX_CONCURRENCY'] = int(os.getenv('BEDROCK_MAX_CONCURRENCY', 32))
+app.config['BEDROCK_QUEUE_TIMEOUT'] = float(os.getenv('BEDROCK_QUEUE_TIMEOUT', 30))
+app.config['BEDROCK_THROTTLE_RETRIES'] = int(os.getenv('BEDROCK_THROTTLE_RETRIES', 3))
+app.config['BEDROCK_PROMPT_CACHING'] = os.getenv('BEDROCK_PROMPT_CACHING', 'False').lower() == 'true'  # Supported models only
+app.config['MENTOR_CACHE_ENABLED'] = os.getenv('MENTOR_CACHE_ENABLED', 'True').lower() == 'true'
+app.config['MENTOR_CACHE_TTL'] = int(os.getenv('MENTOR_CACHE_TTL', 86400))  # Seconds
+app.config['MENTOR_CACHE_MAX_ENTRIES'] = int(os.getenv('MENTOR_CACHE_MAX_ENTRIES', 5000))
+app.config['MENTOR_CACHE_DB'] = os.getenv('MENTOR_CACHE_DB') or None  # e.g. backend/data/mentor_cache.db; unset keeps it in memory
+
+# Async serving mode (uvicorn asgi:application): aiobotocore connection pool per service,
+# and threads for CPU-bound parsing and the routes that stay synchronous
+app.config['ASYNC_MAX_POOL_CONNECTIONS'] = int(os.getenv('ASYNC_MAX_POOL_CONNECTIONS', 1000))
+app.config['ASGI_THREADS'] = int(os.getenv('ASGI_THREADS', 32))
+
+# Lazy AWS clients: warm them up in the background after startup (default), eagerly, or off (first use)
+app.config['AWS_WARM_UP'] = os.getenv('AWS_WARM_UP', 'background').lower()
+
+# Request latency/size histograms and AWS call timings, exposed on /metrics
+app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+
+# Compile the NIGO rule pack once and watch it for changes
+with metrics.startup_phase('nigo_rules'):
+    start_rule_pack_watcher(app.config['NIGO_RULES_PATH'], app.config['NIGO_RULES_RELOAD_INTERVAL'])
+
+# AWS clients (only if not in demo mode). Each is created on first use, or by the
+# warm-up at the end of this module, since creating one loads botocore's service model
+aws = None
 textract_client = None
 bedrock_client = None
 s3_client = None
 
 if not app.config['DEMO_MODE']:
-    try:
-        textract_client = boto3.client(
-            'textract',
-            region_name=app.config['AWS_REGION'],
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        bedrock_client = boto3.client(
-            'bedrock-runtime',
-            region_name=app.config['AWS_REGION'],
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        s3_client = boto3.client(
-            's3',
-            region_name=app.config['AWS_REGION'],
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        print("✓ AWS clients initialized successfully")
-    except Exception as e:
-        print(f"⚠ Warning: AWS clients not initialized: {e}")
-        print("  Falling back to demo mode. Set DEMO_MODE=False and add AWS credentials to use real services.")
-        app.config['DEMO_MODE'] = True
+    aws = AWSClientFactory(
+        {
+            'textract': {
+                'service_name': 'textract',
+                'endpoint_url': app.config['TEXTRACT_ENDPOINT_URL']
+            },
+            'bedrock': {
+                'service_name': 'bedrock-runtime',
+                'endpoint_url': app.config['BEDROCK_ENDPOINT_URL'],
+                'config': bedrock_client_config(
+                    max_pool_connections=app.config['BEDROCK_MAX_POOL_CONNECTIONS'],
+                    read_timeout=app.config['BEDROCK_READ_TIMEOUT']
+                )
+            },
+            's3': {
+                'service_name': 's3',
+                'endpoint_url': app.config['S3_ENDPOINT_URL'],
+                # A custom endpoint (local fake, MinIO) serves buckets by path, not subdomain
+                'config': Config(s3={'addressing_style': 'path'}) if app.config['S3_ENDPOINT_URL'] else None
+            }
+        },
+        wrap=metrics.instrument_client,
+        region_name=app.config['AWS_REGION'],
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+    )
+    textract_client = aws.lazy('textract')
+    bedrock_client = aws.lazy('bedrock')
+    s3_client = aws.lazy('s3')
+    print(f"✓ AWS clients configured (warm-up: {app.config['AWS_WARM_UP']})")
 else:
     print("🎭 Running in DEMO MODE - using mock responses (no AWS credentials needed)")
     print("   Set DEMO_MODE=False in .env to use real AWS services")
 
+# Content-addressed cache of Textract results (re-uploads skip AWS)
+textract_cache = None
+if textract_client and app.config['TEXTRACT_CACHE_ENABLED']:
+    textract_cache = TextractCache(
+        app.config['TEXTRACT_CACHE_DB'],
+        max_memory_bytes=app.config['TEXTRACT_CACHE_MEMORY_MB'] * 1024 * 1024
+    )
+
+# Shared Bedrock invocation layer (pooled client, throttling retry, AIMD concurrency limit)
+bedrock = None
+if bedrock_client:
+    bedrock = BedrockInvoker(
+        bedrock_client,
+        AIMDLimiter(
+            initial_limit=app.config['BEDROCK_INITIAL_CONCURRENCY'],
+            max_limit=app.config['BEDROCK_MAX_CONCURRENCY']
+        ),
+        max_retries=app.config['BEDROCK_THROTTLE_RETRIES'],
+        queue_timeout=app.config['BEDROCK_QUEUE_TIMEOUT'],
+        prompt_caching=app.config['BEDROCK_PROMPT_CACHING']
+    )
+
+# Repeat Mentor explanations are served from cache instead of Bedrock
+mentor_cache = None
+if app.config['MENTOR_CACHE_ENABLED']:
+    mentor_cache = ResponseCache(
+        max_entries=app.config['MENTOR_CACHE_MAX_ENTRIES'],
+        ttl=app.config['MENTOR_CACHE_TTL'],
+        db_path=app.config['MENTOR_CACHE_DB']
+    )
+
+# Where uploaded portfolios are stored (S3 in production; local disk or SQLite otherwise)
+storage = create_storage(
+    app.config['STORAGE_BACKEND'],
+    s3_client=s3_client,
+    bucket=app.config['S3_BUCKET_NAME'],
+    region=app.config['AWS_REGION'],
+    root=app.config['STORAGE_DIR'],
+    db_path=app.config['STORAGE_DB'],
+    multipart_threshold=app.config['STORAGE_MULTIPART_THRESHOLD_MB'] * 1024 * 1024,
+    write_behind=app.config['STORAGE_WRITE_BEHIND']
+)
+
+
+def prepare_storage():
+    """One-time storage setup (e.g. the S3 bucket check) instead of before every upload."""
+    try:
+        storage.prepare()
+        print(f"✓ Portfolio storage ready ({storage.name})")
+    except Exception as e:
+        print(f"⚠ Warning: Portfolio storage setup failed, will retry on first upload: {e}")
+
+
+if storage:
+    if aws:
+        aws.add_warm_up_hook('storage', prepare_storage)  # Needs the S3 client
+    else:
+        prepare_storage()
+
+# Portfolio cases (upload queue state and results) in cases.db
+with metrics.startup_phase('case_store'):
+    cases = CaseRepository(app.config['CASES_DB'])
+
+# Points, levels and leaderboard, held in memory and written behind to SQLite
+gamification = GamificationStore(app.config['GAMIFICATION_DB'], flush_interval=app.config['GAMIFICATION_FLUSH_INTERVAL'])
+atexit.register(gamification.close)
+
+
+def bedrock_busy_response(error):
+    """503 with Retry-After for a call that stayed throttled, instead of a 500."""
+    response = jsonify({'error': f'AWS Bedrock is busy: {str(error)}', 'retryable': True})
+    response.headers['Retry-After'] = str(int(error.retry_after + 0.999))
+    return response, 503
+
+
+def api_response(payload, optional=None):
+    """
+    jsonify a payload after applying the caller's projection.
+    ?fields=a,b keeps only those top-level keys; ?include=raw adds optional sections.
+    """
+    return jsonify(project_payload(
+        payload,
+        fields=parse_list_param(request.args.get('fields')),
+        include=parse_list_param(request.args.get('include')),
+        optional=optional
+    ))
+
+
+@app.before_request
+def start_request_timer():
+    request.environ['metrics.start'] = time.perf_counter()
+
+
+# Registered before compress(), so it runs after it and sees the compressed size
+@app.after_request
+def record_request_metrics(response):
+    """Per-endpoint latency and bytes in/out; streamed responses are timed until the stream closes."""
+    start = request.environ.get('metrics.start')
+    if not app.config['METRICS_ENABLED'] or start is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    method, status = request.method, str(response.status_code)
+    bytes_in = request.content_length or 0
+    bytes_out = None if response.is_streamed else response.calculate_content_length()
+
+    def record():
+        metrics.http_request_seconds.observe(time.perf_counter() - start, method=method, endpoint=endpoint,
+                                             status=status)
+        metrics.http_request_bytes.observe(bytes_in, endpoint=endpoint)
+        if bytes_out is not None:
+            metrics.http_response_bytes.observe(bytes_out, endpoint=endpoint)
+
+    response.call_on_close(record)
+    return response
+
+
+@app.after_request
+def compress(response):
+    """gzip/brotli-compress large responses for clients that accept it."""
+    if app.config['RESPONSE_COMPRESSION']:
+        compress_response(
+            response,
+            request.headers.get('Accept-Encoding'),
+            min_size=app.config['RESPONSE_COMPRESSION_MIN_BYTES']
+        )
+    return response
+
 
 @app.route('/')
 def index():
@@ -80,180 +310,352 @@ def health():
         'status': 'healthy',
         'service': 'LPL Heritage Hub',
         'aws_status': aws_status,
-        'demo_mode': app.config['DEMO_MODE']
+        'demo_mode': app.config['DEMO_MODE'],
+        'nigo_rules': get_rule_set().describe(),
+        'textract_cache': textract_cache.stats() if textract_cache else None,
+        'bedrock': bedrock.stats() if bedrock else None,
+        'mentor_cache': mentor_cache.stats() if mentor_cache else None,
+        'upload_queue': upload_queue.stats(),
+        'storage': storage.stats() if storage else None,
+        'goal_pool': goal_pool.stats(),
+        'nigo_pool': nigo_pool.stats(),
+        'gamification': gamification.stats(),
+        'metrics_enabled': app.config['METRICS_ENABLED'],
+        'aws_clients': aws.stats() if aws else None,
+        'startup': metrics.startup_report()
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Latency and size histograms, AWS call timings and cache hit counters.
+    Prometheus text format by default; ?format=json returns count/avg/p50/p95/p99 per series.
+    """
+    if request.args.get('format') == 'json':
+        return jsonify({'status': 'success', 'metrics': metrics.registry.snapshot()})
+    return Response(metrics.registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/api/textract/analyze', methods=['POST'])
 def analyze_document():
     """
     Analyze a document using AWS Textract to find NIGO (Not In Good Order) errors.
     Expects a file upload or S3 bucket/key in the request.
+    Query params: ?include=raw adds the raw Textract response; ?fields= projects the payload.
+    (Served by async_views.analyze_document under asgi.py.)
     """
+    # Optional case to attach the analysis to (?case_id= or a form field)
+    case_id = request.args.get('case_id') or request.form.get('case_id')
+
     # Demo mode - return mock response
     if app.config['DEMO_MODE']:
-        return jsonify({
-            'status': 'success',
-            'extracted_text': 'Sample extracted text from document:\n\nName: John Doe\nDate: 2024-01-30\nAccount Number: 123456789\nSignature: [Present]\n\nThis is a mock response. Enable real AWS Textract by setting DEMO_MODE=False in .env',
-            'nigo_errors': [
-                {
-                    'type': 'missing_field',
-                    'field': 'beneficiary_name',
-                    'severity': 'high',
-                    'priority': 'HIGH',
-                    'message': 'Required field "beneficiary_name" not found in document. This is a NIGO error that will delay account opening.',
-                    'confidence': 'high'
-                },
-                {
-                    'type': 'incomplete_form',
-                    'severity': 'medium',
-                    'priority': 'MEDIUM',
-                    'message': 'Document appears to have incomplete form fields',
-                    'confidence': 'medium'
-                }
-            ],
-            'nigo_status': 'NIGO',
-            'confidence_score': 65.0,
-            'confidence_level': 'YELLOW',
-            'agent': 'The Echo (Document Intelligence)',
-            'total_account_value': 50000.0,  # Mock account value for demo
-            'demo_mode': True,
-            'note': 'This is a mock response. Set DEMO_MODE=False and add AWS credentials for real analysis.'
-        })
+        return demo_analysis_response(case_id)
 
     if not textract_client:
-        return jsonify({
-            'error': 'AWS Textract client not configured. Please check your AWS credentials.'
-        }), 500
+        return textract_not_configured_response()
 
     try:
-        # Check if file is uploaded directly
-        if 'file' in request.files:
-            file = request.files['file']
-            if file.filename == '':
-                return jsonify({'error': 'No file provided'}), 400
-            
-            # Read file bytes
-            file_bytes = file.read()
-            
-            # Call Textract
-            response = textract_client.analyze_document(
-                Document={'Bytes': file_bytes},
-                FeatureTypes=['FORMS', 'TABLES']
-            )
-            
-        # Check if S3 bucket/key is provided
-        elif 's3_bucket' in request.json and 's3_key' in request.json:
-            response = textract_client.analyze_document(
-                Document={
-                    'S3Object': {
-                        'Bucket': request.json['s3_bucket'],
-                        'Name': request.json['s3_key']
-                    }
-                },
-                FeatureTypes=['FORMS', 'TABLES']
+        document, error_response = textract_document_request()
+        if error_response:
+            return error_response
+
+        if 'Bytes' in document:
+            # Call Textract (re-uploads of the same document are served from cache)
+            response, cache_hit = cached_textract_call(
+                textract_cache, textract_client, 'analyze_document', document['Bytes'], ['FORMS', 'TABLES']
             )
         else:
-            return jsonify({
-                'error': 'Please provide either a file upload or S3 bucket/key'
-            }), 400
-
-        # Extract text and analyze for NIGO errors
-        extracted_text = extract_text_from_textract(response)
-        nigo_analysis = detect_nigo_errors(extracted_text, response)
-        
-        # Extract total account value from Textract response
-        total_account_value = extract_account_value(response, extracted_text)
-        
-        # Determine confidence level for HITL (Human-in-the-Loop)
-        confidence_level = determine_confidence_level(nigo_analysis)
+            cache_hit = False
+            response = textract_client.analyze_document(Document=document, FeatureTypes=['FORMS', 'TABLES'])
 
-        return jsonify({
-            'status': 'success',
-            'extracted_text': extracted_text,
-            'nigo_errors': nigo_analysis.get('errors', []),
-            'nigo_status': nigo_analysis.get('nigo_status', 'UNKNOWN'),
-            'confidence_score': nigo_analysis.get('confidence_score', 0),
-            'confidence_level': confidence_level,  # GREEN, YELLOW, or RED
-            'agent': 'The Echo (Document Intelligence)',
-            'total_account_value': total_account_value,  # Added for goal generation
-            'raw_response': response
-        })
+        return textract_analysis_response(response, cache_hit, case_id)
 
     except ClientError as e:
-        error_code = e.response.get('Error', {}).get('Code', '')
-        if 'AccessDeniedException' in str(e) or 'AccessDenied' in error_code:
-            return jsonify({
-                'error': 'AWS Textract access denied. Please add Textract permissions to your IAM user, or set DEMO_MODE=True in .env to use mock responses.',
-                'error_details': str(e),
-                'suggestion': 'To fix: Add AmazonTextractFullAccess policy to your IAM user, or enable demo mode.'
-            }), 403
-        return jsonify({
-            'error': f'AWS Textract error: {str(e)}'
-        }), 500
+        return textract_error_response(e)
     except Exception as e:
         return jsonify({
             'error': f'Unexpected error: {str(e)}'
         }), 500
 
 
-@app.route('/api/bedrock/summarize', methods=['POST'])
-def summarize_portfolio():
+def demo_analysis_response(case_id):
+    """Mock /api/textract/analyze response for demo mode."""
+    link_case_analysis(case_id, 'NIGO', 50000.0)
+    return api_response({
+        'status': 'success',
+        'extracted_text': 'Sample extracted text from document:\n\nName: John Doe\nDate: 2024-01-30\nAccount Number: 123456789\nSignature: [Present]\n\nThis is a mock response. Enable real AWS Textract by setting DEMO_MODE=False in .env',
+        'nigo_errors': [
+            {
+                'type': 'missing_field',
+                'field': 'beneficiary_name',
+                'severity': 'high',
+                'priority': 'HIGH',
+                'message': 'Required field "beneficiary_name" not found in document. This is a NIGO error that will delay account opening.',
+                'confidence': 'high'
+            },
+            {
+                'type': 'incomplete_form',
+                'severity': 'medium',
+                'priority': 'MEDIUM',
+                'message': 'Document appears to have incomplete form fields',
+                'confidence': 'medium'
+            }
+        ],
+        'nigo_status': 'NIGO',
+        'confidence_score': 65.0,
+        'confidence_level': 'YELLOW',
+        'agent': 'The Echo (Document Intelligence)',
+        'total_account_value': 50000.0,  # Mock account value for demo
+        'demo_mode': True,
+        'note': 'This is a mock response. Set DEMO_MODE=False and add AWS credentials for real analysis.'
+    })
+
+
+def textract_not_configured_response():
+    return jsonify({
+        'error': 'AWS Textract client not configured. Please check your AWS credentials.'
+    }), 500
+
+
+def textract_document_request():
     """
-    Summarize a portfolio using Amazon Bedrock for heirs.
-    Expects portfolio data in the request body.
+    The Textract Document named by an analyze request: an uploaded file or an S3 bucket/key.
+
+    Returns:
+        Tuple of (document, error_response); document is {'Bytes': ...} or {'S3Object': ...}
     """
-    data = request.get_json()
-    if not data or 'portfolio_data' not in data:
-        return jsonify({
-            'error': 'Please provide portfolio_data in the request body'
-        }), 400
+    # Check if file is uploaded directly
+    if 'file' in request.files:
+        file = request.files['file']
+        if file.filename == '':
+            return None, (jsonify({'error': 'No file provided'}), 400)
+        return {'Bytes': file.read()}, None
 
-    portfolio_data = data['portfolio_data']
-    model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+    # Check if S3 bucket/key is provided
+    data = request.get_json(silent=True) or {}
+    if 's3_bucket' in data and 's3_key' in data:
+        return {'S3Object': {'Bucket': data['s3_bucket'], 'Name': data['s3_key']}}, None
 
-    # Demo mode - return mock summary with Goal Cards
-    if app.config['DEMO_MODE']:
-        total_value = portfolio_data.get('total_value', sum(
-            h.get('value', 0) for h in portfolio_data.get('holdings', [])
-        ))
-        
-        # Generate Goal Cards (The Bridge format)
-        goal_cards = parse_goal_cards_from_response('', portfolio_data)
-        
-        mock_summary = f"""## Portfolio Summary - The Bridge Translation
+    return None, (jsonify({
+        'error': 'Please provide either a file upload or S3 bucket/key'
+    }), 400)
 
-This portfolio has a total value of ${total_value:,.2f}. Below are your personalized Goal Cards that translate each holding into understandable goals.
 
-**Agent**: The Bridge (Portfolio Summarizer)
-**Confidence Level**: GREEN (Automated)"""
+def textract_analysis_response(response, cache_hit, case_id):
+    """Extract text, NIGO errors and account value from a Textract response and build the API response."""
+    # Extract text and analyze for NIGO errors
+    extracted_text = extract_text_from_textract(response)
+    nigo_analysis = detect_nigo_errors(extracted_text, response)
+
+    # Extract total account value from Textract response
+    total_account_value = extract_account_value(response, extracted_text)
+
+    # Determine confidence level for HITL (Human-in-the-Loop)
+    confidence_level = determine_confidence_level(nigo_analysis)
+    link_case_analysis(case_id, nigo_analysis.get('nigo_status', 'UNKNOWN'), total_account_value)
 
+    # Raw Textract output (megabytes of geometry) is opt-in via ?include=raw
+    return api_response({
+        'status': 'success',
+        'extracted_text': extracted_text,
+        'nigo_errors': nigo_analysis.get('errors', []),
+        'nigo_status': nigo_analysis.get('nigo_status', 'UNKNOWN'),
+        'confidence_score': nigo_analysis.get('confidence_score', 0),
+        'confidence_level': confidence_level,  # GREEN, YELLOW, or RED
+        'nigo_rules_version': nigo_analysis.get('rules_version'),
+        'agent': 'The Echo (Document Intelligence)',
+        'total_account_value': total_account_value,  # Added for goal generation
+        'textract_cache_hit': cache_hit
+    }, optional={'raw': ('raw_response', response)})
+
+
+def textract_error_response(error):
+    """403 with setup advice for AccessDenied, 500 for any other Textract ClientError."""
+    error_code = error.response.get('Error', {}).get('Code', '')
+    if 'AccessDeniedException' in str(error) or 'AccessDenied' in error_code:
         return jsonify({
-            'status': 'success',
-            'summary': mock_summary,
-            'goal_cards': goal_cards,  # The Bridge format
-            'model_used': f'{model_id} (demo mode)',
-            'agent': 'The Bridge (Portfolio Summarizer)',
-            'confidence_level': 'GREEN',
-            'demo_mode': True,
-            'note': 'This is a mock response. Set DEMO_MODE=False and add AWS credentials for real AI summaries.'
-        })
+            'error': 'AWS Textract access denied. Please add Textract permissions to your IAM user, or set DEMO_MODE=True in .env to use mock responses.',
+            'error_details': str(error),
+            'suggestion': 'To fix: Add AmazonTextractFullAccess policy to your IAM user, or enable demo mode.'
+        }), 403
+    return jsonify({
+        'error': f'AWS Textract error: {str(error)}'
+    }), 500
+
+
+def link_case_analysis(case_id, nigo_status, total_account_value):
+    """Record an analysis' NIGO status and account value on its case, if it has one."""
+    if case_id and not cases.update(case_id, nigo_status=nigo_status, total_account_value=total_account_value):
+        print(f"⚠ Analysis references unknown case: {case_id}")
+
+
+@app.route('/api/textract/analyze/batch', methods=['POST'])
+def analyze_documents_batch():
+    """
+    Analyze many documents in one request (e.g. a day of back-scanned forms).
+    Accepts multipart files (any number of "file"/"files" fields), or JSON
+    {"s3_bucket": "...", "s3_keys": [...]} / {"documents": [{"s3_bucket", "s3_key"}, ...]}.
+    Textract calls fan out with at most TEXTRACT_BATCH_CONCURRENCY in flight and
+    NIGO rules run on a process pool. Results stream back as NDJSON as each
+    document completes (not in input order): one line per document with its
+    "index", then a final {"done": true, "count", "errors", "total_ms"} line.
+    Query params: ?include=text adds extracted_text; ?fields= projects each line.
+    """
+    documents = request.files.getlist('file') + request.files.getlist('files')
+    if documents:
+        if any(not document.filename for document in documents):
+            return jsonify({'error': 'Every uploaded file needs a filename'}), 400
+        # Read now: uploaded files are closed once the view returns, before results stream
+        documents = [{'filename': document.filename, 'bytes': document.read()} for document in documents]
+    else:
+        data = request.get_json(silent=True) or {}
+        documents = [{'s3_bucket': data.get('s3_bucket'), 's3_key': key} for key in data.get('s3_keys') or []]
+        documents += [{'s3_bucket': d.get('s3_bucket') or data.get('s3_bucket'), 's3_key': d.get('s3_key')}
+                      for d in data.get('documents') or [] if isinstance(d, dict)]
+        if not documents or not all(d['s3_bucket'] and d['s3_key'] for d in documents):
+            return jsonify({
+                'error': 'Please upload files, or provide s3_bucket with s3_keys (or documents with s3_bucket/s3_key)'
+            }), 400
 
-    if not bedrock_client:
+    if len(documents) > app.config['TEXTRACT_BATCH_MAX_DOCUMENTS']:
         return jsonify({
-            'error': 'AWS Bedrock client not configured. Please check your AWS credentials.'
-        }), 500
+            'error': f"At most {app.config['TEXTRACT_BATCH_MAX_DOCUMENTS']} documents per batch"
+        }), 413
+
+    # Demo mode - the local Textract stand-in "OCRs" documents by reading them as text
+    client = textract_client or metrics.instrument_client(StubTextractClient(s3_client=stub_s3_client), 'textract')
+    include = parse_list_param(request.args.get('include'))
+    fields = parse_list_param(request.args.get('fields'))
+    rule_set = get_rule_set()
+
+    def analyze_with_textract(document):
+        if 'bytes' in document:
+            response, cache_hit = cached_textract_call(
+                textract_cache, client, 'analyze_document', document['bytes'], ['FORMS', 'TABLES']
+            )
+        else:
+            cache_hit = False
+            response = client.analyze_document(
+                Document={'S3Object': {'Bucket': document['s3_bucket'], 'Name': document['s3_key']}},
+                FeatureTypes=['FORMS', 'TABLES']
+            )
+        extracted_text = extract_text_from_textract(response)
+        return extracted_text, extract_account_value(response, extracted_text), cache_hit
+
+    def results():
+        start = time.monotonic()
+        counts = {'count': 0, 'errors': 0}
+        queued = iter(enumerate(documents))
+        pending = {}  # future -> (stage, index, document, textract output)
+
+        def submit_next():
+            entry = next(queued, None)
+            if entry is None:
+                return
+            index, document = entry
+            pending[textract_batch_executor.submit(analyze_with_textract, document)] = ('textract', index, document, None)
+
+        # Keep TEXTRACT_BATCH_CONCURRENCY documents in Textract; the next starts as one finishes
+        for _ in range(app.config['TEXTRACT_BATCH_CONCURRENCY']):
+            submit_next()
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, index, document, textract_output = pending.pop(future)
+                source = {'filename': document['filename']} if 'filename' in document else {
+                    's3_bucket': document['s3_bucket'], 's3_key': document['s3_key']}
+                try:
+                    if stage == 'textract':
+                        submit_next()
+                        textract_output = future.result()
+                        nigo_future = nigo_pool.submit(analyze_nigo_in_worker, textract_output[0], rule_set)
+                        pending[nigo_future] = ('nigo', index, document, textract_output)
+                        continue
+
+                    extracted_text, total_account_value, cache_hit = textract_output
+                    nigo_analysis = future.result()
+                    line = project_payload({
+                        'index': index,
+                        **source,
+                        'status': 'success',
+                        'nigo_errors': nigo_analysis.get('errors', []),
+                        'nigo_status': nigo_analysis.get('nigo_status', 'UNKNOWN'),
+                        'confidence_score': nigo_analysis.get('confidence_score', 0),
+                        'confidence_level': determine_confidence_level(nigo_analysis),
+                        'nigo_rules_version': nigo_analysis.get('rules_version'),
+                        'total_account_value': total_account_value,
+                        'textract_cache_hit': cache_hit
+                    }, fields=fields | {'index'} if fields else None, include=include,
+                        optional={'text': ('extracted_text', extracted_text)})
+                except Exception as e:
+                    if stage == 'textract':
+                        error = f'AWS Textract error: {str(e)}' if isinstance(e, ClientError) else f'Unexpected error: {str(e)}'
+                    else:
+                        error = f'NIGO analysis failed: {str(e)}'
+                    line = {'index': index, **source, 'status': 'error', 'error': error}
+                    counts['errors'] += 1
+                counts['count'] += 1
+                yield json.dumps(line, separators=(',', ':')) + '\n'
+
+        yield json.dumps(dict(counts, done=True, total_ms=round((time.monotonic() - start) * 1000, 1),
+                              demo_mode=textract_client is None), separators=(',', ':')) + '\n'
+
+    return Response(stream_with_context(results()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/textract/jobs', methods=['POST'])
+def start_textract_job():
+    """
+    Start an asynchronous Textract analysis for large multi-page documents.
+    The document is staged in S3 and analyzed on a background worker;
+    returns a job id immediately. Poll GET /api/textract/jobs/<job_id> for results.
+    Expects a file upload.
+    """
+    if 'file' not in request.files or not request.files['file'].filename:
+        return jsonify({'error': 'Please upload a document (PDF, PNG, or JPG)'}), 400
 
-    try:
+    file = request.files['file']
+    job_id = textract_jobs.submit(file.read(), os.path.basename(file.filename))
+    return jsonify({
+        'status': 'accepted',
+        'job_id': job_id,
+        'job_status': 'QUEUED',
+        'status_url': f'/api/textract/jobs/{job_id}',
+        'agent': 'The Echo (Document Intelligence)',
+        'demo_mode': app.config['DEMO_MODE']
+    }), 202
 
-        # Create prompt for portfolio summarization (The Bridge agent)
-        # Transform portfolio into Goal Cards format
-        prompt = f"""You are The Bridge - an AI agent that translates complex investment portfolios into understandable "Goal Cards" for Gen Z and Millennial heirs.
 
-Portfolio Data:
-{json.dumps(portfolio_data, indent=2)}
+@app.route('/api/textract/jobs/<job_id>', methods=['GET'])
+def get_textract_job(job_id):
+    """Get the status (and, once finished, the analysis) of an asynchronous Textract job."""
+    job = textract_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': f'Unknown job id: {job_id}'}), 404
 
-Your task: Transform each holding into a "Goal Card" that explains:
+    response = {
+        'status': 'success',
+        'job_id': job_id,
+        'job_status': job['status'],
+        'filename': job['filename'],
+        'pages': job['pages'],
+        'submitted_at': job['submitted_at'],
+        'completed_at': job['completed_at']
+    }
+    if job['status'] == 'FAILED':
+        response['error'] = job['error']
+    if job['result']:
+        response.update(job['result'])
+    return api_response(response)
+
+
+# Static instructions go first (as the system prompt) so every request shares the same
+# prefix and Bedrock prompt caching can reuse it; only the user message varies.
+BRIDGE_INSTRUCTIONS = """You are The Bridge - an AI agent that translates complex investment portfolios into understandable "Goal Cards" for Gen Z and Millennial heirs.
+
+Your task: Transform each holding in the portfolio data the user provides into a "Goal Card" that explains:
 - What the holding is in plain language
 - What goal it serves (e.g., "This is your 5-year Home Downpayment fund")
 - Current value and purpose
@@ -274,66 +676,157 @@ Format your response as JSON with a "goal_cards" array. Each card should have:
 
 Also provide a brief overall portfolio summary."""
 
-        # Prepare Bedrock request
-        if 'claude' in model_id.lower():
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 4000,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
-        else:
-            # Default format for other models
-            body = json.dumps({
-                "inputText": prompt,
-                "textGenerationConfig": {
-                    "maxTokenCount": 4000,
-                    "temperature": 0.7,
-                    "topP": 0.9
-                }
-            })
+MENTOR_INSTRUCTIONS = """You are The Mentor - a Just-in-Time financial education tutor for heirs.
 
-        # Invoke Bedrock
-        response = bedrock_client.invoke_model(
-            modelId=model_id,
-            body=body,
-            contentType='application/json',
-            accept='application/json'
-        )
+The user tells you what they are viewing and which concept they want to understand.
 
-        # Parse response
-        response_body = json.loads(response['body'].read())
-        
-        if 'claude' in model_id.lower():
-            summary_text = response_body['content'][0]['text']
-        else:
-            summary_text = response_body.get('results', [{}])[0].get('outputText', '')
-        
-        # Try to parse Goal Cards from response, or create them from the summary
-        goal_cards = parse_goal_cards_from_response(summary_text, portfolio_data)
-        confidence_level = determine_portfolio_confidence_level(portfolio_data)
+Explain this concept in simple, accessible language:
+- Use analogies and examples
+- Relate it to their specific portfolio/holdings if provided
+- Keep it concise (2-3 paragraphs)
+- Be empathetic and encouraging
+- Avoid excessive jargon
 
-        return jsonify({
-            'status': 'success',
-            'summary': summary_text,
-            'goal_cards': goal_cards,  # The Bridge transforms portfolio into Goal Cards
-            'model_used': model_id,
-            'agent': 'The Bridge (Portfolio Summarizer)',
-            'confidence_level': confidence_level
-        })
+If explaining a concept like "diversification", relate it to their actual holdings if available."""
 
-    except ClientError as e:
+# Cached Mentor answers are invalidated whenever the instructions change
+MENTOR_PROMPT_VERSION = hashlib.sha256(MENTOR_INSTRUCTIONS.encode()).hexdigest()[:12]
+
+
+def bridge_summary_prompt(portfolio_data):
+    """User message for The Bridge (instructions are in BRIDGE_INSTRUCTIONS)."""
+    return f"""Portfolio Data:
+{json.dumps(portfolio_data, indent=2)}"""
+
+
+def mentor_prompt(concept, context):
+    """User message for The Mentor (instructions are in MENTOR_INSTRUCTIONS)."""
+    return f"""The user is viewing: {json.dumps(context, indent=2, sort_keys=True)}
+
+They want to understand: {concept}"""
+
+
+def mentor_request_cache_key(prompt, model_id):
+    """Cache key for a Mentor prompt (see mentor_prompt) sent to model_id."""
+    return mentor_cache_key(prompt, model_id, MENTOR_PROMPT_VERSION)
+
+
+def request_portfolio_data(data):
+    """
+    Portfolio data for a request: the body's portfolio_data, or the stored
+    result of the case named by case_id.
+
+    Returns:
+        portfolio_data dict, or None if neither is available
+    """
+    if not data:
+        return None
+    if data.get('portfolio_data'):
+        return data['portfolio_data']
+    case = cases.get(data['case_id']) if data.get('case_id') else None
+    if case and case['result']:
+        return case['result'].get('portfolio_data')
+    return None
+
+
+@app.route('/api/bedrock/summarize', methods=['POST'])
+def summarize_portfolio():
+    """
+    Summarize a portfolio using Amazon Bedrock for heirs.
+    Expects portfolio_data, or the case_id of an uploaded portfolio, in the request body.
+    (Served by async_views.summarize_portfolio under asgi.py.)
+    """
+    data = request.get_json(silent=True)
+    portfolio_data = request_portfolio_data(data)
+    if portfolio_data is None:
         return jsonify({
-            'error': f'AWS Bedrock error: {str(e)}'
-        }), 500
+            'error': 'Please provide portfolio_data or a processed case_id in the request body'
+        }), 400
+
+    model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+
+    # Demo mode - return mock summary with Goal Cards
+    if app.config['DEMO_MODE']:
+        return demo_summary_response(portfolio_data, model_id)
+
+    if not bedrock:
+        return bedrock_not_configured_response()
+
+    try:
+
+        # Create prompt for portfolio summarization (The Bridge agent)
+        prompt = bridge_summary_prompt(portfolio_data)
+
+        # Invoke Bedrock through the shared limiter
+        summary_text = bedrock.invoke_text(model_id, prompt, max_tokens=4000, system=BRIDGE_INSTRUCTIONS)
+
+        return summary_response(summary_text, portfolio_data, model_id)
+
     except Exception as e:
+        return summary_error_response(e)
+
+
+def demo_summary_response(portfolio_data, model_id):
+    """Mock /api/bedrock/summarize response with Goal Cards for demo mode."""
+    total_value = portfolio_data.get('total_value', sum(
+        h.get('value', 0) for h in portfolio_data.get('holdings', [])
+    ))
+
+    # Generate Goal Cards (The Bridge format)
+    goal_cards = parse_goal_cards_from_response('', portfolio_data)
+
+    mock_summary = f"""## Portfolio Summary - The Bridge Translation
+
+This portfolio has a total value of ${total_value:,.2f}. Below are your personalized Goal Cards that translate each holding into understandable goals.
+
+**Agent**: The Bridge (Portfolio Summarizer)
+**Confidence Level**: GREEN (Automated)"""
+
+    return jsonify({
+        'status': 'success',
+        'summary': mock_summary,
+        'goal_cards': goal_cards,  # The Bridge format
+        'model_used': f'{model_id} (demo mode)',
+        'agent': 'The Bridge (Portfolio Summarizer)',
+        'confidence_level': 'GREEN',
+        'demo_mode': True,
+        'note': 'This is a mock response. Set DEMO_MODE=False and add AWS credentials for real AI summaries.'
+    })
+
+
+def bedrock_not_configured_response():
+    return jsonify({
+        'error': 'AWS Bedrock client not configured. Please check your AWS credentials.'
+    }), 500
+
+
+def summary_response(summary_text, portfolio_data, model_id):
+    """Goal Cards and confidence level for a Bedrock summary, as the /api/bedrock/summarize response."""
+    # Try to parse Goal Cards from response, or create them from the summary
+    goal_cards = parse_goal_cards_from_response(summary_text, portfolio_data)
+    confidence_level = determine_portfolio_confidence_level(portfolio_data)
+
+    return jsonify({
+        'status': 'success',
+        'summary': summary_text,
+        'goal_cards': goal_cards,  # The Bridge transforms portfolio into Goal Cards
+        'model_used': model_id,
+        'agent': 'The Bridge (Portfolio Summarizer)',
+        'confidence_level': confidence_level
+    })
+
+
+def summary_error_response(error):
+    """503 for a throttled summary, 500 for any other failure."""
+    if isinstance(error, BedrockThrottledError):
+        return bedrock_busy_response(error)
+    if isinstance(error, ClientError):
         return jsonify({
-            'error': f'Unexpected error: {str(e)}'
+            'error': f'AWS Bedrock error: {str(error)}'
         }), 500
+    return jsonify({
+        'error': f'Unexpected error: {str(error)}'
+    }), 500
 
 
 @app.route('/api/portfolio/upload', methods=['POST'])
@@ -342,11 +835,11 @@ def upload_portfolio():
     Upload portfolio document (PDF/image), extract data with Textract, 
     summarize it with Bedrock, and store in S3.
     Expects a document file upload (PDF, PNG, JPG).
+    The work is queued and a case_id returned at once (HTTP 202); poll
+    /api/cases/<case_id>/status for progress and the result.
+    Query params: ?sync=true processes inline; ?async=true uses a Textract job.
     """
     try:
-        portfolio_data = None
-        extracted_text = None
-        
         # Check if file is uploaded
         if 'file' not in request.files or not request.files['file'].filename:
             return jsonify({
@@ -367,10 +860,354 @@ def upload_portfolio():
         file_content = file.read()
         file.seek(0)  # Reset file pointer for potential re-read
         
-        # Extract text from document using Textract
+        # Async mode - large multi-page PDFs are analyzed by a background Textract job;
+        # its case (same id as the job) is completed by process_textract_job / textract_job_failed
+        if request.args.get('async', '').lower() == 'true':
+            case_id = new_case_id()
+            cases.create(case_id, os.path.basename(file.filename), '', status='RUNNING', stage='textract_job')
+            job_id = textract_jobs.submit(file_content, os.path.basename(file.filename), job_id=case_id)
+            return jsonify({
+                'status': 'accepted',
+                'case_id': case_id,
+                'job_id': job_id,
+                'status_url': f'/api/textract/jobs/{job_id}',
+                'case_status_url': f'/api/cases/{case_id}/status',
+                'demo_mode': app.config['DEMO_MODE']
+            }), 202
+        
+        case_id = new_case_id()
+
+        # ?sync=true processes the upload inside the request (the old behaviour), recorded as a case
+        if request.args.get('sync', '').lower() == 'true':
+            try:
+                result = upload_queue.run_inline(case_id, os.path.basename(file.filename), file_content)
+            except PortfolioUploadError as e:
+                return jsonify({'error': str(e)}), e.status_code
+            return api_response(portfolio_result_payload(result)), 200
+
+        # Default - queue the upload and return the case id at once
+        upload_queue.enqueue(case_id, os.path.basename(file.filename), file_content)
+        return jsonify({
+            'status': 'accepted',
+            'case_id': case_id,
+            'case_status': 'QUEUED',
+            'status_url': f'/api/cases/{case_id}/status',
+            'demo_mode': app.config['DEMO_MODE']
+        }), 202
+
+    except Exception as e:
+        return jsonify({
+            'error': f'Failed to upload portfolio: {str(e)}'
+        }), 500
+
+
+@app.route('/api/cases/<case_id>/status', methods=['GET'])
+def get_case_status(case_id):
+    """
+    Status of a queued portfolio upload.
+    Returns status (QUEUED, RUNNING, SUCCEEDED, FAILED), the current stage and
+    progress percent; once SUCCEEDED, also the full upload result.
+    """
+    case = cases.get(case_id)
+    if case is None:
+        return jsonify({'error': f'Unknown case: {case_id}'}), 404
+
+    response = {
+        'status': 'success',
+        'case_id': case_id,
+        'case_status': case['status'],
+        'filename': case['filename'],
+        'stage': case['stage'],
+        'progress': case['progress'],
+        'created_at': case['created_at'],
+        'updated_at': case['updated_at']
+    }
+    if case['status'] == 'FAILED':
+        response['error'] = case['error']
+    if case['result']:
+        response.update(portfolio_result_payload(case['result']))
+    return api_response(response)
+
+
+@app.route('/api/cases', methods=['GET'])
+def list_cases():
+    """
+    List cases, newest first (summary columns only).
+    Query params: ?limit= (default 50, max 500), ?offset=, ?status=QUEUED|RUNNING|SUCCEEDED|FAILED
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    return api_response({
+        'status': 'success',
+        'cases': cases.list(limit=limit, offset=offset, status=request.args.get('status')),
+        'limit': limit,
+        'offset': offset
+    })
+
+
+@app.route('/api/cases/<case_id>', methods=['GET'])
+def get_case(case_id):
+    """
+    Full case record: upload status, extracted columns and the stored result.
+    Query params: ?fields= projects the payload; ?include=text inlines the OCR text.
+    """
+    case = cases.get(case_id)
+    if case is None:
+        return jsonify({'error': f'Unknown case: {case_id}'}), 404
+    case['result'] = portfolio_result_payload(case['result'])
+    return api_response({'status': 'success', 'case': case})
+
+
+@app.route('/api/cases/<case_id>/text', methods=['GET'])
+def get_case_text(case_id):
+    """The OCR text of a case's document (omitted from case results unless ?include=text)."""
+    case = cases.get(case_id)
+    portfolio_data = ((case or {}).get('result') or {}).get('portfolio_data') or {}
+    text = portfolio_data.get('extracted_text')
+    if text is None and portfolio_codec.text_ref_digest(portfolio_data):
+        text = cases.get_text(portfolio_codec.text_ref_digest(portfolio_data))
+    if text is None:
+        return jsonify({'error': f'No extracted text for case: {case_id}'}), 404
+    return Response(text, mimetype='text/plain')
+
+
+def portfolio_result_payload(result):
+    """
+    An upload result as returned to clients. The OCR text in portfolio_data is
+    replaced by extracted_text_ref (fetch it from /api/cases/<case_id>/text)
+    unless the caller asks for ?include=text.
+    """
+    portfolio_data = (result or {}).get('portfolio_data')
+    if not portfolio_data:
+        return result
+    detached, text = portfolio_codec.detach_text(portfolio_data)
+    if 'text' in parse_list_param(request.args.get('include')):
+        if text is None:
+            text = cases.get_text(portfolio_codec.text_ref_digest(detached) or '')
+        if text is not None:
+            detached = portfolio_codec.attach_text(detached, text)
+    return dict(result, portfolio_data=detached)
+
+
+class PortfolioUploadError(Exception):
+    """An upload that cannot be processed; carries the HTTP status to report."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def new_case_id():
+    """Unique, time-ordered case id (uploads in the same second no longer collide)."""
+    return f"portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def extract_portfolio_document(file_content, filename):
+    """
+    Run Textract on an uploaded document (cached by document hash).
+
+    Returns:
+        Tuple of (textract_response or None in demo mode, extracted_text)
+    """
+    textract_response = None
+    if app.config['DEMO_MODE']:
+        # Demo mode - mock extraction
+        extracted_text = demo_statement_text()
+    else:
+        # Real Textract extraction
+        if not textract_client:
+            raise PortfolioUploadError('AWS Textract client not configured. Please check your AWS credentials.', 500)
+        
+        try:
+            # Use Textract to extract text (cached by document hash)
+            if filename.endswith('.pdf'):
+                response, _ = cached_textract_call(
+                    textract_cache, textract_client, 'analyze_document', file_content, ['TABLES', 'FORMS']
+                )
+            else:
+                # For images
+                response, _ = cached_textract_call(
+                    textract_cache, textract_client, 'detect_document_text', file_content
+                )
+            
+            textract_response = response
+            extracted_text = extract_text_from_textract(response)
+            
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code', '')
+            if error_code == 'AccessDeniedException':
+                raise PortfolioUploadError('AWS Textract access denied. Please check your IAM permissions.', 403)
+            else:
+                raise PortfolioUploadError(f'AWS Textract error: {str(e)}', 500)
+        except Exception as e:
+            raise PortfolioUploadError(f'Failed to extract text from document: {str(e)}', 500)
+    
+    return textract_response, extracted_text
+
+
+def summarize_uploaded_portfolio(portfolio_data):
+    """Bridge summary and Goal Cards for an upload; falls back to a plain summary on errors."""
+    summary_response = None
+    try:
+        model_id = 'us.anthropic.claude-3-sonnet-20240229-v1:0'
         if app.config['DEMO_MODE']:
-            # Demo mode - mock extraction
-            extracted_text = f"""Portfolio Statement for Sample Client
+            total_value = portfolio_data.get('total_value', sum(
+                h.get('value', 0) for h in portfolio_data.get('holdings', [])
+            ))
+            goal_cards = parse_goal_cards_from_response('', portfolio_data)
+            summary_response = {
+                'summary': f'Portfolio with total value of ${total_value:,.2f}',
+                'goal_cards': goal_cards,
+                'confidence_level': 'GREEN'
+            }
+        else:
+            # Call summarize_portfolio logic directly
+            if bedrock:
+                prompt = bridge_summary_prompt(portfolio_data)
+                
+                summary_text = bedrock.invoke_text(model_id, prompt, max_tokens=4000, system=BRIDGE_INSTRUCTIONS)
+                goal_cards = parse_goal_cards_from_response(summary_text, portfolio_data)
+                confidence_level = determine_portfolio_confidence_level(portfolio_data)
+                
+                summary_response = {
+                    'summary': summary_text,
+                    'goal_cards': goal_cards,
+                    'confidence_level': confidence_level
+                }
+            else:
+                summary_response = {
+                    'summary': 'Portfolio uploaded successfully',
+                    'goal_cards': [],
+                    'confidence_level': 'YELLOW'
+                }
+    except Exception as e:
+        print(f"Warning: Summary generation failed: {e}")
+        summary_response = {
+            'summary': 'Portfolio uploaded successfully',
+            'goal_cards': [],
+            'confidence_level': 'YELLOW'
+        }
+
+    return summary_response
+
+
+def store_portfolio(portfolio_data, case_id):
+    """
+    Write portfolio_data to the storage backend; returns the key (None without storage).
+    The portfolio is stored compressed (PORTFOLIO_FORMAT) and its OCR text once,
+    under texts/<sha256>.txt.gz, referenced by portfolio_data['extracted_text_ref'].
+    """
+    suffix, content_type = portfolio_codec.FORMATS[app.config['PORTFOLIO_FORMAT']]
+    key = f"portfolios/{case_id}{suffix}"
+    if storage is None:
+        # Demo mode with the S3 backend - just log
+        print(f"Demo mode: Would save portfolio to S3 at {key}")
+        return None
+
+    try:
+        portfolio_data, text = portfolio_codec.detach_text(portfolio_data)
+        if text is not None:
+            text_key = f"texts/{portfolio_data['extracted_text_ref']['sha256']}.txt.gz"
+            storage.put(text_key, gzip.compress(text.encode()), content_type='text/plain')
+        storage.put(key, portfolio_codec.encode(portfolio_data, app.config['PORTFOLIO_FORMAT']),
+                    content_type=content_type)
+    except Exception as e:
+        # The upload continues without storage; the stage is reported as failed
+        print(f"Warning: Portfolio storage failed: {e}")
+        raise
+    return key
+
+
+def process_portfolio_upload(file_content, source_filename, case_id, progress=None):
+    """
+    Extract, parse, summarize and store an uploaded portfolio document.
+    Runs on the upload queue's workers (or inline with ?sync=true).
+
+    The Bedrock summary and the S3 write only depend on the parsed portfolio,
+    so they run concurrently; either may fail or time out without failing the
+    upload. Per-stage timings are returned in result['metadata'].
+
+    Args:
+        file_content: Raw document bytes
+        source_filename: Original filename
+        case_id: Case id assigned at upload
+        progress: Optional callable(stage, percent) for status reporting
+
+    Returns:
+        The upload result dict
+
+    Raises:
+        PortfolioUploadError: Textract failures or documents without portfolio data
+    """
+    progress = progress or (lambda stage, percent: None)
+    filename = source_filename.lower()
+
+    def extract(inputs):
+        progress('extracting', 10)
+        return extract_portfolio_document(file_content, filename)
+
+    def parse(inputs):
+        # Parse Textract tables/forms (or the extracted text) into a portfolio data structure
+        progress('parsing', 40)
+        textract_response, extracted_text = inputs['extract']
+        portfolio_data = parse_portfolio_from_textract(textract_response, extracted_text, filename)
+        if not portfolio_data:
+            raise PortfolioUploadError('Could not extract portfolio data from document. Please ensure the document contains account information.', 400)
+
+        # Add metadata
+        portfolio_data['case_id'] = case_id
+        portfolio_data['uploaded_at'] = datetime.now().isoformat()
+        portfolio_data['source_document'] = source_filename
+        portfolio_data['extracted_text'] = extracted_text
+        return portfolio_data
+
+    def summarize(inputs):
+        progress('summarizing', 55)
+        return summarize_uploaded_portfolio(inputs['parse'])
+
+    def store(inputs):
+        return store_portfolio(inputs['parse'], case_id)
+
+    run = run_stages([
+        Stage('extract', extract),
+        Stage('parse', parse, deps=['extract']),
+        Stage('summarize', summarize, deps=['parse'], timeout=app.config['UPLOAD_SUMMARY_TIMEOUT'], required=False),
+        Stage('store_s3', store, deps=['parse'], timeout=app.config['UPLOAD_S3_TIMEOUT'], required=False)
+    ], stage_executor)
+    progress('finalizing', 95)
+
+    portfolio_data = run.results['parse']
+    summary_response = run.results.get('summarize') or {
+        'summary': 'Portfolio uploaded successfully',
+        'goal_cards': [],
+        'confidence_level': 'YELLOW'
+    }
+
+    # Combine portfolio data with summary
+    result = {
+        'status': 'success',
+        'case_id': case_id,
+        'portfolio_data': portfolio_data,
+        'summary': summary_response.get('summary', ''),
+        'goal_cards': summary_response.get('goal_cards', []),
+        'confidence_level': summary_response.get('confidence_level', 'GREEN'),
+        's3_key': run.results.get('store_s3'),
+        'storage_backend': storage.name if storage else None,
+        'uploaded_at': portfolio_data['uploaded_at'],
+        'demo_mode': app.config['DEMO_MODE'],
+        'metadata': run.metadata()
+    }
+
+    return result
+
+
+def demo_statement_text():
+    """Mock portfolio statement text used in demo mode."""
+    return f"""Portfolio Statement for Sample Client
 Date: {datetime.now().strftime('%Y-%m-%d')}
 
 Account Summary:
@@ -386,248 +1223,147 @@ Account Summary:
 Total Portfolio Value: $250,000.00
 
 This is a mock extraction. Enable real AWS Textract by setting DEMO_MODE=False."""
-        else:
-            # Real Textract extraction
-            if not textract_client:
-                return jsonify({
-                    'error': 'AWS Textract client not configured. Please check your AWS credentials.'
-                }), 500
-            
-            try:
-                # Use Textract to extract text
-                if filename.endswith('.pdf'):
-                    response = textract_client.analyze_document(
-                        Document={'Bytes': file_content},
-                        FeatureTypes=['TABLES', 'FORMS']
-                    )
-                else:
-                    # For images
-                    response = textract_client.detect_document_text(
-                        Document={'Bytes': file_content}
-                    )
-                
-                extracted_text = extract_text_from_textract(response)
-                
-            except ClientError as e:
-                error_code = e.response.get('Error', {}).get('Code', '')
-                if error_code == 'AccessDeniedException':
-                    return jsonify({
-                        'error': 'AWS Textract access denied. Please check your IAM permissions.'
-                    }), 403
-                else:
-                    return jsonify({
-                        'error': f'AWS Textract error: {str(e)}'
-                    }), 500
-            except Exception as e:
-                return jsonify({
-                    'error': f'Failed to extract text from document: {str(e)}'
-                }), 500
-        
-        # Parse extracted text to create portfolio data structure
-        portfolio_data = parse_portfolio_from_text(extracted_text, filename)
-        
-        if not portfolio_data:
-            return jsonify({
-                'error': 'Could not extract portfolio data from document. Please ensure the document contains account information.'
-            }), 400
-
-        # Generate case ID and timestamp
-        case_id = f"portfolio_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        timestamp = datetime.now().isoformat()
-        
-        # Add metadata
-        portfolio_data['case_id'] = case_id
-        portfolio_data['uploaded_at'] = timestamp
-        portfolio_data['source_document'] = file.filename
-        portfolio_data['extracted_text'] = extracted_text
-        
-        # Summarize portfolio using Bedrock
-        summary_response = None
-        try:
-            model_id = 'us.anthropic.claude-3-sonnet-20240229-v1:0'
-            if app.config['DEMO_MODE']:
-                total_value = portfolio_data.get('total_value', sum(
-                    h.get('value', 0) for h in portfolio_data.get('holdings', [])
-                ))
-                goal_cards = parse_goal_cards_from_response('', portfolio_data)
-                summary_response = {
-                    'summary': f'Portfolio with total value of ${total_value:,.2f}',
-                    'goal_cards': goal_cards,
-                    'confidence_level': 'GREEN'
-                }
-            else:
-                # Call summarize_portfolio logic directly
-                if bedrock_client:
-                    prompt = f"""You are The Bridge - an AI agent that translates complex investment portfolios into understandable "Goal Cards" for Gen Z and Millennial heirs.
-
-Portfolio Data:
-{json.dumps(portfolio_data, indent=2)}
-
-Transform each holding into a "Goal Card" that explains what it is in plain language, what goal it serves, current value, and timeline."""
-                    
-                    body = json.dumps({
-                        "anthropic_version": "bedrock-2023-05-31",
-                        "max_tokens": 4000,
-                        "messages": [{"role": "user", "content": prompt}]
-                    })
-                    
-                    response = bedrock_client.invoke_model(
-                        modelId=model_id,
-                        body=body,
-                        contentType='application/json',
-                        accept='application/json'
-                    )
-                    
-                    response_body = json.loads(response['body'].read())
-                    summary_text = response_body['content'][0]['text']
-                    goal_cards = parse_goal_cards_from_response(summary_text, portfolio_data)
-                    confidence_level = determine_portfolio_confidence_level(portfolio_data)
-                    
-                    summary_response = {
-                        'summary': summary_text,
-                        'goal_cards': goal_cards,
-                        'confidence_level': confidence_level
-                    }
-                else:
-                    summary_response = {
-                        'summary': 'Portfolio uploaded successfully',
-                        'goal_cards': [],
-                        'confidence_level': 'YELLOW'
-                    }
-        except Exception as e:
-            print(f"Warning: Summary generation failed: {e}")
-            summary_response = {
-                'summary': 'Portfolio uploaded successfully',
-                'goal_cards': [],
-                'confidence_level': 'YELLOW'
-            }
 
-        # Store in S3 (or localStorage in demo mode)
-        s3_key = None
-        if not app.config['DEMO_MODE'] and s3_client:
-            try:
-                bucket_name = os.getenv('S3_BUCKET_NAME', 'lpl-heritage-hub-portfolios')
-                s3_key = f"portfolios/{case_id}.json"
-                
-                # Ensure bucket exists (create if not)
-                try:
-                    s3_client.head_bucket(Bucket=bucket_name)
-                except ClientError:
-                    # Bucket doesn't exist, create it
-                    s3_client.create_bucket(
-                        Bucket=bucket_name,
-                        CreateBucketConfiguration={'LocationConstraint': app.config['AWS_REGION']}
-                    )
-                
-                # Upload to S3
-                s3_client.put_object(
-                    Bucket=bucket_name,
-                    Key=s3_key,
-                    Body=json.dumps(portfolio_data, indent=2),
-                    ContentType='application/json'
-                )
-            except Exception as e:
-                print(f"Warning: S3 upload failed: {e}")
-                # Continue without S3 storage
-        else:
-            # Demo mode - just log
-            print(f"Demo mode: Would save portfolio to S3 at portfolios/{case_id}.json")
 
-        # Combine portfolio data with summary
-        result = {
-            'status': 'success',
-            'case_id': case_id,
-            'portfolio_data': portfolio_data,
-            'summary': summary_response.get('summary', ''),
-            'goal_cards': summary_response.get('goal_cards', []),
-            'confidence_level': summary_response.get('confidence_level', 'GREEN'),
-            's3_key': s3_key,
-            'uploaded_at': timestamp,
-            'demo_mode': app.config['DEMO_MODE']
-        }
+def _textract_blocks(response):
+    """Blocks from a Textract response dict, or a (possibly lazy) iterable of blocks."""
+    if response is None:
+        return []
+    if isinstance(response, dict):
+        return response.get('Blocks', [])
+    return response
 
-        return jsonify(result), 200
 
-    except Exception as e:
-        return jsonify({
-            'error': f'Failed to upload portfolio: {str(e)}'
-        }), 500
+def iter_textract_lines(response):
+    """Stream the text of LINE blocks from a Textract response (or an iterable of blocks), in document order."""
+    for block in _textract_blocks(response):
+        if block['BlockType'] == 'LINE':
+            yield block['Text']
 
 
 def extract_text_from_textract(response):
-    """Extract text from Textract response."""
-    text = ""
-    if 'Blocks' in response:
-        for block in response['Blocks']:
-            if block['BlockType'] == 'LINE':
-                text += block['Text'] + "\n"
-    return text.strip()
+    """Extract text from Textract response (linear in the number of blocks)."""
+    return '\n'.join(iter_textract_lines(response)).strip()
+
+
+# Portfolio statement vocabulary, in priority order (first match on a line wins)
+PORTFOLIO_ACCOUNT_TYPES = ['Roth IRA', 'Traditional IRA', 'IRA', '401(k)', 'Brokerage',
+                           'Savings', 'Checking', 'Investment Account', 'Retirement Account']
+PORTFOLIO_ASSET_CLASSES = ['Stocks', 'Bonds', 'ETFs', 'Mutual Funds', 'Large Cap',
+                           'Small Cap', 'Value', 'Growth', 'Real Estate', 'Cash']
+
+# How many lines after an account mention can describe its holdings
+# (the section also ends at the next account mention or a blank line)
+ASSET_CONTEXT_LINES = 3
+
+TOTAL_VALUE_PATTERN = re.compile(r'(?:total|value|balance)[:\s]+\$?([\d,]+\.?\d*)', re.IGNORECASE)
+
 
+def _alternation(names):
+    """Case-insensitive alternation, longest names first so overlaps resolve to the longer one."""
+    return '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
 
+
+# One tokenizer for the whole statement: line breaks, dollar amounts,
+# account-type mentions and asset-class mentions
+PORTFOLIO_TOKEN_PATTERN = re.compile(
+    r'(?P<newline>\n)|(?P<amount>\(?-?\$[\d,]+\.?\d*\)?)'
+    rf'|(?P<account>{_alternation(PORTFOLIO_ACCOUNT_TYPES)})'
+    rf'|(?P<asset>{_alternation(PORTFOLIO_ASSET_CLASSES)})',
+    re.IGNORECASE
+)
+_ACCOUNT_TYPE_RANK = {name.upper(): rank for rank, name in enumerate(PORTFOLIO_ACCOUNT_TYPES)}
+_ASSET_CLASS_RANK = {name.upper(): rank for rank, name in enumerate(PORTFOLIO_ASSET_CLASSES)}
+
+
+def index_portfolio_text(extracted_text):
+    """
+    Tokenize statement text in a single pass.
+    Returns one entry per line with its span, best account-type mention,
+    first dollar amount and asset-class mentions, plus every dollar amount.
+    """
+    lines = [{'start': 0, 'account': None, 'amount': None, 'assets': set()}]
+    amounts = []
+    for match in PORTFOLIO_TOKEN_PATTERN.finditer(extracted_text):
+        kind = match.lastgroup
+        line = lines[-1]
+        if kind == 'newline':
+            line['end'] = match.start()
+            lines.append({'start': match.end(), 'account': None, 'amount': None, 'assets': set()})
+        elif kind == 'amount':
+            amounts.append(match.group())
+            if line['amount'] is None:
+                line['amount'] = match.group()
+        elif kind == 'account':
+            rank = _ACCOUNT_TYPE_RANK[match.group().upper()]
+            if line['account'] is None or rank < line['account']:
+                line['account'] = rank
+        else:
+            line['assets'].add(_ASSET_CLASS_RANK[match.group().upper()])
+    lines[-1]['end'] = len(extracted_text)
+    return lines, amounts
+
+
+def _parse_amount(amount_str):
+    """'$1,234.56' -> 1234.56; '-$1,234.56' and '($1,234.56)' are negative."""
+    value = float(amount_str.strip('()-').replace('$', '').replace(',', ''))
+    negative = amount_str.lstrip('(').startswith('-') or amount_str.startswith('(') and amount_str.endswith(')')
+    return -value if negative else value
+
+
+@metrics.timed('parse_portfolio_from_text')
 def parse_portfolio_from_text(extracted_text, filename):
     """
     Parse portfolio data from extracted text.
     Looks for account types, balances, holdings, etc.
+    The text is tokenized once; asset classes are attributed from the account's
+    own line and the lines just below it, not from the whole document.
     """
-    import re
-    
     portfolio_data = {
         'total_value': 0,
         'holdings': [],
         'source_file': filename
     }
     
-    # Look for dollar amounts
-    dollar_pattern = r'\$[\d,]+\.?\d*'
-    amounts = re.findall(dollar_pattern, extracted_text)
+    lines, amounts = index_portfolio_text(extracted_text)
+    account_lines = [i for i, line in enumerate(lines) if line['account'] is not None]
     
-    # Look for account types
-    account_types = ['Roth IRA', 'Traditional IRA', 'IRA', '401\(k\)', 'Brokerage', 
-                     'Savings', 'Checking', 'Investment Account', 'Retirement Account']
-    
-    # Look for asset classes
-    asset_classes = ['Stocks', 'Bonds', 'ETFs', 'Mutual Funds', 'Large Cap', 
-                     'Small Cap', 'Value', 'Growth', 'Real Estate', 'Cash']
-    
-    # Try to extract account information
-    lines = extracted_text.split('\n')
-    current_account = None
-    
-    for line in lines:
-        line_upper = line.upper()
+    for position, index in enumerate(account_lines):
+        line = lines[index]
+        if line['amount'] is None:
+            continue
+        try:
+            balance = _parse_amount(line['amount'])
+        except ValueError:
+            continue
+        if balance <= 0:
+            continue  # A debit or overdrawn balance is not a holding
         
-        # Check for account type
-        for acc_type in account_types:
-            if acc_type.upper() in line_upper:
-                # Extract balance from this line or next few lines
-                balance_match = re.search(dollar_pattern, line)
-                if balance_match:
-                    balance_str = balance_match.group(0).replace('$', '').replace(',', '')
-                    try:
-                        balance = float(balance_str)
-                        
-                        # Find asset classes mentioned nearby
-                        found_assets = []
-                        for asset in asset_classes:
-                            if asset.upper() in line_upper or asset.upper() in extracted_text.upper():
-                                found_assets.append(asset)
-                        
-                        portfolio_data['holdings'].append({
-                            'type': acc_type,
-                            'category': acc_type,
-                            'value': balance,
-                            'asset_classes': found_assets if found_assets else ['Mixed Assets'],
-                            'description': line.strip()
-                        })
-                        portfolio_data['total_value'] += balance
-                    except ValueError:
-                        pass
-                break
+        # Asset classes mentioned on this line or just below it
+        context_end = index + 1 + ASSET_CONTEXT_LINES
+        if position + 1 < len(account_lines):
+            context_end = min(context_end, account_lines[position + 1])
+        asset_ranks = set(line['assets'])
+        for nearby in lines[index + 1:context_end]:
+            if not extracted_text[nearby['start']:nearby['end']].strip():
+                break  # A blank line ends the account's section
+            asset_ranks |= nearby['assets']
+        found_assets = [PORTFOLIO_ASSET_CLASSES[rank] for rank in sorted(asset_ranks)]
+        
+        acc_type = PORTFOLIO_ACCOUNT_TYPES[line['account']]
+        portfolio_data['holdings'].append({
+            'type': acc_type,
+            'category': acc_type,
+            'value': balance,
+            'asset_classes': found_assets if found_assets else ['Mixed Assets'],
+            'description': extracted_text[line['start']:line['end']].strip()
+        })
+        portfolio_data['total_value'] += balance
     
     # If no structured accounts found, create a generic one from total
     if len(portfolio_data['holdings']) == 0:
         # Try to find total value
-        total_match = re.search(r'(?:total|value|balance)[:\s]+\$?([\d,]+\.?\d*)', extracted_text, re.IGNORECASE)
+        total_match = TOTAL_VALUE_PATTERN.search(extracted_text)
         if total_match:
             try:
                 total_value = float(total_match.group(1).replace(',', ''))
@@ -647,7 +1383,7 @@ def parse_portfolio_from_text(extracted_text, filename):
         # Extract any dollar amount as total
         if amounts:
             try:
-                largest_amount = max([float(a.replace('$', '').replace(',', '')) for a in amounts])
+                largest_amount = max(_parse_amount(a) for a in amounts)
                 portfolio_data['total_value'] = largest_amount
                 portfolio_data['holdings'].append({
                     'type': 'Portfolio',
@@ -662,12 +1398,155 @@ def parse_portfolio_from_text(extracted_text, filename):
     return portfolio_data if portfolio_data['total_value'] > 0 else None
 
 
+# Form keys that carry account values
+VALUE_LABEL_PATTERN = re.compile(r'total|account value|market value|portfolio value|balance|amount|value', re.IGNORECASE)
+TOTAL_LABEL_PATTERN = re.compile(r'^\W*total\b', re.IGNORECASE)
+# A holdings table names its positions and their value; transaction activity tables are skipped
+HOLDINGS_NAME_HEADER_PATTERN = re.compile(r'holding|account|securit(?:y|ies)|position|fund|asset', re.IGNORECASE)
+HOLDINGS_VALUE_HEADER_PATTERN = re.compile(r'value|balance', re.IGNORECASE)
+ACTIVITY_HEADER_PATTERN = re.compile(
+    r'transaction|activity|debit|credit|^\W*(?:trade |settlement |posting )?date\W*$', re.IGNORECASE
+)
+
+
+def _block_index(textract_response):
+    """BlockIndex for a response dict (or pass an existing index through)."""
+    if isinstance(textract_response, BlockIndex):
+        return textract_response
+    if not textract_response:
+        return None
+    return BlockIndex.from_response(textract_response)
+
+
+def _table_value_columns(rows):
+    """
+    (name column, value column) for a holdings table, else None.
+    The header must name the positions (holding/account/security) and their
+    value or balance, and must not look like transaction activity.
+    """
+    header = rows[0]
+    if any(ACTIVITY_HEADER_PATTERN.search(h) for h in header):
+        return None
+    value_col = next((i for i, h in enumerate(header) if HOLDINGS_VALUE_HEADER_PATTERN.search(h)), None)
+    if value_col is None:
+        return None
+    name_col = next((i for i, h in enumerate(header) if i != value_col and HOLDINGS_NAME_HEADER_PATTERN.search(h)), None)
+    if name_col is None:
+        return None
+    return name_col, value_col
+
+
+def holdings_from_block_index(index):
+    """
+    Build holdings from holdings-table rows, or from FORMS fields keyed by an
+    account type whose key names a value or whose value looks like currency
+    (so "Roth IRA Account Number: 4417-2290-31" is not a balance).
+    Only positive values are holdings.
+    Returns (holdings, method) where method is 'tables', 'forms' or None.
+    """
+    holdings = []
+    for table in index.tables():
+        rows = table['rows']
+        if len(rows) < 2 or not _table_value_columns(rows):
+            continue
+        name_col, value_col = _table_value_columns(rows)
+        for row in rows[1:]:
+            name = row[name_col].strip()
+            value = parse_amount(row[value_col])
+            if not name or value is None or value <= 0 or TOTAL_LABEL_PATTERN.search(name):
+                continue
+            holdings.append(_structured_holding(name, value, ' '.join(row)))
+    if holdings:
+        return holdings, 'tables'
+
+    for pair in index.key_values():
+        lines, _ = index_portfolio_text(pair['key'])
+        if lines[0]['account'] is None:
+            continue
+        if not (VALUE_LABEL_PATTERN.search(pair['key']) or looks_like_currency(pair['value'])):
+            continue
+        value = parse_amount(pair['value'])
+        if value is not None and value > 0:
+            holdings.append(_structured_holding(pair['key'], value, f"{pair['key']}: {pair['value']}"))
+    return holdings, ('forms' if holdings else None)
+
+
+def _structured_holding(name, value, context):
+    """Holding dict for a table row or form field, typed by the account/asset names it mentions."""
+    lines, _ = index_portfolio_text(context.replace('\n', ' '))
+    account = lines[0]['account']
+    acc_type = PORTFOLIO_ACCOUNT_TYPES[account] if account is not None else 'Holding'
+    assets = [PORTFOLIO_ASSET_CLASSES[rank] for rank in sorted(lines[0]['assets'])]
+    return {
+        'name': name.strip(' -*•\t'),
+        'type': acc_type,
+        'category': acc_type,
+        'value': value,
+        'asset_classes': assets if assets else ['Mixed Assets'],
+        'description': context.strip()
+    }
+
+
+def parse_portfolio_from_textract(textract_response, extracted_text, filename):
+    """
+    Parse portfolio data from Textract FORMS/TABLES output,
+    falling back to regex parsing of the flattened text.
+    """
+    index = _block_index(textract_response)
+    if index is not None and index.has_structure:
+        holdings, method = holdings_from_block_index(index)
+        if holdings:
+            return {
+                'total_value': sum(h['value'] for h in holdings),
+                'holdings': holdings,
+                'source_file': filename,
+                'extraction_method': method
+            }
+
+    portfolio_data = parse_portfolio_from_text(extracted_text, filename)
+    if portfolio_data:
+        portfolio_data['extraction_method'] = 'text'
+    return portfolio_data
+
+
+def extract_structured_account_value(index):
+    """
+    Account value from FORMS fields and TABLES cells.
+    A field or row labelled "Total" wins; otherwise the largest labelled value.
+    """
+    totals, values = [], []
+    for pair in index.key_values():
+        if VALUE_LABEL_PATTERN.search(pair['key']):
+            amount = parse_amount(pair['value'])
+            if amount and amount > 0:
+                (totals if TOTAL_LABEL_PATTERN.search(pair['key']) else values).append(amount)
+
+    for table in index.tables():
+        rows = table['rows']
+        if len(rows) < 2 or not _table_value_columns(rows):
+            continue
+        name_col, value_col = _table_value_columns(rows)
+        for row in rows[1:]:
+            amount = parse_amount(row[value_col])
+            if amount and amount > 0:
+                (totals if TOTAL_LABEL_PATTERN.search(row[name_col]) else values).append(amount)
+
+    if totals:
+        return max(totals)
+    return max(values) if values else None
+
+
 def extract_account_value(textract_response, extracted_text):
     """
     Extract total account value from Textract response.
-    Looks for dollar amounts, account balances, total values, etc.
+    Uses FORMS/TABLES output when present, falling back to
+    dollar amounts, account balances, total values, etc. in the text.
     """
-    import re
+    index = _block_index(textract_response)
+    if index is not None and index.has_structure:
+        structured_value = extract_structured_account_value(index)
+        if structured_value:
+            return structured_value
     
     # Look for dollar amounts in the text
     dollar_patterns = [
@@ -697,6 +1576,21 @@ def extract_account_value(textract_response, extracted_text):
     return 0.0
 
 
+def generate_personalized_goals(risk_tolerance):
+    """Generate starter goals for an heir based on their risk tolerance."""
+    base_goals = [
+        {
+            'id': 'goal_1',
+            'title': '📋 Organize Estate Documents',
+            'description': 'Gather and organize all inheritance-related documents',
+            'category': 'organization',
+            'priority': 'high',
+            'points_reward': 50,
+            'estimated_time': '2-3 hours',
+            'status': 'not_started',
+            'steps': [
+                'Locate will and trust documents',
+                'Gather recent account statements',
                 'Create digital backup of important papers'
             ]
         },
@@ -793,41 +1687,21 @@ def generate_goals_for_case(case_id):
     """
     Generate goal cards for a specific case from portfolio data.
     Uses total_account_value from portfolio analysis.
-    Expects: { "portfolio_data": {...}, "total_account_value": 50000.0 }
+    Expects: { "portfolio_data": {...}, "total_account_value": 50000.0 }; either may be
+    omitted for a stored case, whose result and account value are looked up by case_id.
     """
-    try:
-        from goal_generator import generate_goals
-    except ImportError:
-        # Fallback if goal_generator not available
-        return jsonify({
-            'error': 'Goal generator module not found',
-            'goal_cards': []
-        }), 500
-    
-    data = request.get_json()
-    if not data:
-        return jsonify({'error': 'Please provide request body'}), 400
-    
-    portfolio_data = data.get('portfolio_data', {})
-    total_account_value = data.get('total_account_value', 0)
-    
-    # If total_account_value not provided, try to get from case data or use default
-    if not total_account_value:
-        # In a real app, you'd fetch this from case storage (S3, database, etc.)
-        total_account_value = 50000.0  # Default for demo
-    
+    data = request.get_json(silent=True) or {}
+    case = None
+    if not data.get('portfolio_data') or not data.get('total_account_value'):
+        case = cases.get(case_id)
+    item, error = resolve_goal_item(case_id, data, case)
+    if error:
+        return jsonify({'error': error}), 404
+
     try:
         # Generate goals from portfolio data instead of quiz answers
-        goal_cards = generate_goals_from_portfolio(portfolio_data, total_account_value)
-        
-        return jsonify({
-            'status': 'success',
-            'case_id': case_id,
-            'total_account_value': total_account_value,
-            'goal_cards': goal_cards,
-            'budget_used': sum(g.get('allocated_amount', 0) for g in goal_cards),
-            'budget_remaining': total_account_value - sum(g.get('allocated_amount', 0) for g in goal_cards)
-        })
+        goal_cards = generate_goals_from_portfolio(item['portfolio_data'], item['total_account_value'])
+        return jsonify(goal_result(case_id, goal_cards, item['total_account_value']))
     except Exception as e:
         import traceback
         print(f"Error generating goals: {e}")
@@ -838,20 +1712,141 @@ def generate_goals_for_case(case_id):
         }), 500
 
 
-def generate_goals_from_portfolio(portfolio_data, total_value):
-    """Generate goal cards from portfolio data."""
-    # This would use the portfolio data to generate relevant goals
-    # For now, return basic goal structure
-    return [
-        {
-            'id': 'goal_1',
-            'title': 'Portfolio Review',
-            'description': 'Review and understand your inherited portfolio',
-            'current_value': total_value,
-            'target_amount': total_value,
-            'timeline': 'Ongoing'
-        }
-    ]
+def resolve_goal_item(case_id, data, case):
+    """
+    Fill in what a goal request left out from its stored case.
+
+    Args:
+        case_id: Case the goals are for
+        data: Request item (portfolio_data, total_account_value, quiz_answers, selected_goals)
+        case: The stored case (None if unknown or not looked up)
+
+    Returns:
+        (item for goal_item_result, None) or (None, error message)
+    """
+    portfolio_data = data.get('portfolio_data')
+    total_account_value = data.get('total_account_value') or 0
+    quiz_mode = data.get('quiz_answers') is not None or bool(data.get('selected_goals'))
+
+    # Fill in whatever the body left out from the stored case
+    if case is None and not portfolio_data and not quiz_mode:
+        return None, f'Unknown case: {case_id}. Provide portfolio_data in the request body'
+    if case is not None:
+        result = case['result'] or {}
+        portfolio_data = portfolio_data or result.get('portfolio_data') or {}
+        total_account_value = total_account_value or case['total_account_value']
+
+    if not total_account_value:
+        total_account_value = 50000.0  # Default for demo
+
+    return {
+        'case_id': case_id,
+        'portfolio_data': portfolio_data or {},
+        'total_account_value': total_account_value,
+        'quiz_answers': data.get('quiz_answers'),
+        'selected_goals': data.get('selected_goals')
+    }, None
+
+
+def iter_bulk_goal_items():
+    """
+    Items of a bulk goal request: NDJSON lines read from the request stream
+    (Content-Type application/x-ndjson), or a JSON body {"items": [...]} or
+    {"case_ids": [...]}. A bare string item is a case id.
+    Yields (item dict, None), or (None, error message) for unusable items.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield bulk_goal_item(json.loads(line))
+            except ValueError as e:
+                yield None, f'Invalid JSON line: {str(e)}'
+        return
+
+    data = request.get_json(silent=True) or {}
+    for item in data.get('items') or data.get('case_ids') or []:
+        yield bulk_goal_item(item)
+
+
+def bulk_goal_item(item):
+    """
+    (item dict, None) for an object or case id string, else (None, error).
+    An item needs a case_id string unless it carries its own portfolio_data
+    and total_account_value.
+    """
+    if isinstance(item, str):
+        item = {'case_id': item}
+    if not isinstance(item, dict):
+        return None, 'Each item must be a JSON object or a case id string'
+    case_id = item.get('case_id')
+    if case_id is None and item.get('portfolio_data') and item.get('total_account_value'):
+        return item, None
+    if not isinstance(case_id, str) or not case_id:
+        return None, 'case_id must be a non-empty string (or give portfolio_data and total_account_value)'
+    return item, None
+
+
+@app.route('/api/goals/generate/bulk', methods=['POST'])
+def generate_goals_bulk():
+    """
+    Generate goals for many cases in one request (e.g. an advisor's whole book).
+    Accepts NDJSON, one item per line, or JSON {"items": [...]} / {"case_ids": [...]}.
+    Each item is {"case_id", optional "portfolio_data", "total_account_value",
+    "quiz_answers", "selected_goals"}; missing values are read from the case store.
+    Streams NDJSON back: one line per item, in input order, with "index" and
+    either the /api/goals/generate/<case_id> payload or "status": "error", then
+    a final {"done": true, "count", "errors"} line.
+    """
+    limit = app.config['GOALS_BULK_MAX_ITEMS']
+    batch_size = app.config['GOALS_BULK_BATCH_SIZE']
+
+    def results():
+        counts = {'count': 0, 'errors': 0}
+        items = enumerate(iter_bulk_goal_items())
+        truncated = False
+        while not truncated:
+            batch = list(itertools.islice(items, batch_size))
+            if batch and batch[-1][0] >= limit:
+                batch = [(index, entry) for index, entry in batch if index < limit]
+                truncated = True
+            if not batch:
+                break
+            # One case-store query per batch for the items that need it
+            lookup = [item.get('case_id') for _, (item, error) in batch
+                      if item and item.get('case_id') and not (item.get('portfolio_data') and item.get('total_account_value'))]
+            stored = cases.get_many(lookup) if lookup else {}
+
+            work, lines = [], {}
+            for index, (item, error) in batch:
+                if error is None:
+                    resolved, error = resolve_goal_item(item.get('case_id'), item, stored.get(item.get('case_id')))
+                if error is not None:
+                    lines[index] = {'index': index, 'case_id': (item or {}).get('case_id'), 'status': 'error', 'error': error}
+                else:
+                    work.append(dict(resolved, index=index))
+
+            # A few chunks per worker keeps pickling overhead low and the workers busy
+            chunksize = max(1, len(work) // (4 * max(goal_pool.max_workers, 1)))
+            try:
+                for result in goal_pool.map(goal_item_result, work, chunksize=chunksize):
+                    lines[result['index']] = result
+            except Exception as e:
+                for item in work:
+                    lines.setdefault(item['index'], {'index': item['index'], 'case_id': item['case_id'],
+                                                     'status': 'error', 'error': f'Goal worker failed: {str(e)}'})
+
+            for index, _ in batch:
+                line = lines[index]
+                counts['count'] += 1
+                counts['errors'] += line['status'] == 'error'
+                yield json.dumps(line, separators=(',', ':')) + '\n'
+
+        yield json.dumps(dict(counts, done=True, truncated=truncated), separators=(',', ':')) + '\n'
+
+    return Response(stream_with_context(results()), mimetype='application/x-ndjson')
 
 
 @app.route('/api/goals/complete', methods=['POST'])
@@ -863,21 +1858,36 @@ def complete_goal():
             'error': 'Please provide goal_id in the request body'
         }), 400
     
-    goal_id = data['goal_id']
-    user_id = data.get('user_id', 'default_user')
-    
-    # In a real app, this would update a database
-    # For now, return success with points awarded
-    goal_points = data.get('points_reward', 50)
-    
+    goal_id = str(data['goal_id'])
+    user_id = str(data.get('user_id', 'default_user'))
+    try:
+        goal_points = int(data.get('points_reward', 50))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'points_reward must be an integer'}), 400
+    if goal_points < 0:
+        return jsonify({'error': 'points_reward must not be negative'}), 400
+
+    # Points are awarded once per user and goal
+    outcome = gamification.complete_goal(user_id, goal_id, goal_points)
+    if outcome['already_completed']:
+        message = f'Goal {goal_id} was already completed.'
+    else:
+        message = f'You earned {goal_points} points!'
+        if outcome['leveled_up']:
+            message += f" You reached {outcome['progress']['stats']['current_level']}!"
+
     return jsonify({
         'status': 'success',
         'message': f'Goal {goal_id} marked as completed!',
-        'points_awarded': goal_points,
+        'points_awarded': outcome['points_awarded'],
+        'already_completed': outcome['already_completed'],
         'achievement': {
             'badge': '✅ Goal Completed',
-            'message': f'You earned {goal_points} points!'
-        }
+            'message': message,
+            'new_badges': outcome['new_badges'],
+            'leveled_up': outcome['leveled_up']
+        },
+        **outcome['progress']
     })
 
 
@@ -885,30 +1895,54 @@ def complete_goal():
 def get_progress():
     """Get user's gamification progress and statistics."""
     user_id = request.args.get('user_id', 'default_user')
-    
-    # In a real app, this would fetch from a database
+
+    # Served from memory (stats dict + skip list rank), never from the database
     return jsonify({
         'status': 'success',
         'user_id': user_id,
-        'stats': {
-            'total_points': 0,
-            'current_level': 'Newcomer',
-            'level_number': 1,
-            'badges_earned': [],
-            'goals_completed': 0,
-            'goals_in_progress': 0,
-            'streak_days': 0,
-            'next_level_points': 5
-        },
-        'leaderboard_position': None  # Could implement leaderboard
+        **gamification.progress(user_id)
+    })
+
+
+@app.route('/api/gamification/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """
+    Users by total points, highest first.
+    Query params: ?limit= (default 10, max 100), ?offset=
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    return jsonify({
+        'status': 'success',
+        'leaderboard': gamification.leaderboard(limit=limit, offset=offset),
+        'limit': limit,
+        'offset': offset
     })
 
 
+# Mock Mentor explanations for demo mode
+DEMO_EXPLANATIONS = {
+    'diversification': """Diversification is like not putting all your eggs in one basket. In your portfolio, you have different types of investments (stocks, bonds, cash) so that if one performs poorly, others can help balance it out. This reduces your overall risk while still allowing for growth.""",
+    'risk tolerance': """Risk tolerance is how comfortable you are with the possibility of losing money in exchange for potential gains. Conservative investors prefer stability, while aggressive investors are willing to take more risk for higher returns. Your portfolio should match your personal risk tolerance.""",
+    'large cap value': """Large Cap Value stocks are shares of big, established companies that are considered undervalued. Think of companies like Coca-Cola or Johnson & Johnson - they're stable, pay dividends, and are less volatile than growth stocks. In your portfolio, this provides steady growth and income."""
+}
+
+
+def demo_explanation(concept):
+    """Mock Mentor explanation used in demo mode."""
+    return DEMO_EXPLANATIONS.get(concept.lower(), f"""**{concept}** is an important financial concept. In the context of your portfolio, it relates to how your investments are structured and managed. For a detailed explanation tailored to your specific holdings, enable real AWS Bedrock access.""")
+
+
 @app.route('/api/mentor/explain', methods=['POST'])
 def explain_concept():
     """
     The Mentor agent - Just-in-Time tutor that explains financial concepts.
     Context-aware explanations based on assets being viewed.
+    (Served by async_views.explain_concept under asgi.py.)
     """
     data = request.get_json()
     if not data or 'concept' not in data:
@@ -920,75 +1954,179 @@ def explain_concept():
     context = data.get('context', {})  # Portfolio context, current holding, etc.
     
     # Use Bedrock to explain the concept in context
-    if not app.config['DEMO_MODE'] and bedrock_client:
+    if not app.config['DEMO_MODE'] and bedrock:
         try:
-            prompt = f"""You are The Mentor - a Just-in-Time financial education tutor for heirs.
+            model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+            prompt = mentor_prompt(concept, context)
+            cache_key = mentor_request_cache_key(prompt, model_id)
+            explanation = cached_mentor_explanation(cache_key)
+            cached = explanation is not None
+            if not cached:
+                explanation = bedrock.invoke_text(model_id, prompt, max_tokens=1000, system=MENTOR_INSTRUCTIONS)
+                if mentor_cache:
+                    mentor_cache.put(cache_key, explanation)
+
+            return mentor_response(concept, explanation, context, cached=cached)
+        except Exception as e:
+            return mentor_error_response(e)
 
-The user is viewing: {json.dumps(context, indent=2)}
+    # Demo mode - return mock explanation
+    return mentor_response(concept, demo_explanation(concept), context, demo_mode=app.config['DEMO_MODE'])
 
-They want to understand: {concept}
 
-Explain this concept in simple, accessible language:
-- Use analogies and examples
-- Relate it to their specific portfolio/holdings if provided
-- Keep it concise (2-3 paragraphs)
-- Be empathetic and encouraging
-- Avoid excessive jargon
+def cached_mentor_explanation(cache_key):
+    """A cached Mentor explanation (None on a miss or with the cache disabled)."""
+    if not mentor_cache:
+        return None
+    explanation = mentor_cache.get(cache_key)
+    metrics.record_cache_lookup('mentor', explanation is not None)
+    return explanation
 
-If explaining a concept like "diversification", relate it to their actual holdings if available."""
 
-            model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
-            
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
-            
-            response = bedrock_client.invoke_model(
-                modelId=model_id,
-                body=body,
-                contentType='application/json',
-                accept='application/json'
-            )
-            
-            response_body = json.loads(response['body'].read())
-            explanation = response_body['content'][0]['text']
-            
-            return jsonify({
-                'status': 'success',
-                'concept': concept,
-                'explanation': explanation,
-                'agent': 'The Mentor (Embedded Education)',
-                'context_used': context
-            })
-        except Exception as e:
-            return jsonify({
-                'error': f'Error generating explanation: {str(e)}'
-            }), 500
-    
-    # Demo mode - return mock explanation
-    explanations = {
-        'diversification': """Diversification is like not putting all your eggs in one basket. In your portfolio, you have different types of investments (stocks, bonds, cash) so that if one performs poorly, others can help balance it out. This reduces your overall risk while still allowing for growth.""",
-        'risk tolerance': """Risk tolerance is how comfortable you are with the possibility of losing money in exchange for potential gains. Conservative investors prefer stability, while aggressive investors are willing to take more risk for higher returns. Your portfolio should match your personal risk tolerance.""",
-        'large cap value': """Large Cap Value stocks are shares of big, established companies that are considered undervalued. Think of companies like Coca-Cola or Johnson & Johnson - they're stable, pay dividends, and are less volatile than growth stocks. In your portfolio, this provides steady growth and income."""
-    }
-    
-    explanation = explanations.get(concept.lower(), f"""**{concept}** is an important financial concept. In the context of your portfolio, it relates to how your investments are structured and managed. For a detailed explanation tailored to your specific holdings, enable real AWS Bedrock access.""")
-    
-    return jsonify({
+def mentor_response(concept, explanation, context, **flags):
+    """The /api/mentor/explain response; flags are cached (Bedrock) or demo_mode."""
+    return jsonify(dict({
         'status': 'success',
         'concept': concept,
         'explanation': explanation,
         'agent': 'The Mentor (Embedded Education)',
-        'context_used': context,
-        'demo_mode': app.config['DEMO_MODE']
-    })
+        'context_used': context
+    }, **flags))
+
+
+def mentor_error_response(error):
+    if isinstance(error, BedrockThrottledError):
+        return bedrock_busy_response(error)
+    return jsonify({
+        'error': f'Error generating explanation: {str(error)}'
+    }), 500
+
+
+def sse_response(events):
+    """Stream an iterator of SSE strings without buffering."""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def stream_bedrock_tokens(model_id, prompt, max_tokens, system=None):
+    """Text deltas from Bedrock, or None in demo mode / without a client."""
+    if app.config['DEMO_MODE'] or not bedrock:
+        return None
+    return bedrock.stream_text(model_id, prompt, max_tokens=max_tokens, system=system)
+
+
+@app.route('/api/mentor/explain/stream', methods=['POST'])
+def explain_concept_stream():
+    """
+    The Mentor agent, streamed over Server-Sent Events.
+    Events: token {text} as it is generated, then done {explanation}, or error {error}.
+    """
+    data = request.get_json()
+    if not data or 'concept' not in data:
+        return jsonify({
+            'error': 'Please provide "concept" in the request body'
+        }), 400
+
+    concept = data['concept']
+    context = data.get('context', {})
+    model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+    prompt = mentor_prompt(concept, context)
+    cache_key = mentor_request_cache_key(prompt, model_id)
+    cached_explanation = cached_mentor_explanation(cache_key)
+    if cached_explanation is not None:
+        tokens = iter([cached_explanation])
+    else:
+        tokens = stream_bedrock_tokens(model_id, prompt, 1000, system=MENTOR_INSTRUCTIONS)
+    demo_mode = tokens is None
+    if demo_mode:
+        tokens = demo_token_stream(demo_explanation(concept))
+
+    def events():
+        explanation = []
+        try:
+            for text in tokens:
+                explanation.append(text)
+                yield sse_event('token', {'text': text})
+        except Exception as e:
+            yield sse_event('error', {'error': f'Error generating explanation: {str(e)}',
+                                      'retryable': isinstance(e, BedrockThrottledError)})
+            return
+        explanation = ''.join(explanation)
+        if mentor_cache and not demo_mode and cached_explanation is None:
+            mentor_cache.put(cache_key, explanation)
+        yield sse_event('done', {
+            'status': 'success',
+            'concept': concept,
+            'explanation': explanation,
+            'agent': 'The Mentor (Embedded Education)',
+            'cached': cached_explanation is not None,
+            'demo_mode': demo_mode
+        })
+
+    return sse_response(events())
+
+
+@app.route('/api/bedrock/summarize/stream', methods=['POST'])
+def summarize_portfolio_stream():
+    """
+    The Bridge agent, streamed over Server-Sent Events.
+    Events: token {text} as it is generated, goal_card {card} as each card's JSON
+    object completes, then done {summary, goal_cards, confidence_level}, or error {error}.
+    Accepts portfolio_data or case_id, like /api/bedrock/summarize.
+    """
+    data = request.get_json(silent=True)
+    portfolio_data = request_portfolio_data(data)
+    if portfolio_data is None:
+        return jsonify({
+            'error': 'Please provide portfolio_data or a processed case_id in the request body'
+        }), 400
+
+    model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+    tokens = stream_bedrock_tokens(model_id, bridge_summary_prompt(portfolio_data), 4000,
+                                   system=BRIDGE_INSTRUCTIONS)
+    demo_mode = tokens is None
+    if demo_mode:
+        total_value = portfolio_data.get('total_value', sum(
+            h.get('value', 0) for h in portfolio_data.get('holdings', [])
+        ))
+        demo_cards = parse_goal_cards_from_response('', portfolio_data)
+        tokens = demo_token_stream(json.dumps({
+            'summary': f'This portfolio has a total value of ${total_value:,.2f}.',
+            'goal_cards': demo_cards
+        }, indent=2), words_per_chunk=8)
+
+    def events():
+        parser = GoalCardStreamParser()
+        try:
+            for text in tokens:
+                yield sse_event('token', {'text': text})
+                for card in parser.feed(text):
+                    yield sse_event('goal_card', {'card': card})
+        except Exception as e:
+            yield sse_event('error', {'error': f'AWS Bedrock error: {str(e)}',
+                                      'retryable': isinstance(e, BedrockThrottledError)})
+            return
+
+        goal_cards = parser.cards
+        if not goal_cards:
+            # The model did not return a goal_cards array; build cards from the holdings
+            goal_cards = parse_goal_cards_from_response(parser.text, portfolio_data)
+            for card in goal_cards:
+                yield sse_event('goal_card', {'card': card})
+        yield sse_event('done', {
+            'status': 'success',
+            'summary': parser.text,
+            'goal_cards': goal_cards,
+            'model_used': f'{model_id} (demo mode)' if demo_mode else model_id,
+            'agent': 'The Bridge (Portfolio Summarizer)',
+            'confidence_level': determine_portfolio_confidence_level(portfolio_data),
+            'demo_mode': demo_mode
+        })
+
+    return sse_response(events())
 
 
 def determine_confidence_level(nigo_analysis):
@@ -1012,6 +2150,7 @@ def determine_confidence_level(nigo_analysis):
     return 'GREEN'  # Automated - AI handles
 
 
+@metrics.timed('parse_goal_cards_from_response')
 def parse_goal_cards_from_response(summary_text, portfolio_data):
     """
     Parse Goal Cards from AI response or create them from portfolio data.
@@ -1141,6 +2280,37 @@ def determine_portfolio_confidence_level(portfolio_data):
         return 'RED'  # Complex - Advisor must review
 
 
+def process_textract_job(response, job):
+    """
+    Run a finished asynchronous Textract job through the same extraction,
+    portfolio parsing and NIGO analysis as the synchronous endpoints.
+    `response` is a lazy stream of blocks that pages in results from Textract.
+    """
+    # Pages are indexed as Textract returns them; raw blocks are not kept
+    index = BlockIndex(response)
+    extracted_text = index.text()
+    nigo_analysis = detect_nigo_errors(extracted_text, None)
+    result = {
+        'extracted_text': extracted_text,
+        'portfolio_data': parse_portfolio_from_textract(index, extracted_text, job['filename']),
+        'nigo_errors': nigo_analysis.get('errors', []),
+        'nigo_status': nigo_analysis.get('nigo_status', 'UNKNOWN'),
+        'confidence_score': nigo_analysis.get('confidence_score', 0),
+        'confidence_level': determine_confidence_level(nigo_analysis),
+        'nigo_rules_version': nigo_analysis.get('rules_version'),
+        'total_account_value': extract_account_value(index, extracted_text)
+    }
+    # Jobs started by /api/portfolio/upload?async=true share their id with a case
+    cases.save_result(job['job_id'], dict(result, case_id=job['job_id']))
+    return result
+
+
+def textract_job_failed(job, error):
+    """Mark the upload case of a failed ?async=true job (other jobs have no case)."""
+    cases.update(job['job_id'], status='FAILED', error=str(error))
+
+
+@metrics.timed('detect_nigo_errors')
 def detect_nigo_errors(extracted_text, textract_response):
     """
     Detect NIGO (Not In Good Order) errors using LPL compliance rules.
@@ -1156,286 +2326,66 @@ def detect_nigo_errors(extracted_text, textract_response):
     8. Date of Birth
     9. Account Type Selected
     10. Investment Objective
+
+    Rules come from the declarative rule pack (context/lpl_compliance_rules.json),
+    compiled once into a single-pass matcher and hot-reloaded (see nigo_rules.py);
+    duplicate findings for the same field are reported once.
     """
-    errors = []
-    text_lower = extracted_text.lower()
-    import re
-    
-    # Rule 1: SSN Present (must be 9 digits)
-    ssn_pattern = r'\b\d{3}-?\d{2}-?\d{4}\b'
-    ssn_found = re.search(ssn_pattern, extracted_text)
-    if not ssn_found:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'ssn',
-            'severity': 'high',
-            'priority': 'HIGH',
-            'message': 'SSN not found or invalid format. Must be 9 digits.',
-            'confidence': 'high'
-        })
-    
-    # Rule 2: Physical Address (No PO Box as primary)
-    po_box_patterns = ['p.o. box', 'po box', 'p.o box', 'post office box', 'p.o.b', 'pob']
-    has_po_box = any(pattern in text_lower for pattern in po_box_patterns)
-    has_physical_address = any(term in text_lower for term in ['street', 'avenue', 'road', 'drive', 'lane', 'boulevard', 'way', 'physical address'])
-    if has_po_box and not has_physical_address:
-        errors.append({
-            'type': 'invalid_address',
-            'field': 'physical_address',
-            'severity': 'high',
-            'priority': 'HIGH',
-            'message': 'P.O. Box found but physical street address is required as primary address.',
-            'confidence': 'high'
-        })
-    elif not has_physical_address and not has_po_box:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'physical_address',
-            'severity': 'medium',
-            'priority': 'MEDIUM',
-            'message': 'Physical address not found in document.',
-            'confidence': 'medium'
-        })
-    
-    # Rule 3: Vague Occupation
-    vague_occupations = ['business', 'self-employed', 'self employed', 'retired', 'unemployed', 'other']
-    occupation_terms = ['occupation', 'employment', 'employer', 'job', 'work']
-    has_occupation_field = any(term in text_lower for term in occupation_terms)
-    if has_occupation_field:
-        # Check if occupation is vague
-        found_vague = False
-        for vague in vague_occupations:
-            if vague in text_lower:
-                # Check if there's more detail nearby
-                vague_index = text_lower.find(vague)
-                context = text_lower[max(0, vague_index-50):vague_index+50]
-                # If it's just "business" or "self-employed" without details, it's vague
-                if vague in ['business', 'self-employed', 'self employed'] and len(context.split()) < 10:
-                    found_vague = True
-                    break
-        if found_vague:
-            errors.append({
-                'type': 'vague_occupation',
-                'field': 'occupation',
-                'severity': 'medium',
-                'priority': 'MEDIUM',
-                'message': 'Occupation is too vague. Must provide specific business type or employer name.',
-                'confidence': 'medium'
-            })
-    
-    # Rule 4: Signature Present
-    signature_terms = ['signature', 'signed', 'sign here', 'signature of']
-    has_signature = any(term in text_lower for term in signature_terms)
-    if not has_signature:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'signature',
-            'severity': 'high',
-            'priority': 'HIGH',
-            'message': 'Signature not found. Wet signature required.',
-            'confidence': 'high'
-        })
-    
-    # Rule 5: Signature Date
-    if has_signature:
-        date_pattern = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
-        dates = re.findall(date_pattern, extracted_text)
-        if not dates:
-            errors.append({
-                'type': 'missing_date',
-                'field': 'signature_date',
-                'severity': 'high',
-                'priority': 'HIGH',
-                'message': 'Signature found but signature date is missing or unclear.',
-                'confidence': 'high'
-            })
-        else:
-            # Check if date is within 90 days (basic check)
-            from datetime import datetime, timedelta
-            try:
-                for date_str in dates:
-                    # Try to parse date
-                    for fmt in ['%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y']:
-                        try:
-                            date_obj = datetime.strptime(date_str, fmt)
-                            if date_obj < datetime.now() - timedelta(days=90):
-                                errors.append({
-                                    'type': 'stale_date',
-                                    'field': 'signature_date',
-                                    'severity': 'medium',
-                                    'priority': 'MEDIUM',
-                                    'message': f'Signature date ({date_str}) is more than 90 days old.',
-                                    'confidence': 'medium'
-                                })
-                            break
-                        except:
-                            continue
-            except:
-                pass
-    
-    # Rule 6: Beneficiary Name
-    beneficiary_terms = ['beneficiary', 'beneficiary name', 'primary beneficiary']
-    has_beneficiary = any(term in text_lower for term in beneficiary_terms)
-    if not has_beneficiary:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'beneficiary_name',
-            'severity': 'high',
-            'priority': 'HIGH',
-            'message': 'Beneficiary name not found in document.',
-            'confidence': 'high'
-        })
-    
-    # Rule 7: Beneficiary Relationship
-    if has_beneficiary:
-        relationship_terms = ['relationship', 'relation', 'spouse', 'child', 'son', 'daughter', 'brother', 'sister', 'parent']
-        has_relationship = any(term in text_lower for term in relationship_terms)
-        if not has_relationship:
-            errors.append({
-                'type': 'incomplete_beneficiary',
-                'field': 'beneficiary_relationship',
-                'severity': 'medium',
-                'priority': 'MEDIUM',
-                'message': 'Beneficiary name found but relationship is missing.',
-                'confidence': 'medium'
-            })
-    
-    # Rule 8: Date of Birth
-    dob_terms = ['date of birth', 'dob', 'birth date', 'born']
-    has_dob = any(term in text_lower for term in dob_terms)
-    if not has_dob:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'date_of_birth',
-            'severity': 'medium',
-            'priority': 'MEDIUM',
-            'message': 'Date of birth not found in document.',
-            'confidence': 'medium'
-        })
-    
-    # Rule 9: Account Type Selected
-    account_types = ['ira', 'roth', '401', 'brokerage', 'savings', 'checking', 'account type']
-    has_account_type = any(term in text_lower for term in account_types)
-    if not has_account_type:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'account_type',
-            'severity': 'medium',
-            'priority': 'MEDIUM',
-            'message': 'Account type not clearly selected or specified.',
-            'confidence': 'medium'
-        })
-    
-    # Rule 10: Investment Objective
-    objective_terms = ['investment objective', 'objective', 'goal', 'purpose', 'investment goal']
-    has_objective = any(term in text_lower for term in objective_terms)
-    if not has_objective:
-        errors.append({
-            'type': 'missing_field',
-            'field': 'investment_objective',
-            'severity': 'medium',
-            'priority': 'MEDIUM',
-            'message': 'Investment objective not specified.',
-            'confidence': 'medium'
-        })
-    
-    # LPL Required Fields (legacy support)
-    required_fields_high = [
-        ('signature', 'signature', 'HIGH'),
-        ('ssn', 'social security number', 'HIGH'),
-        ('ssn', 'ssn', 'HIGH'),
-        ('beneficiary', 'beneficiary', 'HIGH'),
-        ('legal name', 'full legal name', 'HIGH'),
-        ('legal name', 'legal name', 'HIGH')
-    ]
-    
-    required_fields_medium = [
-        ('address', 'physical address', 'MEDIUM'),
-        ('address', 'address', 'MEDIUM'),
-        ('date of birth', 'date of birth', 'MEDIUM'),
-        ('date of birth', 'dob', 'MEDIUM'),
-        ('account type', 'account type', 'MEDIUM'),
-        ('investment objective', 'investment objective', 'MEDIUM'),
-        ('risk tolerance', 'risk tolerance', 'MEDIUM')
-    ]
-    
-    # Check for HIGH priority missing fields
-    for field_key, search_term, priority in required_fields_high:
-        if search_term not in text_lower:
-            errors.append({
-                'type': 'missing_field',
-                'field': field_key,
-                'severity': 'high',
-                'priority': priority,
-                'message': f'Required field "{field_key}" not found in document. This is a NIGO error that will delay account opening.',
-                'confidence': 'high'
-            })
-    
-    # Check for MEDIUM priority missing fields
-    for field_key, search_term, priority in required_fields_medium:
-        if search_term not in text_lower:
-            errors.append({
-                'type': 'missing_field',
-                'field': field_key,
-                'severity': 'medium',
-                'priority': priority,
-                'message': f'Required field "{field_key}" not found in document.',
-                'confidence': 'medium'
-            })
-    
-    # Check for signature date (must be present and recent)
-    if 'signature' in text_lower:
-        # Look for date patterns near signature
-        import re
-        date_pattern = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
-        dates = re.findall(date_pattern, extracted_text)
-        if not dates:
-            errors.append({
-                'type': 'missing_date',
-                'field': 'signature_date',
-                'severity': 'high',
-                'priority': 'HIGH',
-                'message': 'Signature found but signature date is missing or unclear.',
-                'confidence': 'high'
-            })
-    
-    # Check for incomplete beneficiary info
-    if 'beneficiary' in text_lower:
-        if 'relationship' not in text_lower and 'relation' not in text_lower:
-            errors.append({
-                'type': 'incomplete_beneficiary',
-                'field': 'beneficiary_relationship',
-                'severity': 'medium',
-                'priority': 'MEDIUM',
-                'message': 'Beneficiary name found but relationship is missing.',
-                'confidence': 'medium'
-            })
-    
-    # Check for P.O. Box as primary address (not acceptable)
-    po_box_patterns = ['p.o. box', 'po box', 'p.o box', 'post office box']
-    if any(pattern in text_lower for pattern in po_box_patterns):
-        if 'physical address' not in text_lower and 'street' not in text_lower:
-            errors.append({
-                'type': 'invalid_address',
-                'field': 'physical_address',
-                'severity': 'medium',
-                'priority': 'MEDIUM',
-                'message': 'P.O. Box found but physical address is required as primary address.',
-                'confidence': 'high'
-            })
-    
-    # Calculate confidence score for overall document
-    total_checks = len(required_fields_high) + len(required_fields_medium)
-    passed_checks = total_checks - len(errors)
-    confidence_score = (passed_checks / total_checks) * 100 if total_checks > 0 else 0
-    
-    return {
-        'errors': errors,
-        'confidence_score': round(confidence_score, 1),
-        'total_checks': total_checks,
-        'passed_checks': passed_checks,
-        'nigo_status': 'NIGO' if len([e for e in errors if e['severity'] == 'high']) > 0 else 'REVIEW' if len(errors) > 0 else 'CLEAN'
-    }
+    return analyze_nigo(extracted_text)
+
+
+# Background pipeline for asynchronous multi-page Textract jobs
+if textract_client and s3_client:
+    textract_jobs = TextractJobPipeline(
+        textract_client, s3_client, app.config['S3_BUCKET_NAME'], cases,
+        on_complete=process_textract_job,
+        on_failed=textract_job_failed,
+        max_workers=app.config['TEXTRACT_JOB_WORKERS'],
+        poll_interval=app.config['TEXTRACT_JOB_POLL_INTERVAL'],
+        timeout=app.config['TEXTRACT_JOB_TIMEOUT']
+    )
+else:
+    # Demo mode - local Textract/S3 stand-ins return the mock statement
+    stub_s3_client = metrics.instrument_client(StubS3Client(), 's3')
+    textract_jobs = TextractJobPipeline(
+        metrics.instrument_client(StubTextractClient(s3_client=stub_s3_client, pages=[demo_statement_text()]), 'textract'),
+        stub_s3_client, app.config['S3_BUCKET_NAME'], cases,
+        on_complete=process_textract_job,
+        on_failed=textract_job_failed,
+        max_workers=app.config['TEXTRACT_JOB_WORKERS'],
+        poll_interval=0.1
+    )
+
+
+# Bounded pool for batch Textract calls (caps calls in flight across all batches)
+textract_batch_executor = ThreadPoolExecutor(max_workers=app.config['TEXTRACT_BATCH_CONCURRENCY'], thread_name_prefix='textract-batch')
+
+# Worker processes for NIGO rule evaluation in batch analysis (created on first use)
+nigo_pool = ProcessPool(app.config['NIGO_WORKERS'], name='NIGO pool')
+
+# Worker processes for bulk goal generation (created on first use)
+goal_pool = ProcessPool(app.config['GOALS_BULK_WORKERS'], name='goal pool')
+
+# Bounded pool for the concurrent stages of each upload (summary and S3 write)
+stage_executor = ThreadPoolExecutor(max_workers=app.config['UPLOAD_STAGE_WORKERS'], thread_name_prefix='upload-stage')
+
+# Persistent background queue for portfolio uploads (cases.db)
+upload_queue = UploadQueue(
+    cases, app.config['UPLOAD_DIR'],
+    process=process_portfolio_upload,
+    max_workers=app.config['UPLOAD_WORKERS']
+)
+with metrics.startup_phase('upload_recovery'):
+    recovered = upload_queue.recover()
+if recovered:
+    print(f"✓ Re-queued {recovered} unfinished portfolio upload(s)")
+
+# Create the AWS clients ahead of the first request: on a background thread by
+# default, so the server starts listening at once ('eager' blocks here, 'off' waits for first use)
+if aws and app.config['AWS_WARM_UP'] != 'off':
+    aws.warm_up(background=app.config['AWS_WARM_UP'] == 'background')
+metrics.startup_seconds.set(time.perf_counter() - STARTUP_STARTED, phase='total')
+print(f"✓ Started in {time.perf_counter() - STARTUP_STARTED:.2f}s")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,235 @@
+"""
+ASGI - Async serving mode for the Flask app: `uvicorn asgi:application`.
+Endpoints registered in async_views.ASYNC_VIEWS run as coroutines on the event
+loop, so a few workers hold thousands of in-flight Textract/Bedrock calls.
+Every other route is the unchanged Flask (WSGI) app run in a thread pool.
+Both paths go through Flask's request context, before/after_request hooks
+(metrics, compression, CORS) and error handlers.
+"""
+
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import request, request_started
+from werkzeug.exceptions import HTTPException
+
+from app import app
+from async_views import ASYNC_VIEWS, aws
+
+try:
+    import uvicorn
+except ImportError:  # Any ASGI server works; uvicorn is only needed for `python asgi.py`
+    uvicorn = None
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ for an ASGI http scope whose body has been read."""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1').lower(), value.decode('latin-1')
+        if name == 'content-length':
+            continue
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+            continue
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+async def read_body(receive):
+    """The full request body (uploads are read into memory, as under the WSGI server)."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class FlaskASGI:
+    """
+    ASGI application serving a Flask app, with coroutine views for some endpoints.
+
+    Args:
+        flask_app: The Flask app
+        async_views: {endpoint: coroutine function} served on the event loop
+        threads: Size of the loop's default executor (CPU-bound parsing and the WSGI routes)
+        on_startup: Optional coroutine function awaited at lifespan startup
+        on_shutdown: Optional coroutine function awaited at lifespan shutdown
+    """
+
+    def __init__(self, flask_app, async_views, threads=32, on_startup=None, on_shutdown=None):
+        self.app = flask_app
+        self.async_views = async_views
+        self.threads = threads
+        self.on_startup = on_startup
+        self.on_shutdown = on_shutdown
+        self._executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    def _use_executor(self):
+        """Size the event loop's default executor (used by asyncio.to_thread)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi')
+            asyncio.get_running_loop().set_default_executor(self._executor)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._use_executor()
+                if self.on_startup:
+                    await self.on_startup()
+                print(f"✓ ASGI worker ready ({len(self.async_views)} async endpoints, {self.threads} threads)")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.on_shutdown:
+                    await self.on_shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def async_view_for(self, environ):
+        """The coroutine serving this request, or None to use the WSGI app."""
+        if not self.async_views or environ['REQUEST_METHOD'] in ('OPTIONS', 'HEAD'):
+            return None
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:  # 404/405/redirects are answered by the WSGI app
+            return None
+        return self.async_views.get(endpoint)
+
+    async def http(self, scope, receive, send):
+        self._use_executor()
+        body = await read_body(receive)
+        if body is None:
+            return
+        environ = wsgi_environ(scope, body)
+        view = self.async_view_for(environ)
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                  for name, value in headers]
+
+        if view is not None:
+            response = await self.dispatch(view, environ)
+            app_iter = response(environ, start_response)
+        else:
+            app_iter = await asyncio.to_thread(self.app, environ, start_response)
+        await self.send_body(send, app_iter, started)
+
+    async def dispatch(self, view, environ):
+        """Run a coroutine view the way Flask.full_dispatch_request runs a sync one."""
+        ctx = self.app.request_context(environ)
+        error = None
+        ctx.push()
+        try:
+            try:
+                try:
+                    request_started.send(self.app)
+                    rv = self.app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**request.view_args)
+                except Exception as e:
+                    rv = self.app.handle_user_exception(e)
+                return self.app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                return self.app.handle_exception(e)
+        finally:
+            ctx.pop(error)
+
+    async def send_body(self, send, app_iter, started):
+        """
+        Send a WSGI response iterable. One executor thread iterates the whole
+        body: streamed (SSE/NDJSON) bodies may block between chunks, and
+        stream_with_context must enter and leave the request context in one place.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        stopped = threading.Event()
+
+        def pump():
+            try:
+                for chunk in app_iter:
+                    if stopped.is_set():  # Client went away
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+            finally:
+                # Runs call_on_close callbacks (request metrics) and stream cleanup
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        pumping = asyncio.ensure_future(asyncio.to_thread(pump))
+        try:
+            await send({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await pumping  # Re-raises an error from the middle of a stream
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            stopped.set()
+            await asyncio.wait([pumping])
+
+
+async def warm_up():
+    """Create the async AWS clients ahead of traffic, per AWS_WARM_UP (like app.py's boto3 clients)."""
+    if aws.available and not app.config['DEMO_MODE'] and app.config['AWS_WARM_UP'] != 'off':
+        await aws.warm_up(background=app.config['AWS_WARM_UP'] == 'background')
+
+
+application = FlaskASGI(app, ASYNC_VIEWS, threads=app.config['ASGI_THREADS'], on_startup=warm_up,
+                        on_shutdown=aws.close)
+
+
+if __name__ == '__main__':
+    if uvicorn is None:
+        print("⚠ uvicorn is not installed: pip install uvicorn aiobotocore")
+        sys.exit(1)
+    print(f"Starting LPL Heritage Hub (async) on port {app.config['PORT']}")
+    uvicorn.run(application, host='0.0.0.0', port=app.config['PORT'])
@@ -0,0 +1,100 @@
+"""
+Async AWS - aiobotocore clients for the async serving mode (asgi.py).
+Each client is created on the serving event loop the first time a request
+needs it and then shared by every request on that loop. A large connection pool
+lets one worker keep thousands of Textract/Bedrock calls in flight. The
+botocore models come from the same loader as the boto3 clients (aws_clients.py),
+so a preloaded master's cache serves both.
+"""
+
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+import metrics
+from aws_clients import data_loader
+
+try:
+    from aiobotocore.session import get_session
+except ImportError:  # aiobotocore is only needed for `uvicorn asgi:application`
+    get_session = None
+
+
+class AsyncAWSClients:
+    """
+    Lazily created aiobotocore clients, closed together by close().
+
+    Args:
+        clients: {name: create_client kwargs}, e.g. {'bedrock': {'service_name': 'bedrock-runtime', 'config': ...}};
+            the name is also the service label of the client's metrics
+        **common: kwargs shared by every client (region_name, credentials)
+    """
+
+    def __init__(self, clients, **common):
+        self._specs = clients
+        self._common = common
+        self._clients = {}
+        self._session = None
+        self._stack = None
+        self._lock = None
+        self._warm_up_task = None
+
+    @property
+    def available(self):
+        return get_session is not None
+
+    async def client(self, name):
+        """
+        The client registered under name, created on first use.
+
+        Raises:
+            RuntimeError: aiobotocore is not installed
+        """
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        if get_session is None:
+            raise RuntimeError('aiobotocore is not installed (pip install aiobotocore)')
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if name not in self._clients:
+                if self._stack is None:
+                    self._stack = AsyncExitStack()
+                    self._session = get_session()
+                    self._session.register_component('data_loader', data_loader())
+                kwargs = dict(self._common, **self._specs[name])
+                start = time.perf_counter()
+                client = await self._stack.enter_async_context(self._session.create_client(**kwargs))
+                metrics.aws_client_init_seconds.set(time.perf_counter() - start, client=f'async:{name}')
+                self._clients[name] = metrics.instrument_client(client, name)
+                print(f"✓ Async {kwargs['service_name']} client initialized")
+        return self._clients[name]
+
+    async def warm_up(self, background=False):
+        """
+        Create every client ahead of the first request (timed as startup phases).
+        Failures are logged; the client is retried on first use.
+
+        Args:
+            background: Schedule on the event loop and return at once
+        """
+        if background:
+            self._warm_up_task = asyncio.ensure_future(self.warm_up())
+            return
+        for name in self._specs:
+            try:
+                with metrics.startup_phase(f'warm_up:async:{name}'):
+                    await self.client(name)
+            except Exception as e:
+                print(f"⚠ Warning: Async AWS {name} client not initialized: {e}")
+
+    async def close(self):
+        """Close every client and its connection pool."""
+        if self._stack is not None:
+            await self._stack.aclose()
+        self._clients, self._stack, self._lock = {}, None, None
+
+    def stats(self):
+        return {'available': self.available, 'clients': sorted(self._clients)}
@@ -0,0 +1,155 @@
+"""
+Async Views - Coroutine versions of the AWS-bound endpoints, served by asgi.py.
+While Textract or Bedrock is working these views hold no thread: the AWS calls
+go through aiobotocore, and only the CPU-bound work (text extraction, NIGO
+rules, Goal Card parsing) and SQLite access run in the default executor.
+Request parsing and response building are the same helpers the WSGI views use.
+"""
+
+import asyncio
+import os
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from flask import jsonify, request
+
+import app as web
+from async_aws import AsyncAWSClients
+from bedrock_invoker import bedrock_client_config
+from textract_cache import cached_textract_call_async
+
+
+config = web.app.config
+
+# Flask endpoint -> coroutine serving it under asgi.py
+ASYNC_VIEWS = {}
+
+aws = AsyncAWSClients(
+    {
+        'textract': {
+            'service_name': 'textract',
+            'endpoint_url': config['TEXTRACT_ENDPOINT_URL'],
+            'config': Config(max_pool_connections=config['ASYNC_MAX_POOL_CONNECTIONS'])
+        },
+        'bedrock': {
+            'service_name': 'bedrock-runtime',
+            'endpoint_url': config['BEDROCK_ENDPOINT_URL'],
+            'config': bedrock_client_config(
+                max_pool_connections=config['ASYNC_MAX_POOL_CONNECTIONS'],
+                read_timeout=config['BEDROCK_READ_TIMEOUT']
+            )
+        }
+    },
+    region_name=config['AWS_REGION'],
+    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
+)
+
+
+def async_view(endpoint):
+    """Register a coroutine to serve a Flask endpoint when running under asgi.py."""
+    def register(view):
+        ASYNC_VIEWS[endpoint] = view
+        return view
+    return register
+
+
+@async_view('analyze_document')
+async def analyze_document():
+    """/api/textract/analyze (see app.analyze_document)."""
+    # Parse the multipart body off the event loop
+    form = await asyncio.to_thread(lambda: request.form)
+    case_id = request.args.get('case_id') or form.get('case_id')
+
+    if config['DEMO_MODE']:
+        return await asyncio.to_thread(web.demo_analysis_response, case_id)
+
+    if not web.textract_client:
+        return web.textract_not_configured_response()
+
+    try:
+        document, error_response = web.textract_document_request()
+        if error_response:
+            return error_response
+
+        textract = await aws.client('textract')
+        if 'Bytes' in document:
+            response, cache_hit = await cached_textract_call_async(
+                web.textract_cache, textract, 'analyze_document', document['Bytes'], ['FORMS', 'TABLES']
+            )
+        else:
+            cache_hit = False
+            response = await textract.analyze_document(Document=document, FeatureTypes=['FORMS', 'TABLES'])
+
+        return await asyncio.to_thread(web.textract_analysis_response, response, cache_hit, case_id)
+
+    except ClientError as e:
+        return web.textract_error_response(e)
+    except Exception as e:
+        return jsonify({
+            'error': f'Unexpected error: {str(e)}'
+        }), 500
+
+
+@async_view('summarize_portfolio')
+async def summarize_portfolio():
+    """/api/bedrock/summarize (see app.summarize_portfolio)."""
+    data = request.get_json(silent=True)
+    portfolio_data = await asyncio.to_thread(web.request_portfolio_data, data)
+    if portfolio_data is None:
+        return jsonify({
+            'error': 'Please provide portfolio_data or a processed case_id in the request body'
+        }), 400
+
+    model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+
+    if config['DEMO_MODE']:
+        return await asyncio.to_thread(web.demo_summary_response, portfolio_data, model_id)
+
+    if not web.bedrock:
+        return web.bedrock_not_configured_response()
+
+    try:
+        # Same limiter and stats as the synchronous path; only the client differs
+        summary_text = await web.bedrock.invoke_text_async(
+            await aws.client('bedrock'), model_id, web.bridge_summary_prompt(portfolio_data),
+            max_tokens=4000, system=web.BRIDGE_INSTRUCTIONS
+        )
+        return await asyncio.to_thread(web.summary_response, summary_text, portfolio_data, model_id)
+
+    except Exception as e:
+        return web.summary_error_response(e)
+
+
+@async_view('explain_concept')
+async def explain_concept():
+    """/api/mentor/explain (see app.explain_concept)."""
+    data = request.get_json()
+    if not data or 'concept' not in data:
+        return jsonify({
+            'error': 'Please provide "concept" in the request body'
+        }), 400
+
+    concept = data['concept']
+    context = data.get('context', {})
+
+    if not config['DEMO_MODE'] and web.bedrock:
+        try:
+            model_id = data.get('model_id', 'us.anthropic.claude-3-sonnet-20240229-v1:0')
+            prompt = web.mentor_prompt(concept, context)
+            cache_key = web.mentor_request_cache_key(prompt, model_id)
+            explanation = await asyncio.to_thread(web.cached_mentor_explanation, cache_key)
+            cached = explanation is not None
+            if not cached:
+                explanation = await web.bedrock.invoke_text_async(
+                    await aws.client('bedrock'), model_id, prompt,
+                    max_tokens=1000, system=web.MENTOR_INSTRUCTIONS
+                )
+                if web.mentor_cache:
+                    await asyncio.to_thread(web.mentor_cache.put, cache_key, explanation)
+
+            return web.mentor_response(concept, explanation, context, cached=cached)
+        except Exception as e:
+            return web.mentor_error_response(e)
+
+    return web.mentor_response(concept, web.demo_explanation(concept), context, demo_mode=config['DEMO_MODE'])
@@ -0,0 +1,182 @@
+"""
+AWS Clients - Lazy, thread-safe boto3 client factories.
+Creating a client loads botocore's JSON service model (tens of milliseconds
+each for Textract and S3), so app.py creates its clients on first use instead
+of at import. warm_up() creates them ahead of traffic, and preload() loads the
+models in a forking server's master so every worker creates its clients from
+the inherited cache in a few milliseconds.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+import metrics
+
+
+# Services app.py uses; what preload() loads by default
+DEFAULT_SERVICES = ('textract', 'bedrock-runtime', 's3')
+
+# boto3 sessions are not thread-safe, so every client is created under this lock
+_session_lock = threading.RLock()
+_session = None
+_factories = weakref.WeakSet()
+
+
+def shared_session():
+    """The process's boto3 Session, created on first use and inherited by forked workers."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import boto3  # Deferred: importing boto3 is a large part of cold start on its own
+            _session = boto3.session.Session()
+        return _session
+
+
+def data_loader():
+    """botocore's model loader for the shared session (the cache preload() fills)."""
+    return shared_session()._session.get_component('data_loader')
+
+
+def preload(services=DEFAULT_SERVICES, region_name='us-east-1'):
+    """
+    Load the botocore models of services into the shared session by creating
+    and closing a throwaway client of each. Meant for a forking server's master
+    before it forks (see gunicorn.conf.py).
+
+    Args:
+        services: boto3 service names
+        region_name: Region to resolve endpoints for
+
+    Returns:
+        {service: seconds}
+    """
+    timings = {}
+    session = shared_session()
+    for service in services:
+        start = time.perf_counter()
+        with _session_lock:
+            # Placeholder credentials: resolving real ones here could block on the instance metadata service
+            client = session.client(service, region_name=region_name, aws_access_key_id='preload',
+                                    aws_secret_access_key='preload')
+        client.close()
+        timings[service] = time.perf_counter() - start
+        metrics.startup_seconds.set(timings[service], phase=f'preload:{service}')
+    return timings
+
+
+class AWSClientFactory:
+    """
+    Named boto3 clients, each created from the shared session on first use.
+
+    Args:
+        specs: {name: boto3 client kwargs}, e.g. {'bedrock': {'service_name': 'bedrock-runtime', 'config': ...}}
+        wrap: Optional callable(client, name) applied to each new client (e.g. metrics.instrument_client)
+        **common: Client kwargs shared by every client (region_name, credentials)
+    """
+
+    def __init__(self, specs, wrap=None, **common):
+        self._specs = specs
+        self._wrap = wrap
+        self._common = common
+        self._clients = {}
+        self._init_seconds = {}
+        self._warm_up_hooks = []
+        _factories.add(self)
+
+    def client(self, name):
+        """The client registered under name, created on first use."""
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with _session_lock:
+            if name not in self._clients:
+                kwargs = dict(self._common, **self._specs[name])
+                start = time.perf_counter()
+                client = shared_session().client(**kwargs)
+                self._init_seconds[name] = time.perf_counter() - start
+                metrics.aws_client_init_seconds.set(self._init_seconds[name], client=name)
+                self._clients[name] = self._wrap(client, name) if self._wrap else client
+            return self._clients[name]
+
+    def lazy(self, name):
+        """A LazyClient for name, usable wherever the client itself would be."""
+        return LazyClient(self, name)
+
+    def add_warm_up_hook(self, name, hook):
+        """Run hook() after the clients during warm_up() (e.g. the S3 bucket check)."""
+        self._warm_up_hooks.append((name, hook))
+
+    def warm_up(self, background=False):
+        """
+        Create every client, then run the warm-up hooks, each timed as a startup
+        phase. Failures are logged, not raised; the client is retried on first use.
+
+        Args:
+            background: Run on a daemon thread and return it (requests arriving
+                meanwhile wait only for the client they need)
+        """
+        if background:
+            thread = threading.Thread(target=self.warm_up, name='aws-warm-up', daemon=True)
+            thread.start()
+            return thread
+
+        for name in self._specs:
+            try:
+                with metrics.startup_phase(f'warm_up:{name}'):
+                    self.client(name)
+            except Exception as e:
+                print(f"⚠ Warning: AWS {name} client not initialized: {e}")
+        for name, hook in self._warm_up_hooks:
+            try:
+                with metrics.startup_phase(f'warm_up:{name}'):
+                    hook()
+            except Exception as e:
+                print(f"⚠ Warning: {name} warm-up failed: {e}")
+        return None
+
+    def reset(self):
+        """Forget created clients, e.g. in a forked child that must not share the parent's connections."""
+        self._clients = {}
+
+    def stats(self):
+        return {
+            'created': sorted(self._clients),
+            'init_ms': {name: round(seconds * 1000, 2) for name, seconds in self._init_seconds.items()}
+        }
+
+
+class LazyClient:
+    """Stand-in for a factory's client; the client is created on first attribute access."""
+
+    def __init__(self, factory, name):
+        self._factory = factory
+        self._name = name
+
+    def __getattr__(self, attribute):
+        return getattr(self._factory.client(self._name), attribute)
+
+    def __repr__(self):
+        return f'<LazyClient {self._name}>'
+
+
+def _before_fork():
+    _session_lock.acquire()
+
+
+def _after_fork_in_parent():
+    _session_lock.release()
+
+
+def _after_fork_in_child():
+    global _session_lock
+    _session_lock = threading.RLock()
+    for factory in list(_factories):
+        factory.reset()
+
+
+# Forks wait for any client creation in progress, and children start without the parent's clients
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent,
+                        after_in_child=_after_fork_in_child)
@@ -0,0 +1,318 @@
+"""
+AWS Stubs - Local stand-ins for the AWS clients used by the Heritage Hub.
+They implement the subset of the boto3 client API that app.py calls, so the
+async pipelines can run in demo mode and be exercised without AWS credentials.
+"""
+
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+
+from botocore.exceptions import ClientError
+
+
+def _client_error(code, message, operation):
+    """Build a botocore ClientError like the real clients raise."""
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _text_to_blocks(pages, feature_types=None):
+    """
+    Turn a list of page texts into Textract blocks.
+    Every line becomes a LINE block. With FORMS, "Key: Value" lines also become
+    KEY/VALUE sets; with TABLES, runs of "a | b | c" lines become a TABLE.
+    """
+    feature_types = feature_types or []
+    blocks = []
+    ids = itertools.count(1)
+
+    def words(text, page_number):
+        word_blocks = [{'BlockType': 'WORD', 'Id': f'word-{next(ids)}', 'Page': page_number,
+                        'Text': word, 'Confidence': 99.0} for word in text.split()]
+        blocks.extend(word_blocks)
+        return [{'Type': 'CHILD', 'Ids': [w['Id'] for w in word_blocks]}]
+
+    for page_number, page_text in enumerate(pages, start=1):
+        page_block = {'BlockType': 'PAGE', 'Id': f'page-{next(ids)}', 'Page': page_number}
+        blocks.append(page_block)
+        lines = [line.strip() for line in page_text.split('\n') if line.strip()]
+        line_ids = []
+        table_rows = []
+        for index, line in enumerate(lines + ['']):
+            if 'TABLES' in feature_types and ' | ' in line:
+                table_rows.append([cell.strip() for cell in line.split(' | ')])
+                continue
+            if table_rows:
+                cells = []
+                for row, cells_text in enumerate(table_rows, start=1):
+                    for column, text in enumerate(cells_text, start=1):
+                        cell = {'BlockType': 'CELL', 'Id': f'cell-{next(ids)}', 'Page': page_number,
+                                'RowIndex': row, 'ColumnIndex': column,
+                                'Relationships': words(text, page_number)}
+                        blocks.append(cell)
+                        cells.append(cell['Id'])
+                blocks.append({'BlockType': 'TABLE', 'Id': f'table-{next(ids)}', 'Page': page_number,
+                               'Relationships': [{'Type': 'CHILD', 'Ids': cells}]})
+                table_rows = []
+            if not line:
+                continue
+
+            top = index / max(len(lines), 1)
+            line_block = {
+                'BlockType': 'LINE',
+                'Id': f'line-{next(ids)}',
+                'Page': page_number,
+                'Text': line,
+                'Confidence': 99.0,
+                'Geometry': {'BoundingBox': {'Left': 0.05, 'Top': top, 'Width': 0.9, 'Height': 0.02}}
+            }
+            blocks.append(line_block)
+            line_ids.append(line_block['Id'])
+
+            key, separator, value = line.partition(':')
+            if 'FORMS' in feature_types and separator and value.strip():
+                value_block = {'BlockType': 'KEY_VALUE_SET', 'Id': f'value-{next(ids)}', 'Page': page_number,
+                               'EntityTypes': ['VALUE'], 'Relationships': words(value, page_number)}
+                key_block = {'BlockType': 'KEY_VALUE_SET', 'Id': f'key-{next(ids)}', 'Page': page_number,
+                             'EntityTypes': ['KEY'], 'Confidence': 95.0,
+                             'Relationships': words(key, page_number) + [{'Type': 'VALUE', 'Ids': [value_block['Id']]}]}
+                blocks.extend([key_block, value_block])
+        page_block['Relationships'] = [{'Type': 'CHILD', 'Ids': line_ids}]
+    return blocks
+
+
+class StubS3Client:
+    """In-memory S3 with the bucket/object (and multipart upload) calls the app uses."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.multipart_uploads = {}  # upload id -> (bucket, key, {part number: (etag, bytes)})
+        self._lock = threading.Lock()
+
+    def head_bucket(self, Bucket):
+        if Bucket not in self.buckets:
+            raise _client_error('404', 'Not Found', 'HeadBucket')
+        return {}
+
+    def create_bucket(self, Bucket, **kwargs):
+        with self._lock:
+            self.buckets.setdefault(Bucket, {})
+        return {'Location': f'/{Bucket}'}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        if isinstance(Body, str):
+            Body = Body.encode()
+        with self._lock:
+            self.buckets.setdefault(Bucket, {})[Key] = bytes(Body)
+        return {'ETag': f'"{uuid.uuid4().hex}"'}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.multipart_uploads[upload_id] = (Bucket, Key, {})
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        etag = f'"{uuid.uuid4().hex}"'
+        with self._lock:
+            self.multipart_uploads[UploadId][2][PartNumber] = (etag, bytes(Body))
+        return {'ETag': etag}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        with self._lock:
+            _, _, uploaded = self.multipart_uploads.pop(UploadId)
+            data = b''.join(uploaded[part['PartNumber']][1] for part in MultipartUpload['Parts'])
+            self.buckets.setdefault(Bucket, {})[Key] = data
+        return {'ETag': f'"{uuid.uuid4().hex}-{len(MultipartUpload["Parts"])}"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        with self._lock:
+            self.multipart_uploads.pop(UploadId, None)
+        return {}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        with self._lock:
+            self.buckets.get(Bucket, {}).pop(Key, None)
+        return {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        try:
+            data = self.buckets[Bucket][Key]
+        except KeyError:
+            raise _client_error('NoSuchKey', 'The specified key does not exist.', 'GetObject')
+        return {'Body': _StreamingBody(data), 'ContentLength': len(data)}
+
+
+class _StreamingBody:
+    """Minimal botocore StreamingBody replacement."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def read(self, amt=None):
+        if amt is None:
+            data, self._data = self._data, b''
+        else:
+            data, self._data = self._data[:amt], self._data[amt:]
+        return data
+
+
+class StubTextractClient:
+    """
+    Local Textract stand-in.
+
+    Documents are "OCR'd" by decoding their bytes as text, with form feeds
+    separating pages; FORMS and TABLES output is derived from "Key: Value"
+    and "a | b" lines. Pass ``pages`` to return fixed page texts instead.
+    Async jobs report IN_PROGRESS for ``polls_until_complete`` polls and then
+    return their blocks ``page_size`` at a time with NextToken pagination.
+    """
+
+    def __init__(self, s3_client=None, pages=None, latency=0.0, polls_until_complete=1, page_size=1000):
+        self.s3_client = s3_client
+        self.pages = pages
+        self.latency = latency
+        self.polls_until_complete = polls_until_complete
+        self.page_size = page_size
+        self.calls = {'analyze_document': 0, 'detect_document_text': 0,
+                      'start_document_analysis': 0, 'get_document_analysis': 0}
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _pages_for(self, document_bytes):
+        if self.pages is not None:
+            return self.pages
+        return document_bytes.decode('utf-8', errors='replace').split('\f')
+
+    def _document_bytes(self, document):
+        if 'Bytes' in document:
+            return document['Bytes']
+        s3_object = document['S3Object']
+        if self.s3_client is None:
+            raise _client_error('InvalidS3ObjectException', 'Unable to get object metadata from S3.', 'AnalyzeDocument')
+        return self.s3_client.get_object(Bucket=s3_object['Bucket'], Key=s3_object['Name'])['Body'].read()
+
+    def _response(self, blocks):
+        pages = sum(1 for block in blocks if block['BlockType'] == 'PAGE')
+        return {'DocumentMetadata': {'Pages': pages}, 'Blocks': blocks}
+
+    def analyze_document(self, Document, FeatureTypes=None, **kwargs):
+        self.calls['analyze_document'] += 1
+        time.sleep(self.latency)
+        return self._response(_text_to_blocks(self._pages_for(self._document_bytes(Document)), FeatureTypes))
+
+    def detect_document_text(self, Document, **kwargs):
+        self.calls['detect_document_text'] += 1
+        time.sleep(self.latency)
+        return self._response(_text_to_blocks(self._pages_for(self._document_bytes(Document))))
+
+    def start_document_analysis(self, DocumentLocation, FeatureTypes=None, **kwargs):
+        self.calls['start_document_analysis'] += 1
+        time.sleep(self.latency)
+        blocks = _text_to_blocks(self._pages_for(self._document_bytes(DocumentLocation)), FeatureTypes)
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {'blocks': blocks, 'polls': 0}
+        return {'JobId': job_id}
+
+    def get_document_analysis(self, JobId, MaxResults=1000, NextToken=None, **kwargs):
+        self.calls['get_document_analysis'] += 1
+        time.sleep(self.latency)
+        with self._lock:
+            job = self._jobs.get(JobId)
+            if job is None:
+                raise _client_error('InvalidJobIdException', 'Request has invalid job id.', 'GetDocumentAnalysis')
+            job['polls'] += 1
+            if job['polls'] <= self.polls_until_complete:
+                return {'JobStatus': 'IN_PROGRESS'}
+
+        blocks = job['blocks']
+        start = int(NextToken or 0)
+        size = min(MaxResults, self.page_size)
+        response = {
+            'JobStatus': 'SUCCEEDED',
+            'DocumentMetadata': {'Pages': sum(1 for b in blocks if b['BlockType'] == 'PAGE')},
+            'Blocks': blocks[start:start + size]
+        }
+        if start + size < len(blocks):
+            response['NextToken'] = str(start + size)
+        return response
+
+
+class StubBedrockClient:
+    """
+    Local bedrock-runtime stand-in.
+
+    invoke_model answers in the format of the requested model (Anthropic
+    messages or Titan text). ``throttle_rate`` of calls fail with
+    ThrottlingException, and at most ``capacity`` calls may run at once
+    before further calls are throttled, to exercise the retry/limiter path.
+    invoke_model_with_response_stream yields the same text in small chunks.
+    """
+
+    def __init__(self, response_text='Stub summary.', latency=0.0, throttle_rate=0.0, capacity=None, seed=None, chunk_size=16):
+        self.response_text = response_text
+        self.chunk_size = chunk_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.calls = {'invoke_model': 0, 'throttled': 0}
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _admit(self):
+        with self._lock:
+            self.calls['invoke_model'] += 1
+            over_capacity = self.capacity is not None and self._in_flight >= self.capacity
+            if over_capacity or self._random.random() < self.throttle_rate:
+                self.calls['throttled'] += 1
+                raise _client_error('ThrottlingException', 'Too many requests, please wait before trying again.', 'InvokeModel')
+            self._in_flight += 1
+
+    def _finish(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self._admit()
+        try:
+            time.sleep(self.latency)
+        finally:
+            self._finish()
+
+        if 'claude' in modelId.lower():
+            payload = {'content': [{'type': 'text', 'text': self.response_text}], 'stop_reason': 'end_turn'}
+        else:
+            payload = {'results': [{'outputText': self.response_text}]}
+        return {'body': _StreamingBody(json.dumps(payload).encode()), 'contentType': 'application/json'}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        """Stream response_text ``chunk_size`` characters at a time, ``latency`` seconds apart."""
+        self._admit()
+        return {'body': self._events(modelId), 'contentType': 'application/json'}
+
+    def _events(self, model_id):
+        claude = 'claude' in model_id.lower()
+        try:
+            if claude:
+                yield _chunk({'type': 'message_start', 'message': {'role': 'assistant'}})
+            for start in range(0, len(self.response_text), self.chunk_size):
+                time.sleep(self.latency)
+                text = self.response_text[start:start + self.chunk_size]
+                if claude:
+                    yield _chunk({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': text}})
+                else:
+                    yield _chunk({'outputText': text, 'index': 0})
+            if claude:
+                yield _chunk({'type': 'message_stop'})
+        finally:
+            self._finish()
+
+
+def _chunk(payload):
+    """One response-stream event as botocore's EventStream yields it."""
+    return {'chunk': {'bytes': json.dumps(payload).encode()}}
@@ -0,0 +1,458 @@
+"""
+Bedrock Invoker - Shared invocation layer for Amazon Bedrock.
+Every Bedrock call goes through one BedrockInvoker, which sizes the HTTP
+connection pool, retries throttled calls with jittered backoff and bounds
+concurrency with an AIMD (additive increase, multiplicative decrease) limiter
+so bursts of ThrottlingException back off instead of turning into 500s.
+Coroutines (the async serving mode in asgi.py) share the same limiter through
+acquire_async() and the *_async methods, with an aiobotocore client.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+
+# Error codes that mean "slow down" rather than "this request is wrong"
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+}
+
+
+# Model id fragments of the models that support Bedrock prompt caching
+PROMPT_CACHING_MODELS = ('claude-3-7-sonnet', 'claude-3-5-haiku', 'claude-sonnet-4', 'claude-opus-4', 'nova-')
+
+
+def supports_prompt_caching(model_id):
+    """True if Bedrock prompt caching is available for the model (others reject cache checkpoints)."""
+    return any(fragment in model_id.lower() for fragment in PROMPT_CACHING_MODELS)
+
+
+class BedrockThrottledError(Exception):
+    """Raised when a call is still throttled after all retries, or waited too long for a slot."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def bedrock_client_config(max_pool_connections=50, connect_timeout=5, read_timeout=120):
+    """
+    botocore Config for the bedrock-runtime client.
+
+    botocore makes a single attempt per call: BedrockInvoker owns retry and
+    backoff, so every attempt takes its own limiter slot and every throttle
+    reaches the AIMD limit. Retrying inside botocore as well would multiply the
+    attempts per call and hide throttles while a slot is held.
+
+    Args:
+        max_pool_connections: HTTP connection pool size (should cover the limiter's max_limit)
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Seconds to wait for a model response
+
+    Returns:
+        botocore.config.Config
+    """
+    return Config(
+        max_pool_connections=max_pool_connections,
+        retries={'mode': 'standard', 'total_max_attempts': 1},
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout
+    )
+
+
+def is_throttling_error(error):
+    """True if a ClientError is a throttling / capacity error worth retrying."""
+    return isinstance(error, ClientError) and error.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+def text_request_body(model_id, prompt, max_tokens=4000, system=None, cache_system=False, **generation):
+    """
+    Request body for a single-turn prompt in the Anthropic messages or Titan text format.
+
+    Static instructions go in ``system`` so every request shares the same prefix;
+    with cache_system the Anthropic body marks it as a Bedrock prompt-cache checkpoint.
+    """
+    if 'claude' in model_id.lower():
+        body = {
+            'anthropic_version': 'bedrock-2023-05-31',
+            'max_tokens': max_tokens,
+            'messages': [{'role': 'user', 'content': prompt}]
+        }
+        if system:
+            block = {'type': 'text', 'text': system}
+            if cache_system:
+                block['cache_control'] = {'type': 'ephemeral'}
+            body['system'] = [block]
+        return body
+    return {
+        'inputText': f"{system}\n\n{prompt}" if system else prompt,
+        'textGenerationConfig': dict({'maxTokenCount': max_tokens, 'temperature': 0.7, 'topP': 0.9}, **generation)
+    }
+
+
+def stream_chunk_text(payload):
+    """Text carried by one decoded response-stream chunk (Anthropic delta or Titan outputText)."""
+    if payload.get('type') == 'content_block_delta':
+        return payload.get('delta', {}).get('text', '')
+    return payload.get('outputText', '')
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit.
+
+    The limit grows by ``increase`` / limit per successful call (about +1 per
+    round trip of the whole window) and is multiplied by ``decrease`` on a
+    throttle. Callers past the limit wait in a queue whose depth is tracked;
+    threads wait on a condition, coroutines on a future that release() resolves.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=50, increase=1.0, decrease=0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._async_waiters = []  # (event loop, future) of coroutines waiting for a slot
+        self._stats = {'acquired': 0, 'rejected': 0, 'throttled': 0, 'max_queue_depth': 0, 'total_wait_seconds': 0.0}
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a concurrency slot.
+
+        Returns:
+            True if a slot was acquired, False on timeout
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._condition:
+            self._waiting += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._waiting)
+            try:
+                while not self._try_acquire(start):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats['rejected'] += 1
+                        return False
+                    self._condition.wait(remaining)
+                return True
+            finally:
+                self._waiting -= 1
+
+    def _try_acquire(self, start):
+        """Take a slot if one is free (caller holds the condition)."""
+        if self._in_flight >= int(self._limit):
+            return False
+        self._in_flight += 1
+        self._stats['acquired'] += 1
+        self._stats['total_wait_seconds'] += time.monotonic() - start
+        return True
+
+    async def acquire_async(self, timeout=None):
+        """
+        acquire() for coroutines: waits for a slot without blocking the event loop.
+
+        Returns:
+            True if a slot was acquired, False on timeout
+        """
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._condition:
+            self._waiting += 1
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._waiting)
+        try:
+            while True:
+                with self._condition:
+                    if self._try_acquire(start):
+                        return True
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats['rejected'] += 1
+                        return False
+                    waiter = (loop, loop.create_future())
+                    self._async_waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter[1], remaining)
+                except asyncio.TimeoutError:
+                    pass  # Re-checked (and rejected) at the top of the loop
+                finally:
+                    with self._condition:
+                        if waiter in self._async_waiters:
+                            self._async_waiters.remove(waiter)
+        finally:
+            with self._condition:
+                self._waiting -= 1
+
+    def release(self, throttled=False):
+        """Give a slot back and adjust the limit from the call's outcome."""
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self._stats['throttled'] += 1
+                self._limit = max(self.min_limit, self._limit * self.decrease)
+            else:
+                self._limit = min(self.max_limit, self._limit + self.increase / max(self._limit, 1))
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def stats(self):
+        """Current limit, in-flight calls, queue depth and counters."""
+        with self._condition:
+            acquired = self._stats['acquired']
+            return dict(
+                self._stats,
+                limit=int(self._limit),
+                in_flight=self._in_flight,
+                queue_depth=self._waiting,
+                total_wait_seconds=round(self._stats['total_wait_seconds'], 3),
+                avg_wait_ms=round(1000 * self._stats['total_wait_seconds'] / acquired, 2) if acquired else 0.0
+            )
+
+
+class BedrockInvoker:
+    """
+    Calls bedrock-runtime through an AIMDLimiter with throttling-aware retry.
+
+    Args:
+        client: boto3 bedrock-runtime client (or aws_stubs.StubBedrockClient)
+        limiter: AIMDLimiter shared by all callers
+        max_retries: Extra attempts after a throttled call (botocore itself does not retry)
+        base_delay: First backoff delay in seconds (doubles per retry, full jitter)
+        max_delay: Backoff cap in seconds
+        queue_timeout: Seconds a call may wait for a slot before failing fast
+        prompt_caching: Mark system prompts as Bedrock prompt-cache checkpoints, for
+            models that support it (supports_prompt_caching)
+    """
+
+    def __init__(self, client, limiter=None, max_retries=3, base_delay=0.5, max_delay=8.0, queue_timeout=30.0,
+                 prompt_caching=False):
+        self.client = client
+        self.limiter = limiter or AIMDLimiter()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self.prompt_caching = prompt_caching
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'retries': 0, 'throttled_failures': 0, 'errors': 0,
+                       'input_tokens': 0, 'cache_read_input_tokens': 0, 'cache_write_input_tokens': 0}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _record_usage(self, usage):
+        """Track prompt-cache effectiveness from an Anthropic usage block."""
+        if usage:
+            self._count('input_tokens', usage.get('input_tokens', 0))
+            self._count('cache_read_input_tokens', usage.get('cache_read_input_tokens', 0))
+            self._count('cache_write_input_tokens', usage.get('cache_creation_input_tokens', 0))
+
+    def _text_body(self, model_id, prompt, max_tokens, system, generation):
+        return text_request_body(model_id, prompt, max_tokens, system=system,
+                                 cache_system=self.prompt_caching and supports_prompt_caching(model_id),
+                                 **generation)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _queue_full(self):
+        self._count('throttled_failures')
+        return BedrockThrottledError('Bedrock request queue is full; try again shortly', retry_after=self.max_delay)
+
+    def _call_failed(self, error, attempt):
+        """
+        Release the slot of a failed call. Re-raises the error unless it was a
+        throttle with retries left, in which case the caller backs off and retries.
+        """
+        if not is_throttling_error(error):
+            self.limiter.release()
+            self._count('errors')
+            raise error
+        self.limiter.release(throttled=True)
+        if attempt == self.max_retries:
+            self._count('throttled_failures')
+            raise BedrockThrottledError(f'Bedrock is throttling requests: {error}', retry_after=self.max_delay)
+        self._count('retries')
+
+    def _start(self, operation, model_id, body, **kwargs):
+        """
+        Call a bedrock-runtime operation, retrying throttles with backoff.
+        On success the caller holds a limiter slot and must release() it.
+        """
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        self._count('calls')
+
+        for attempt in range(self.max_retries + 1):
+            if not self.limiter.acquire(timeout=self.queue_timeout):
+                raise self._queue_full()
+            try:
+                return getattr(self.client, operation)(
+                    modelId=model_id,
+                    body=body,
+                    contentType='application/json',
+                    accept='application/json',
+                    **kwargs
+                )
+            except Exception as e:
+                self._call_failed(e, attempt)
+            except BaseException:
+                # Interrupted mid-call: give the slot back before unwinding
+                self.limiter.release()
+                raise
+
+            # Back off without holding a slot so other callers can drain
+            time.sleep(self._backoff(attempt))
+
+    async def _start_async(self, client, operation, model_id, body, **kwargs):
+        """_start() for coroutines, calling an aiobotocore bedrock-runtime client."""
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        self._count('calls')
+
+        for attempt in range(self.max_retries + 1):
+            if not await self.limiter.acquire_async(timeout=self.queue_timeout):
+                raise self._queue_full()
+            try:
+                return await getattr(client, operation)(
+                    modelId=model_id,
+                    body=body,
+                    contentType='application/json',
+                    accept='application/json',
+                    **kwargs
+                )
+            except Exception as e:
+                self._call_failed(e, attempt)
+            except BaseException:
+                # Cancelled (CancelledError isn't an Exception): give the slot back before unwinding
+                self.limiter.release()
+                raise
+
+            await asyncio.sleep(self._backoff(attempt))
+
+    def invoke(self, model_id, body, **kwargs):
+        """
+        Invoke a model and return its parsed JSON response body.
+
+        Args:
+            model_id: Bedrock model id
+            body: Request body (str or dict)
+
+        Returns:
+            Parsed response body dict
+
+        Raises:
+            BedrockThrottledError: still throttled after max_retries, or no slot within queue_timeout
+            ClientError: any non-throttling AWS error
+        """
+        response = self._start('invoke_model', model_id, body, **kwargs)
+        try:
+            return json.loads(response['body'].read())
+        finally:
+            self.limiter.release()
+
+    def invoke_text(self, model_id, prompt, max_tokens=4000, system=None, **generation):
+        """
+        Send a single-turn prompt and return the generated text.
+        Handles the Anthropic messages format and the Titan text format.
+        """
+        response_body = self.invoke(model_id, self._text_body(model_id, prompt, max_tokens, system, generation))
+        return self._response_text(model_id, response_body)
+
+    def _response_text(self, model_id, response_body):
+        if 'claude' in model_id.lower():
+            self._record_usage(response_body.get('usage'))
+            return response_body['content'][0]['text']
+        return response_body.get('results', [{}])[0].get('outputText', '')
+
+    async def invoke_async(self, client, model_id, body, **kwargs):
+        """
+        invoke() for coroutines. The slot is held only while the call is in
+        flight, so thousands of awaiting requests cost no threads.
+
+        Args:
+            client: aiobotocore bedrock-runtime client
+            model_id: Bedrock model id
+            body: Request body (str or dict)
+
+        Returns:
+            Parsed response body dict
+        """
+        response = await self._start_async(client, 'invoke_model', model_id, body, **kwargs)
+        try:
+            return json.loads(await response['body'].read())
+        finally:
+            self.limiter.release()
+
+    async def invoke_text_async(self, client, model_id, prompt, max_tokens=4000, system=None, **generation):
+        """invoke_text() for coroutines, with an aiobotocore bedrock-runtime client."""
+        response_body = await self.invoke_async(
+            client, model_id, self._text_body(model_id, prompt, max_tokens, system, generation)
+        )
+        return self._response_text(model_id, response_body)
+
+    def stream_text(self, model_id, prompt, max_tokens=4000, system=None, **generation):
+        """
+        Stream a single-turn prompt with invoke_model_with_response_stream.
+
+        Throttling before the first chunk is retried like invoke(); the
+        limiter slot is held until the stream is exhausted or closed.
+
+        Yields:
+            Text deltas as the model generates them
+        """
+        response = self._start(
+            'invoke_model_with_response_stream', model_id,
+            self._text_body(model_id, prompt, max_tokens, system, generation)
+        )
+        throttled = False
+        try:
+            for event in response['body']:
+                if 'chunk' not in event:
+                    # Modeled stream errors: throttlingException, modelStreamErrorException, ...
+                    name, detail = next(iter(event.items()))
+                    throttled = name == 'throttlingException'
+                    message = detail.get('message', name) if isinstance(detail, dict) else str(detail)
+                    if throttled:
+                        raise BedrockThrottledError(f'Bedrock throttled the stream: {message}', retry_after=self.max_delay)
+                    raise RuntimeError(f'Bedrock stream error ({name}): {message}')
+                payload = json.loads(event['chunk']['bytes'])
+                if payload.get('type') == 'message_start':
+                    self._record_usage(payload.get('message', {}).get('usage'))
+                text = stream_chunk_text(payload)
+                if text:
+                    yield text
+        finally:
+            self.limiter.release(throttled=throttled)
+
+    def stats(self):
+        """Invocation counters plus limiter state."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['limiter'] = self.limiter.stats()
+        return stats
@@ -0,0 +1,523 @@
+"""
+Fake AWS - Local HTTP stand-ins for Textract, Bedrock Runtime and S3.
+Unlike aws_stubs (which replace the boto3 client objects), these speak the real
+wire protocols (Textract JSON, Bedrock REST + event stream, S3 REST/XML), so the
+app runs with DEMO_MODE=False and its real boto3 clients, retries, connection
+pools and limiters, only pointed at localhost through the *_ENDPOINT_URL
+settings. Each service can inject latency, random throttling and a capacity
+limit. Request handling is delegated to the aws_stubs clients.
+
+Usage:
+    python benchmarks/fake_aws.py --latency bedrock=2.0 --throttle bedrock=0.05
+    (prints the environment variables to start app.py against the fakes)
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from aws_stubs import StubBedrockClient, StubS3Client, StubTextractClient  # noqa: E402
+
+
+SERVICES = ('textract', 'bedrock', 's3')
+
+DEFAULT_SUMMARY = (
+    'Your portfolio is spread across retirement and taxable accounts. '
+    'Here is what each part is for and what to do next.\n'
+    '{"goal_cards": [{"title": "Retirement Security", "purpose": "Long-term growth", "current_value": 125000, '
+    '"timeline": "10+ years", "next_steps": "Review beneficiaries"}, {"title": "Emergency Fund", '
+    '"purpose": "Short-term safety", "current_value": 25000, "timeline": "Immediate", '
+    '"next_steps": "Keep 6 months of expenses in cash"}]}'
+)
+
+
+class FakeService:
+    """
+    Latency, throttling and capacity injection shared by the fake services.
+
+    Args:
+        latency: Mean seconds added to every call
+        jitter: Latency varies uniformly by +/- this fraction
+        throttle_rate: Fraction of calls rejected with the service's throttling error
+        capacity: Calls allowed in flight at once; calls beyond it are throttled (None = unlimited)
+        seed: Random seed
+    """
+
+    name = None
+
+    def __init__(self, latency=0.0, jitter=0.2, throttle_rate=0.0, capacity=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {'calls': {}, 'throttled': 0, 'errors': 0, 'max_in_flight': 0}
+
+    def admit(self, operation):
+        """Count a call; returns False if it should be throttled."""
+        with self._lock:
+            calls = self._stats['calls']
+            calls[operation] = calls.get(operation, 0) + 1
+            over_capacity = self.capacity is not None and self._in_flight >= self.capacity
+            if over_capacity or self._random.random() < self.throttle_rate:
+                self._stats['throttled'] += 1
+                return False
+            self._in_flight += 1
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._in_flight)
+            return True
+
+    def finish(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def delay(self, seconds=None):
+        seconds = self.latency if seconds is None else seconds
+        if seconds > 0:
+            with self._lock:
+                factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(seconds * factor)
+
+    def count_error(self):
+        with self._lock:
+            self._stats['errors'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, calls=dict(self._stats['calls']), in_flight=self._in_flight)
+
+    def handle(self, request, method, path, query, body):
+        """Serve one request (implemented per service)."""
+        raise NotImplementedError
+
+
+def _error_details(error):
+    """(code, message) of a stub ClientError."""
+    details = error.response.get('Error', {})
+    return details.get('Code', 'InternalFailure'), details.get('Message', '')
+
+
+class FakeTextract(FakeService):
+    """Textract JSON 1.1 protocol (X-Amz-Target: Textract.<Operation>)."""
+
+    name = 'textract'
+    OPERATIONS = {
+        'AnalyzeDocument': 'analyze_document',
+        'DetectDocumentText': 'detect_document_text',
+        'StartDocumentAnalysis': 'start_document_analysis',
+        'GetDocumentAnalysis': 'get_document_analysis',
+    }
+
+    def __init__(self, s3_client, **kwargs):
+        super().__init__(**kwargs)
+        # The stub reads S3Object documents from the shared fake S3 store
+        self.client = StubTextractClient(s3_client=s3_client, polls_until_complete=1)
+
+    def handle(self, request, method, path, query, body):
+        target = request.headers.get('X-Amz-Target', '')
+        operation = self.OPERATIONS.get(target.rpartition('.')[2])
+        if method != 'POST' or operation is None:
+            return request.send_json(400, {'__type': 'UnknownOperationException', 'message': target})
+        if not self.admit(operation):
+            return request.send_json(400, {'__type': 'ThrottlingException', 'message': 'Rate exceeded'})
+        try:
+            self.delay()
+            params = json.loads(body or b'{}')
+            document = params.get('Document')
+            if document and 'Bytes' in document:
+                params['Document'] = dict(document, Bytes=base64.b64decode(document['Bytes']))
+            response = getattr(self.client, operation)(**params)
+        except ClientError as e:
+            self.count_error()
+            code, message = _error_details(e)
+            return request.send_json(400, {'__type': code, 'message': message})
+        finally:
+            self.finish()
+        request.send_json(200, response)
+
+
+class FakeBedrock(FakeService):
+    """Bedrock Runtime REST protocol: /model/<id>/invoke and /invoke-with-response-stream."""
+
+    name = 'bedrock'
+
+    def __init__(self, response_text=DEFAULT_SUMMARY, chunk_size=32, chunk_delay=0.01, **kwargs):
+        super().__init__(**kwargs)
+        self.client = StubBedrockClient(response_text=response_text, chunk_size=chunk_size)
+        self.chunk_delay = chunk_delay
+
+    def handle(self, request, method, path, query, body):
+        parts = path.strip('/').split('/')
+        if method != 'POST' or len(parts) != 3 or parts[0] != 'model':
+            return request.send_json(404, {'message': f'Unknown path {path}'},
+                                     headers={'x-amzn-ErrorType': 'UnknownOperationException'})
+        model_id, action = unquote(parts[1]), parts[2]
+        streaming = action == 'invoke-with-response-stream'
+        operation = 'invoke_model_with_response_stream' if streaming else 'invoke_model'
+        if not self.admit(operation):
+            return request.send_json(429, {'message': 'Too many requests, please wait before trying again.'},
+                                     headers={'x-amzn-ErrorType': 'ThrottlingException'})
+        try:
+            self.delay()  # Time to first token
+            if not streaming:
+                response = self.client.invoke_model(modelId=model_id, body=body)
+                return request.send_bytes(200, response['body'].read(), 'application/json')
+
+            events = self.client.invoke_model_with_response_stream(modelId=model_id, body=body)['body']
+            request.start_chunked(200, 'application/vnd.amazon.eventstream',
+                                  headers={'X-Amzn-Bedrock-Content-Type': 'application/json'})
+            for event in events:
+                payload = json.dumps({'bytes': base64.b64encode(event['chunk']['bytes']).decode()}).encode()
+                request.write_chunk(_event_message({':event-type': 'chunk', ':content-type': 'application/json',
+                                                    ':message-type': 'event'}, payload))
+                self.delay(self.chunk_delay)
+            request.end_chunked()
+        finally:
+            self.finish()
+
+
+def _event_message(headers, payload):
+    """Encode one application/vnd.amazon.eventstream message (string headers only)."""
+    encoded_headers = b''.join(
+        struct.pack('!B', len(name)) + name.encode() + struct.pack('!BH', 7, len(value)) + value.encode()
+        for name, value in headers.items()
+    )
+    prelude = struct.pack('!II', 12 + len(encoded_headers) + len(payload) + 4, len(encoded_headers))
+    message = prelude + struct.pack('!I', zlib.crc32(prelude)) + encoded_headers + payload
+    return message + struct.pack('!I', zlib.crc32(message))
+
+
+class FakeS3(FakeService):
+    """S3 REST/XML protocol, path-style addressing (/<bucket>/<key>)."""
+
+    name = 's3'
+    ERROR_STATUS = {'NoSuchKey': 404, 'NoSuchBucket': 404, 'NoSuchUpload': 404, '404': 404}
+
+    def __init__(self, s3_client, **kwargs):
+        super().__init__(**kwargs)
+        self.client = s3_client
+
+    def _operation(self, method, key, query):
+        if not key:
+            return {'HEAD': 'head_bucket', 'PUT': 'create_bucket'}.get(method)
+        if method == 'POST':
+            return 'create_multipart_upload' if 'uploads' in query else 'complete_multipart_upload'
+        if method == 'PUT':
+            return 'upload_part' if 'uploadId' in query else 'put_object'
+        if method == 'DELETE':
+            return 'abort_multipart_upload' if 'uploadId' in query else 'delete_object'
+        return {'GET': 'get_object'}.get(method)
+
+    def handle(self, request, method, path, query, body):
+        bucket, _, key = unquote(path).lstrip('/').partition('/')
+        operation = self._operation(method, key, query)
+        if operation is None:
+            return request.send_xml(405, _s3_error('MethodNotAllowed', f'{method} {path}'))
+        if not self.admit(operation):
+            return request.send_xml(503, _s3_error('SlowDown', 'Please reduce your request rate.'))
+        try:
+            self.delay()
+            self._dispatch(request, operation, bucket, key, query, body)
+        except ClientError as e:
+            self.count_error()
+            code, message = _error_details(e)
+            status = self.ERROR_STATUS.get(code, 400)
+            if method == 'HEAD':
+                return request.send_bytes(status, b'')
+            request.send_xml(status, _s3_error(code, message))
+        finally:
+            self.finish()
+
+    def _dispatch(self, request, operation, bucket, key, query, body):
+        upload_id = (query.get('uploadId') or [None])[0]
+        if operation == 'head_bucket':
+            self.client.head_bucket(Bucket=bucket)
+            request.send_bytes(200, b'')
+        elif operation == 'create_bucket':
+            self.client.create_bucket(Bucket=bucket)
+            request.send_bytes(200, b'', headers={'Location': f'/{bucket}'})
+        elif operation == 'put_object':
+            etag = self.client.put_object(Bucket=bucket, Key=key, Body=body)['ETag']
+            request.send_bytes(200, b'', headers={'ETag': etag})
+        elif operation == 'get_object':
+            data = self.client.get_object(Bucket=bucket, Key=key)['Body'].read()
+            request.send_bytes(200, data, 'application/octet-stream')
+        elif operation == 'create_multipart_upload':
+            upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+            request.send_xml(200, _xml('InitiateMultipartUploadResult', Bucket=bucket, Key=key, UploadId=upload_id))
+        elif operation == 'upload_part':
+            etag = self.client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id,
+                                           PartNumber=int(query['partNumber'][0]), Body=body)['ETag']
+            request.send_bytes(200, b'', headers={'ETag': etag})
+        elif operation == 'complete_multipart_upload':
+            root = ElementTree.fromstring(body)
+            parts = [{'PartNumber': int(part.findtext('{*}PartNumber')), 'ETag': part.findtext('{*}ETag')}
+                     for part in root.iter() if part.tag.endswith('Part')]
+            etag = self.client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                                         MultipartUpload={'Parts': parts})['ETag']
+            request.send_xml(200, _xml('CompleteMultipartUploadResult', Bucket=bucket, Key=key, ETag=etag))
+        elif operation == 'abort_multipart_upload':
+            self.client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            request.send_bytes(204, b'')
+        elif operation == 'delete_object':
+            self.client.delete_object(Bucket=bucket, Key=key)
+            request.send_bytes(204, b'')
+
+
+def _xml(root, **fields):
+    inner = ''.join(f'<{name}>{escape(str(value))}</{name}>' for name, value in fields.items())
+    return f'<?xml version="1.0" encoding="UTF-8"?><{root}>{inner}</{root}>'
+
+
+def _s3_error(code, message):
+    return _xml('Error', Code=code, Message=message)
+
+
+def _decode_chunked(data):
+    """Strip HTTP chunked / aws-chunked framing (chunk-size[;ext]\\r\\n data \\r\\n ... 0 + trailers)."""
+    out, position = [], 0
+    while True:
+        line_end = data.index(b'\r\n', position)
+        size = int(data[position:line_end].split(b';')[0], 16)
+        if size == 0:
+            return b''.join(out)
+        out.append(data[line_end + 2:line_end + 2 + size])
+        position = line_end + 2 + size + 2
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real endpoints
+    service = None  # Set on the per-server subclass
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionError:
+            pass  # The client reset a kept-alive connection (e.g. the app under test was stopped)
+
+    def _body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            raw = []
+            while True:
+                line = self.rfile.readline()
+                size = int(line.split(b';')[0], 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass  # Trailers
+                    break
+                raw.append(self.rfile.read(size))
+                self.rfile.readline()
+            body = b''.join(raw)
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if 'aws-chunked' in self.headers.get('Content-Encoding', ''):
+            body = _decode_chunked(body)
+        return body
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        try:
+            self.service.handle(self, self.command, url.path, query, self._body())
+        except ConnectionError:
+            self.close_connection = True  # The client went away (e.g. the app shut down mid-stream)
+        except Exception as e:
+            self.service.count_error()
+            self.send_json(500, {'__type': 'InternalFailure', 'message': str(e)})
+
+    do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+    def send_bytes(self, status, data, content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def send_json(self, status, payload, headers=None):
+        self.send_bytes(status, json.dumps(payload).encode(), 'application/x-amz-json-1.1', headers)
+
+    def send_xml(self, status, document):
+        self.send_bytes(status, document.encode(), 'application/xml')
+
+    def start_chunked(self, status, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def write_chunk(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def end_chunked(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
+class FakeAWSServer:
+    """
+    A threaded HTTP server for one fake service.
+
+    Args:
+        service: FakeService instance
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+    """
+
+    def __init__(self, service, host='127.0.0.1', port=0):
+        self.service = service
+        handler = type(f'{type(service).__name__}Handler', (_Handler,), {'service': service})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'fake-{self.service.name}',
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_fake_aws(latency=None, throttle=None, capacity=None, jitter=0.2, chunk_delay=0.01, seed=None,
+                   host='127.0.0.1', ports=None):
+    """
+    Start Textract, Bedrock and S3 fakes sharing one in-memory S3 store.
+
+    Args:
+        latency: {service: mean seconds per call}
+        throttle: {service: fraction of calls throttled}
+        capacity: {service: calls allowed in flight}
+        jitter: Latency jitter fraction
+        chunk_delay: Seconds between Bedrock stream chunks
+        seed: Random seed
+        host: Interface to bind
+        ports: {service: port} (default: free ports)
+
+    Returns:
+        {service: FakeAWSServer}, already serving
+    """
+    latency, throttle, capacity, ports = latency or {}, throttle or {}, capacity or {}, ports or {}
+
+    def options(service):
+        return {'latency': latency.get(service, 0.0), 'jitter': jitter, 'throttle_rate': throttle.get(service, 0.0),
+                'capacity': capacity.get(service), 'seed': seed}
+
+    store = StubS3Client()
+    services = {
+        'textract': FakeTextract(store, **options('textract')),
+        'bedrock': FakeBedrock(chunk_delay=chunk_delay, **options('bedrock')),
+        's3': FakeS3(store, **options('s3')),
+    }
+    return {name: FakeAWSServer(service, host, ports.get(name, 0)).start() for name, service in services.items()}
+
+
+def fake_aws_env(servers):
+    """Environment for app.py to use the fakes with its real boto3 clients."""
+    return {
+        'DEMO_MODE': 'False',
+        'AWS_ACCESS_KEY_ID': 'fake-access-key',
+        'AWS_SECRET_ACCESS_KEY': 'fake-secret-key',
+        'AWS_REGION': 'us-east-1',
+        'TEXTRACT_ENDPOINT_URL': servers['textract'].url,
+        'BEDROCK_ENDPOINT_URL': servers['bedrock'].url,
+        'S3_ENDPOINT_URL': servers['s3'].url,
+    }
+
+
+def parse_service_values(pairs, cast=float):
+    """['bedrock=2.0', 'all=0.1'] -> {'bedrock': 2.0, 'textract': 0.1, 's3': 0.1}"""
+    values = {}
+    for pair in pairs or []:
+        service, separator, value = pair.partition('=')
+        if not separator or (service not in SERVICES and service != 'all'):
+            raise argparse.ArgumentTypeError(f"Expected <{'|'.join(SERVICES)}|all>=<value>, got {pair!r}")
+        for name in (SERVICES if service == 'all' else (service,)):
+            values[name] = cast(value)
+    return values
+
+
+def add_fault_arguments(parser):
+    """Latency/throttle/capacity options shared with loadtest.py."""
+    parser.add_argument('--latency', action='append', metavar='SERVICE=SECONDS',
+                        help='Mean latency per call, e.g. bedrock=2.0 (repeatable; "all" for every service)')
+    parser.add_argument('--throttle', action='append', metavar='SERVICE=RATE',
+                        help='Fraction of calls throttled, e.g. bedrock=0.05')
+    parser.add_argument('--capacity', action='append', metavar='SERVICE=N',
+                        help='Calls in flight before further calls are throttled, e.g. bedrock=20')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Latency jitter fraction (default 0.2)')
+    parser.add_argument('--chunk-delay', type=float, default=0.01, help='Seconds between Bedrock stream chunks')
+    parser.add_argument('--seed', type=int, help='Random seed for throttling and jitter')
+
+
+def fault_options(args):
+    """start_fake_aws() keyword arguments from add_fault_arguments() options."""
+    return {
+        'latency': parse_service_values(args.latency),
+        'throttle': parse_service_values(args.throttle),
+        'capacity': parse_service_values(args.capacity, int),
+        'jitter': args.jitter,
+        'chunk_delay': args.chunk_delay,
+        'seed': args.seed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run local Textract, Bedrock and S3 fakes.')
+    add_fault_arguments(parser)
+    parser.add_argument('--host', default='127.0.0.1')
+    for service in SERVICES:
+        parser.add_argument(f'--{service}-port', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    servers = start_fake_aws(host=args.host, ports={service: getattr(args, f'{service}_port') for service in SERVICES},
+                             **fault_options(args))
+    print("✓ Fake AWS services running. Start the app with:")
+    for name, value in fake_aws_env(servers).items():
+        print(f"  export {name}={value}")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps({name: server.service.stats() for name, server in servers.items()}))
+    except KeyboardInterrupt:
+        for server in servers.values():
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,425 @@
+"""
+Load Test - Replay a request mix against the app with local AWS stand-ins.
+By default it starts the fake Textract/Bedrock/S3 servers (fake_aws.py) and
+app.py against them (DEMO_MODE=False, real boto3 clients), drives a JSONL
+request mix at a fixed concurrency or arrival rate, and reports sustained RPS,
+latency percentiles and error rates per endpoint. Use it to size worker counts
+and concurrency limits: pass them to the app with --app-env.
+
+Mix format (one JSON object per line):
+    {"name": "summarize", "method": "POST", "path": "/api/bedrock/summarize",
+     "json": {...}, "weight": 2}
+    {"path": "/api/textract/analyze", "files": {"file": {"filename": "a.pdf",
+     "synthetic_statement": {"pages": 2}, "vary": true}}}
+Optional keys: "headers", "form", "query", "offset_s" (replay time for
+captured traffic, with --timed). A file is given by "path", "content" or
+"synthetic_statement"; "vary" appends a unique line so caches miss.
+
+Usage:
+    python benchmarks/loadtest.py --concurrency 32 --duration 60 --latency bedrock=2.0
+    python benchmarks/loadtest.py --rate 50 --duration 120 --app-env UPLOAD_WORKERS=8
+    python benchmarks/loadtest.py --url http://localhost:5000 --mix captured.jsonl --timed
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import synthetic  # noqa: E402
+from fake_aws import add_fault_arguments, fake_aws_env, fault_options, start_fake_aws  # noqa: E402
+
+
+DEFAULT_MIX = os.path.join(REPO_ROOT, 'benchmarks', 'mixes', 'onboarding.jsonl')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_mix(path):
+    """Parse a JSONL request mix; every entry gets a name and a method."""
+    entries = []
+    with open(path) as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line)
+            if 'path' not in entry:
+                raise ValueError(f"{path}:{number}: request has no \"path\"")
+            entry.setdefault('method', 'POST' if any(k in entry for k in ('json', 'form', 'files')) else 'GET')
+            entry.setdefault('name', f"{entry['method']} {entry['path']}")
+            entry.setdefault('weight', 1)
+            entries.append(entry)
+    if not entries:
+        raise ValueError(f"{path}: no requests")
+    return entries
+
+
+class RequestBuilder:
+    """Turns mix entries into (method, path, body, headers), caching generated documents."""
+
+    def __init__(self, seed=None):
+        self._documents = {}
+        self._lock = threading.Lock()
+        self._seed = seed or 0
+
+    def _document(self, spec):
+        cache_key = json.dumps(spec, sort_keys=True)
+        with self._lock:
+            data = self._documents.get(cache_key)
+        if data is None:
+            if 'path' in spec:
+                with open(spec['path'], 'rb') as f:
+                    data = f.read()
+            elif 'synthetic_statement' in spec:
+                options = spec['synthetic_statement']
+                pages = synthetic.statement_pages(options.get('pages', 1), options.get('accounts_per_page', 5),
+                                                  seed=self._seed)
+                data = '\f'.join(pages).encode()  # Form feeds separate pages for the Textract stand-in
+            else:
+                data = spec.get('content', '').encode()
+            with self._lock:
+                self._documents[cache_key] = data
+        if spec.get('vary'):
+            data += f'\nReference: {uuid.uuid4().hex}'.encode()
+        return data
+
+    def build(self, entry):
+        headers = dict(entry.get('headers') or {})
+        path = entry['path']
+        if entry.get('query'):
+            path += ('&' if '?' in path else '?') + urlencode(entry['query'])
+
+        body = None
+        if 'files' in entry:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for name, value in (entry.get('form') or {}).items():
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+            for field, spec in entry['files'].items():
+                filename = spec.get('filename', 'document.pdf')
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                             f'Content-Type: application/octet-stream\r\n\r\n'.encode() + self._document(spec) + b'\r\n')
+            body = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif 'json' in entry:
+            body = json.dumps(entry['json']).encode()
+            headers['Content-Type'] = 'application/json'
+        elif 'form' in entry:
+            body = urlencode(entry['form']).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        return entry['method'], path, body, headers
+
+
+class Recorder:
+    """Thread-safe per-endpoint latency/status samples."""
+
+    def __init__(self):
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, latency, status, error=None, response_bytes=0):
+        with self._lock:
+            self._samples.setdefault(name, []).append((latency, status, error, response_bytes))
+
+    def report(self, elapsed):
+        """Per-endpoint and overall RPS, latency percentiles (ms) and error rate."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        endpoints = {name: _summarize(values, elapsed) for name, values in sorted(samples.items())}
+        overall = _summarize([sample for values in samples.values() for sample in values], elapsed)
+        return {'elapsed_s': round(elapsed, 3), 'overall': overall, 'endpoints': endpoints}
+
+
+def _percentile(sorted_values, p):
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _, _, _ in samples)
+    statuses, errors = {}, {}
+    failed = 0
+    for _, status, error, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if error or status >= 400:
+            failed += 1
+            label = error or f'HTTP {status}'
+            errors[label] = errors.get(label, 0) + 1
+    count = len(samples)
+    summary = {
+        'requests': count,
+        'rps': round(count / elapsed, 2) if elapsed else None,
+        'error_rate': round(failed / count, 4) if count else 0.0,
+        'statuses': statuses,
+        'errors': errors,
+        'mean_ms': round(sum(latencies) / count * 1000, 2) if count else None,
+        'max_ms': round(latencies[-1] * 1000, 2) if count else None,
+        'bytes_out': sum(size for _, _, _, size in samples)
+    }
+    for p in PERCENTILES:
+        value = _percentile(latencies, p)
+        summary[f'p{p}_ms'] = round(value * 1000, 2) if value is not None else None
+    return summary
+
+
+class LoadRunner:
+    """
+    Drive a request mix against a base URL.
+
+    Args:
+        base_url: App URL, e.g. http://127.0.0.1:5000
+        entries: Mix entries from load_mix()
+        timeout: Per-request timeout in seconds
+        seed: Random seed for entry selection
+    """
+
+    def __init__(self, base_url, entries, timeout=120, seed=None):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port or 80
+        self.entries = entries
+        self.timeout = timeout
+        self.builder = RequestBuilder(seed)
+        self.recorder = Recorder()
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self):
+        """This thread's keep-alive connection, and whether it is new."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            return connection, True
+        return connection, False
+
+    def _close_connection(self):
+        connection, self._local.connection = getattr(self._local, 'connection', None), None
+        if connection is not None:
+            connection.close()
+
+    def _pick(self):
+        with self._random_lock:
+            return self._random.choices(self.entries, weights=[e['weight'] for e in self.entries])[0]
+
+    def send(self, entry, scheduled=None, record=True):
+        """
+        Send one request and record its latency. In open-loop runs latency is
+        measured from the scheduled start, so queueing in the load generator counts.
+        """
+        method, path, body, headers = self.builder.build(entry)
+        start = scheduled if scheduled is not None else time.perf_counter()
+        status, error, size = 0, None, 0
+        for _ in range(2):
+            connection, fresh = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                size = len(response.read())  # Streams are read to the end
+                status, error = response.status, None
+                if response.will_close:
+                    self._close_connection()
+                break
+            except (OSError, http.client.HTTPException) as e:
+                error = type(e).__name__
+                self._close_connection()
+                if fresh or not isinstance(e, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)):
+                    break  # Only a reused keep-alive connection the server dropped is retried
+        if record:
+            self.recorder.record(entry['name'], time.perf_counter() - start, status, error, size)
+
+    def run_closed(self, concurrency, duration, warmup=0.0):
+        """concurrency workers each send the next request as soon as the last one finished."""
+        deadline = time.perf_counter() + warmup + duration
+        measure_from = time.perf_counter() + warmup
+
+        def worker():
+            while time.perf_counter() < deadline:
+                self.send(self._pick(), record=time.perf_counter() >= measure_from)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return duration
+
+    def run_open(self, rate, duration, concurrency, warmup=0.0):
+        """Requests arrive at a fixed rate regardless of how fast earlier ones finish."""
+        interval = 1.0 / rate
+        started = time.perf_counter()
+        measure_from = started + warmup
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for n in itertools.count():
+                scheduled = started + n * interval
+                if scheduled >= started + warmup + duration:
+                    break
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+                executor.submit(self.send, self._pick(), scheduled, scheduled >= measure_from)
+        return duration
+
+    def run_timed(self, concurrency, speed=1.0, iterations=1):
+        """Replay entries at their recorded offset_s (divided by speed), in order."""
+        timeline = sorted(self.entries, key=lambda e: e.get('offset_s', 0))
+        span = max(e.get('offset_s', 0) for e in timeline) / speed
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for iteration in range(iterations):
+                base = started + iteration * (span + 1e-3)
+                for entry in timeline:
+                    scheduled = base + entry.get('offset_s', 0) / speed
+                    time.sleep(max(0.0, scheduled - time.perf_counter()))
+                    executor.submit(self.send, entry, scheduled)
+        return time.perf_counter() - started
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(env_overrides, log_path, startup_timeout=90):
+    """
+    Start app.py in a subprocess and wait for /health.
+
+    Returns:
+        (process, base_url)
+    """
+    port = _free_port()
+    env = dict(os.environ, FLASK_DEBUG='False', PORT=str(port), **env_overrides)
+    log = open(log_path, 'w')
+    process = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, 'app.py')], cwd=REPO_ROOT, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'app.py exited with {process.returncode}; see {log_path}')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'app.py did not answer /health within {startup_timeout}s; see {log_path}')
+
+
+def fetch_json(base_url, path):
+    url = urlsplit(base_url)
+    try:
+        connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+
+
+def print_report(report):
+    columns = ['requests', 'rps', 'error_rate', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+    print(f"\n{'endpoint':34s}" + ''.join(f'{c:>11s}' for c in columns))
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['overall'])]
+    for name, summary in rows:
+        print(f'{name[:34]:34s}' + ''.join(f"{'-' if summary[c] is None else summary[c]:>11}" for c in columns))
+        if summary['errors']:
+            print(f"{'':34s}  errors: {json.dumps(summary['errors'])}")
+
+
+def parse_env_pairs(pairs):
+    env = {}
+    for pair in pairs or []:
+        name, separator, value = pair.partition('=')
+        if not separator:
+            raise argparse.ArgumentTypeError(f'Expected NAME=VALUE, got {pair!r}')
+        env[name] = value
+    return env
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a request mix against the app with fake AWS services.')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='JSONL request mix (default benchmarks/mixes/onboarding.jsonl)')
+    parser.add_argument('--url', help='Test an already running app instead of starting one (no fake AWS)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Workers / requests in flight (default 16)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to measure (default 30)')
+    parser.add_argument('--warmup', type=float, default=3, help='Seconds of load before measuring (default 3)')
+    parser.add_argument('--rate', type=float, help='Open-loop arrival rate in requests/s (default: closed loop)')
+    parser.add_argument('--timed', action='store_true', help='Replay entries at their offset_s (captured traffic)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Time compression for --timed replay')
+    parser.add_argument('--iterations', type=int, default=1, help='Times to replay a --timed mix')
+    parser.add_argument('--timeout', type=float, default=120, help='Per-request timeout in seconds')
+    parser.add_argument('--app-env', action='append', metavar='NAME=VALUE',
+                        help='Setting for the started app, e.g. UPLOAD_WORKERS=8 (repeatable)')
+    parser.add_argument('--output', help='Write the JSON report here')
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    entries = load_mix(args.mix)
+    servers, process = {}, None
+    base_url = args.url
+    if not base_url:
+        servers = start_fake_aws(**fault_options(args))
+        work_dir = tempfile.mkdtemp(prefix='heritage-load-')
+        env = dict(fake_aws_env(servers), DATA_DIR=work_dir, **parse_env_pairs(args.app_env))
+        process, base_url = start_app(env, os.path.join(work_dir, 'app.log'))
+        print(f"✓ App running at {base_url} against fake AWS (logs in {work_dir})")
+
+    runner = LoadRunner(base_url, entries, timeout=args.timeout, seed=args.seed)
+    try:
+        if args.timed:
+            mode = f'timed replay x{args.speed}'
+            print(f"Replaying {len(entries)} requests ({mode})...")
+            elapsed = runner.run_timed(args.concurrency, args.speed, args.iterations)
+        elif args.rate:
+            mode = f'open loop {args.rate}/s'
+            print(f"Sending {args.rate} requests/s for {args.duration}s after {args.warmup}s warm-up...")
+            elapsed = runner.run_open(args.rate, args.duration, args.concurrency, args.warmup)
+        else:
+            mode = f'closed loop x{args.concurrency}'
+            print(f"Running {args.concurrency} workers for {args.duration}s after {args.warmup}s warm-up...")
+            elapsed = runner.run_closed(args.concurrency, args.duration, args.warmup)
+
+        report = runner.recorder.report(elapsed)
+        report.update({
+            'mode': mode,
+            'mix': args.mix,
+            'concurrency': args.concurrency,
+            'app_env': parse_env_pairs(args.app_env),
+            'fake_aws': {name: server.service.stats() for name, server in servers.items()},
+            'app_health': fetch_json(base_url, '/health'),
+        })
+        print_report(report)
+        if servers:
+            print('\nFake AWS: ' + json.dumps(report['fake_aws']))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"✓ Report written to {args.output}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        for server in servers.values():
+            server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Benchmarks - Throughput and memory of the parsing and goal-generation hot paths.
+Runs each benchmark on synthetic inputs (see synthetic.py), records timings,
+throughput and peak allocation to a JSON file, and can compare a run against
+an earlier one so parsing regressions show up between commits.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --quick --only parse_portfolio_from_text
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/baseline.json --fail-on-regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Importing app.py starts its background services; keep them in demo mode and
+# point their databases at a scratch directory instead of backend/data
+os.environ['DEMO_MODE'] = 'True'
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='heritage-bench-'))
+os.environ.setdefault('NIGO_RULES_RELOAD_INTERVAL', '0')
+
+import app  # noqa: E402
+import goal_generator  # noqa: E402
+import synthetic  # noqa: E402
+
+
+DEFAULT_RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+# Input sizes; --quick uses the first two of each
+PAGE_COUNTS = [1, 10, 100, 500]
+ACCOUNT_COUNTS = [5, 50, 500]
+USER_COUNTS = [1000, 10000]
+
+
+def benchmark_cases(quick=False):
+    """
+    (name, params, setup) for every benchmark. setup() builds the inputs and
+    returns (fn, units, unit): fn() is one operation processing `units` of `unit`.
+    """
+    pages = PAGE_COUNTS[:2] if quick else PAGE_COUNTS
+    accounts = ACCOUNT_COUNTS[:2] if quick else ACCOUNT_COUNTS
+    users = USER_COUNTS[:1] if quick else USER_COUNTS
+
+    cases = []
+    for page_count in pages:
+        for feature_types in (('FORMS', 'TABLES'), ()):
+            def setup(page_count=page_count, feature_types=feature_types):
+                response = synthetic.textract_response(page_count, feature_types=feature_types)
+                return (lambda: app.extract_text_from_textract(response)), len(response['Blocks']), 'blocks'
+            cases.append(('extract_text_from_textract',
+                          {'pages': page_count, 'feature_types': list(feature_types)}, setup))
+
+        def setup(page_count=page_count):
+            response = synthetic.textract_response(page_count)
+            text = app.extract_text_from_textract(response)
+            return (lambda: app.extract_account_value(response, text)), len(response['Blocks']), 'blocks'
+        cases.append(('extract_account_value', {'pages': page_count, 'feature_types': ['FORMS', 'TABLES']}, setup))
+
+        def setup(page_count=page_count):
+            text = '\n'.join(synthetic.statement_pages(page_count))
+            return (lambda: app.extract_account_value(None, text)), len(text), 'chars'
+        cases.append(('extract_account_value', {'pages': page_count, 'feature_types': []}, setup))
+
+        def setup(page_count=page_count):
+            text = '\n'.join(synthetic.statement_pages(page_count))
+            return (lambda: app.detect_nigo_errors(text, None)), len(text), 'chars'
+        cases.append(('detect_nigo_errors', {'pages': page_count}, setup))
+
+    for account_count in accounts:
+        def setup(account_count=account_count):
+            text = synthetic.statement_text(account_count)
+            return (lambda: app.parse_portfolio_from_text(text, 'statement.pdf')), len(text), 'chars'
+        cases.append(('parse_portfolio_from_text', {'accounts': account_count}, setup))
+
+        for with_json in (False, True):
+            def setup(account_count=account_count, with_json=with_json):
+                portfolio = app.parse_portfolio_from_text(synthetic.statement_text(account_count), 'statement.pdf')
+                summary = synthetic.goal_summary_text(portfolio, with_json=with_json)
+                return (lambda: app.parse_goal_cards_from_response(summary, portfolio)), \
+                    max(len(portfolio['holdings']), 1), 'holdings'
+            cases.append(('parse_goal_cards_from_response',
+                          {'accounts': account_count, 'json_in_response': with_json}, setup))
+
+    for user_count in users:
+        def setup(user_count=user_count):
+            answers, values = synthetic.quiz_answer_batch(user_count)
+
+            def run():
+                for quiz_answers, value in zip(answers, values):
+                    goal_generator.generate_goals(quiz_answers, value)
+            return run, user_count, 'users'
+        cases.append(('generate_goals', {'users': user_count}, setup))
+
+        def setup(user_count=user_count):
+            answers, values = synthetic.quiz_answer_batch(user_count)
+            return (lambda: goal_generator.generate_goals_batch(answers, values)), user_count, 'users'
+        cases.append(('generate_goals_batch', {'users': user_count, 'numpy': goal_generator.np is not None}, setup))
+
+    return cases
+
+
+def measure(fn, min_time, min_runs):
+    """Time fn until both min_time seconds and min_runs runs have passed; then its peak allocation."""
+    fn()  # Warm up (regex compilation, lazy imports, caches)
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_runs or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def run_benchmarks(only=None, quick=False, min_time=1.0, min_runs=5):
+    """
+    Run the benchmark cases.
+
+    Args:
+        only: Benchmark names to run (None runs all)
+        quick: Smaller input sizes
+        min_time: Seconds to spend timing each case
+        min_runs: Minimum timed runs per case
+
+    Returns:
+        List of result dicts
+    """
+    results = []
+    for name, params, setup in benchmark_cases(quick):
+        if only and name not in only:
+            continue
+        fn, units, unit = setup()
+        timings, peak = measure(fn, min_time, min_runs)
+        median = statistics.median(timings)
+        result = {
+            'benchmark': name,
+            'params': params,
+            'runs': len(timings),
+            'median_s': median,
+            'min_s': min(timings),
+            'mean_s': statistics.fmean(timings),
+            'stdev_s': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            'ops_per_s': 1 / median if median else None,
+            'units': units,
+            'unit': unit,
+            'units_per_s': units / median if median else None,
+            'peak_memory_bytes': peak
+        }
+        results.append(result)
+        print(f"  {name:32s} {json.dumps(params):58s} {median * 1000:10.3f} ms  "
+              f"{result['units_per_s']:14,.0f} {unit}/s  peak {peak / 1024:10,.1f} KiB")
+    return results
+
+
+def environment():
+    """Commit, interpreter and machine the results were recorded on."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': getattr(goal_generator.np, '__version__', None)
+    }
+
+
+def _case_key(result):
+    return result['benchmark'], json.dumps(result['params'], sort_keys=True)
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the median-time ratio of each case against a baseline run.
+
+    Returns:
+        List of (benchmark, params, ratio) for cases slower than threshold
+    """
+    baseline_by_case = {_case_key(result): result for result in baseline['results']}
+    regressions = []
+    print(f"\nCompared with {(baseline.get('environment') or {}).get('commit') or 'baseline'}:")
+    for result in results:
+        before = baseline_by_case.get(_case_key(result))
+        if not before or not before['median_s']:
+            continue
+        ratio = result['median_s'] / before['median_s']
+        flag = '  ⚠ slower' if ratio > threshold else ('  ✓ faster' if ratio < 1 / threshold else '')
+        print(f"  {result['benchmark']:32s} {json.dumps(result['params']):58s} x{ratio:6.2f}{flag}")
+        if ratio > threshold:
+            regressions.append((result['benchmark'], result['params'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark parsing and goal generation on synthetic inputs.')
+    parser.add_argument('--only', action='append', help='Run only this benchmark (repeatable)')
+    parser.add_argument('--quick', action='store_true', help='Smaller input sizes')
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds to time each case (default 1)')
+    parser.add_argument('--min-runs', type=int, default=5, help='Minimum timed runs per case (default 5)')
+    parser.add_argument('--output', help='Results file (default benchmarks/results/<timestamp>-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.10,
+                        help='Slowdown ratio reported as a regression (default 1.10)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any case regressed')
+    args = parser.parse_args(argv)
+
+    env = environment()
+    print(f"Benchmarking {env['commit'] or 'working tree'} on Python {env['python']}")
+    results = run_benchmarks(only=args.only, quick=args.quick, min_time=args.min_time, min_runs=args.min_runs)
+
+    output = args.output
+    if not output:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"{stamp}-{(env['commit'] or 'worktree')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'recorded_at': datetime.now().isoformat(), 'environment': env, 'quick': args.quick,
+                   'results': results}, f, indent=2)
+    print(f"✓ Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
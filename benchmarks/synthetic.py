@@ -0,0 +1,102 @@
+"""
+Synthetic Inputs - Deterministic statements, Textract responses and quiz answers for benchmarks.
+Statement pages mix the bulleted account lines the text parser reads,
+"Key: Value" form fields and "a | b" table rows, so aws_stubs.StubTextractClient
+turns them into LINE, FORMS and TABLES blocks like a real analyze_document call.
+"""
+
+import json
+import random
+
+from aws_stubs import StubTextractClient
+
+
+ACCOUNT_TYPES = ['Roth IRA', 'Traditional IRA', '401(k)', 'Brokerage Account', 'Savings',
+                 'Checking', 'Investment Account', 'Retirement Account']
+HOLDINGS = ['Large Cap Value', 'Small Cap Growth', 'Bonds', 'ETFs', 'Mutual Funds', 'Stocks',
+            'Real Estate', 'Cash']
+
+# Application fields the NIGO rules look at (some pages leave them out)
+APPLICATION_FIELDS = [
+    'SSN: 123-45-6789',
+    'Address: 100 Main Street, Springfield, IL 62701',
+    'Occupation: Registered Nurse',
+    'Date of Birth: 04/12/1961',
+    'Beneficiary Name: Jordan Sample',
+    'Beneficiary Relationship: Child',
+    'Investment Objective: Growth',
+    'Signature: /s/ Sample Client',
+    'Signature Date: 03/01/2024',
+]
+
+QUIZ_CHOICES = {1: ['a', 'b', 'c'], 2: ['a', 'b', 'c', 'd'], 3: ['a', 'b', 'c'], 4: ['a', 'b', 'c', 'd', 'e']}
+
+
+def _amount(rng):
+    return round(rng.uniform(1000, 500000), 2)
+
+
+def statement_page(rng, page_number, accounts):
+    """Text of one statement page with the given number of accounts."""
+    lines = [f'Portfolio Statement - Page {page_number}', 'Client: Sample Client', '']
+    if page_number == 1:
+        lines.extend(field for field in APPLICATION_FIELDS if rng.random() < 0.8)
+        lines.append('')
+
+    rows = []
+    for _ in range(accounts):
+        account_type = rng.choice(ACCOUNT_TYPES)
+        value = _amount(rng)
+        rows.append((account_type, value))
+        lines.append(f'- {account_type}: ${value:,.2f}')
+        lines.append(f"  Holdings: {', '.join(rng.sample(HOLDINGS, 3))}")
+        lines.append('')
+
+    lines.append('Account | Market Value')
+    lines.extend(f'{account_type} | ${value:,.2f}' for account_type, value in rows)
+    lines.append(f'Total | ${sum(value for _, value in rows):,.2f}')
+    lines.append('')
+    lines.append(f'Page Total Value: ${sum(value for _, value in rows):,.2f}')
+    return '\n'.join(lines)
+
+
+def statement_pages(pages=1, accounts_per_page=5, seed=0):
+    """Page texts of a synthetic multi-page statement."""
+    rng = random.Random(seed)
+    return [statement_page(rng, number, accounts_per_page) for number in range(1, pages + 1)]
+
+
+def statement_text(accounts=5, seed=0):
+    """Flattened text of a one-page statement (what the parsers see after OCR)."""
+    return statement_pages(1, accounts, seed)[0]
+
+
+def textract_response(pages=1, accounts_per_page=5, feature_types=('FORMS', 'TABLES'), seed=0):
+    """An analyze_document response (blocks for every page) for a synthetic statement."""
+    client = StubTextractClient(pages=statement_pages(pages, accounts_per_page, seed))
+    return client.analyze_document(Document={'Bytes': b''}, FeatureTypes=list(feature_types) or None)
+
+
+def quiz_answer_batch(users, seed=0):
+    """(quiz answers per user, account value per user) for goal generation."""
+    rng = random.Random(seed)
+    answers, values = [], []
+    for _ in range(users):
+        answers.append([{'question_id': question, 'selected': [rng.choice(choices)]}
+                        for question, choices in QUIZ_CHOICES.items()])
+        values.append(_amount(rng) * rng.choice([1, 2, 5]))
+    return answers, values
+
+
+def goal_summary_text(portfolio_data, with_json=False):
+    """
+    A Bedrock summary for parse_goal_cards_from_response: prose only (the
+    parser falls back to building cards from holdings) or prose with embedded goal_cards JSON.
+    """
+    prose = ('Here is a plain-language summary of the portfolio. The accounts are diversified '
+             'across retirement and taxable savings, with room to put idle cash to work.\n') * 5
+    if not with_json:
+        return prose
+    cards = [{'title': f"Goal for {holding.get('name', 'holding')}", 'current_value': holding.get('value', 0)}
+             for holding in portfolio_data.get('holdings', [])]
+    return prose + json.dumps({'goal_cards': cards}, indent=2) + '\nLet me know if you have questions.'
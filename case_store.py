@@ -0,0 +1,292 @@
+"""
+Case Store - Repository for portfolio cases in backend/data/cases.db.
+Each case row keeps the original columns (case_id, filename, file_path,
+created_at, results_json) plus upload-queue state and columns extracted from
+the result (total_account_value, nigo_status), so endpoints can look a case up
+by id instead of having the client re-send the whole portfolio.
+Results are stored as compact JSON; the OCR text is kept once per distinct
+document in case_texts (zlib, keyed by SHA-256) and referenced from the result.
+Asynchronous Textract jobs are tracked in textract_jobs, so any worker process
+can answer for a job another one submitted.
+SQLite runs in WAL mode with one connection per thread.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from portfolio_codec import compress_text, decompress_text, detach_text, text_digest
+
+
+CASES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cases (
+        case_id TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        results_json TEXT
+    )
+"""
+
+# Columns added to the original table; existing databases are migrated in place
+EXTRA_COLUMNS = {
+    'status': "TEXT NOT NULL DEFAULT 'SUCCEEDED'",
+    'stage': 'TEXT',
+    'progress': 'INTEGER NOT NULL DEFAULT 0',
+    'error': 'TEXT',
+    'updated_at': 'TEXT',
+    'total_account_value': 'REAL',
+    'nigo_status': 'TEXT',
+}
+
+CASE_TEXTS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS case_texts (
+        sha256 TEXT PRIMARY KEY,
+        length INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+"""
+
+TEXTRACT_JOBS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS textract_jobs (
+        job_id TEXT PRIMARY KEY,
+        filename TEXT NOT NULL,
+        status TEXT NOT NULL,
+        textract_job_id TEXT,
+        pages INTEGER,
+        submitted_at TEXT NOT NULL,
+        completed_at TEXT,
+        result_json TEXT,
+        error TEXT
+    )
+"""
+
+# Job states after which a job no longer changes
+FINISHED_JOB_STATUSES = ('SUCCEEDED', 'FAILED')
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_cases_created_at ON cases (created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_cases_status ON cases (status, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_cases_nigo_status ON cases (nigo_status)',
+    'CREATE INDEX IF NOT EXISTS idx_textract_jobs_status ON textract_jobs (status, submitted_at)',
+)
+
+# Columns returned by list() (results_json can be large)
+SUMMARY_COLUMNS = ('case_id', 'filename', 'created_at', 'updated_at', 'status', 'stage', 'progress',
+                   'error', 'total_account_value', 'nigo_status')
+
+
+def extract_case_columns(result):
+    """Pull the indexed summary columns out of a case result dict."""
+    portfolio_data = result.get('portfolio_data') or {}
+    total = result.get('total_account_value')
+    if total is None:
+        total = portfolio_data.get('total_value')
+    return {'total_account_value': total, 'nigo_status': result.get('nigo_status')}
+
+
+def _row_to_case(row):
+    case = dict(row)
+    results_json = case.pop('results_json')
+    case['result'] = json.loads(results_json) if results_json else None
+    return case
+
+
+def _row_to_job(row):
+    job = dict(row)
+    result_json = job.pop('result_json')
+    job['result'] = json.loads(result_json) if result_json else None
+    return job
+
+
+class CaseRepository:
+    """
+    Thread-safe access to the cases table.
+
+    Args:
+        db_path: Path to cases.db
+        busy_timeout: Seconds a writer waits for the database lock
+    """
+
+    def __init__(self, db_path, busy_timeout=10.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        db = self._connection()
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(CASES_SCHEMA)
+        db.execute(CASE_TEXTS_SCHEMA)
+        db.execute(TEXTRACT_JOBS_SCHEMA)
+        existing = {row['name'] for row in db.execute('PRAGMA table_info(cases)')}
+        for column, definition in EXTRA_COLUMNS.items():
+            if column not in existing:
+                db.execute(f'ALTER TABLE cases ADD COLUMN {column} {definition}')
+        for index in INDEXES:
+            db.execute(index)
+        db.commit()
+
+    def _connection(self):
+        """This thread's connection (opened on first use)."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+            db.row_factory = sqlite3.Row
+            db.execute('PRAGMA synchronous=NORMAL')  # Safe with WAL, far fewer fsyncs
+            self._local.db = db
+            with self._connections_lock:
+                self._connections.append(db)
+        return db
+
+    def _write(self, sql, params=()):
+        db = self._connection()
+        with db:
+            return db.execute(sql, params).rowcount
+
+    def create(self, case_id, filename, file_path, status='QUEUED', stage='queued'):
+        """Insert a new case."""
+        now = datetime.now().isoformat()
+        self._write(
+            """INSERT INTO cases (case_id, filename, file_path, created_at, status, stage, progress, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, 0, ?)""",
+            (case_id, filename, file_path, now, status, stage, now)
+        )
+
+    def get(self, case_id):
+        """Return a case dict (with the parsed result under 'result'), or None."""
+        row = self._connection().execute('SELECT * FROM cases WHERE case_id = ?', (case_id,)).fetchone()
+        return _row_to_case(row) if row is not None else None
+
+    def get_many(self, case_ids):
+        """Cases for a list of ids in one query; returns {case_id: case} (unknown ids are absent)."""
+        cases = {}
+        ids = list(dict.fromkeys(case_ids))
+        for start in range(0, len(ids), 500):  # Stay under SQLite's bound-parameter limit
+            chunk = ids[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT * FROM cases WHERE case_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            for row in rows:
+                cases[row['case_id']] = _row_to_case(row)
+        return cases
+
+    def update(self, case_id, **fields):
+        """Set columns on a case; returns True if it exists."""
+        fields['updated_at'] = datetime.now().isoformat()
+        assignments = ', '.join(f'{column} = ?' for column in fields)
+        return self._write(
+            f'UPDATE cases SET {assignments} WHERE case_id = ?', (*fields.values(), case_id)
+        ) > 0
+
+    def save_result(self, case_id, result, status='SUCCEEDED'):
+        """Store a finished result (OCR text split out) and its extracted columns."""
+        portfolio_data, text = detach_text(result.get('portfolio_data'))
+        if text is not None:
+            result = dict(result, portfolio_data=portfolio_data)
+            self.put_text(text)
+        return self.update(
+            case_id, status=status, stage='complete', progress=100, error=None,
+            results_json=json.dumps(result, separators=(',', ':')), **extract_case_columns(result)
+        )
+
+    def put_text(self, text):
+        """Store an OCR text once under its SHA-256; returns the digest."""
+        digest = text_digest(text)
+        self._write(
+            'INSERT OR IGNORE INTO case_texts (sha256, length, data) VALUES (?, ?, ?)',
+            (digest, len(text), compress_text(text))
+        )
+        return digest
+
+    def get_text(self, sha256):
+        """The OCR text stored under a digest, or None."""
+        row = self._connection().execute('SELECT data FROM case_texts WHERE sha256 = ?', (sha256,)).fetchone()
+        return decompress_text(row[0]) if row else None
+
+    def claim(self, case_id, from_status='QUEUED', to_status='RUNNING'):
+        """Atomically move a case between statuses; False if someone else got there first."""
+        return self._write(
+            'UPDATE cases SET status = ?, stage = ?, updated_at = ? WHERE case_id = ? AND status = ?',
+            (to_status, 'starting', datetime.now().isoformat(), case_id, from_status)
+        ) > 0
+
+    def requeue_stale(self, older_than):
+        """
+        Mark RUNNING cases not updated since older_than (ISO timestamp) as QUEUED again.
+        Only cases with a stored document can be re-run (not ?async=true Textract job cases).
+        """
+        return self._write(
+            """UPDATE cases SET status = 'QUEUED', stage = 'queued'
+               WHERE status = 'RUNNING' AND updated_at < ? AND file_path != ''""",
+            (older_than,)
+        )
+
+    def ids_with_status(self, status):
+        """Case ids with a status, oldest first."""
+        return [row[0] for row in self._connection().execute(
+            'SELECT case_id FROM cases WHERE status = ? ORDER BY created_at', (status,)
+        )]
+
+    def list(self, limit=50, offset=0, status=None):
+        """Most recent cases (summary columns only), newest first."""
+        sql = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM cases"
+        params = []
+        if status:
+            sql += ' WHERE status = ?'
+            params.append(status)
+        sql += ' ORDER BY created_at DESC LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def counts_by_status(self):
+        """Number of cases per status."""
+        return {row[0]: row[1] for row in self._connection().execute(
+            'SELECT status, COUNT(*) FROM cases GROUP BY status'
+        )}
+
+    def create_job(self, job_id, filename, status='QUEUED'):
+        """Record a new asynchronous Textract job."""
+        self._write(
+            'INSERT INTO textract_jobs (job_id, filename, status, submitted_at) VALUES (?, ?, ?, ?)',
+            (job_id, filename, status, datetime.now().isoformat())
+        )
+
+    def get_job(self, job_id):
+        """Return a job dict (with the parsed result under 'result'), or None."""
+        row = self._connection().execute('SELECT * FROM textract_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def update_job(self, job_id, **fields):
+        """Set columns on a job ('result' is stored as JSON); returns True if it exists."""
+        if 'result' in fields:
+            result = fields.pop('result')
+            fields['result_json'] = json.dumps(result, separators=(',', ':')) if result is not None else None
+        assignments = ', '.join(f'{column} = ?' for column in fields)
+        return self._write(
+            f'UPDATE textract_jobs SET {assignments} WHERE job_id = ?', (*fields.values(), job_id)
+        ) > 0
+
+    def prune_jobs(self, keep):
+        """Delete the oldest finished jobs beyond the newest `keep`; returns the number deleted."""
+        statuses = ', '.join('?' * len(FINISHED_JOB_STATUSES))
+        return self._write(
+            f"""DELETE FROM textract_jobs WHERE job_id IN (
+                   SELECT job_id FROM textract_jobs WHERE status IN ({statuses})
+                   ORDER BY submitted_at DESC LIMIT -1 OFFSET ?)""",
+            (*FINISHED_JOB_STATUSES, keep)
+        )
+
+    def close(self):
+        """Close every thread's connection."""
+        with self._connections_lock:
+            for db in self._connections:
+                try:
+                    db.close()
+                except sqlite3.ProgrammingError:
+                    pass  # Owned by another thread; it goes away with the thread
+            self._connections = []
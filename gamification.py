@@ -0,0 +1,416 @@
+"""
+Gamification - Points, levels, badges and a leaderboard for completed goals.
+Reads are served from memory: per-user stats in a dict and the leaderboard in
+an indexable skip list, so point updates and rank lookups are O(log n) and the
+progress widget never touches the database. SQLite is the source of truth:
+completions are written behind on a background thread, each one applied to
+the stored user row in the same transaction, so several processes (gunicorn
+workers) sharing the file never overwrite each other's points. The same
+thread reloads users that other processes have completed goals for.
+"""
+
+import bisect
+import json
+import os
+import random
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+
+# (points needed, level name); level_number is the 1-based position
+LEVELS = (
+    (0, 'Newcomer'),
+    (5, 'Explorer'),
+    (100, 'Planner'),
+    (250, 'Steward'),
+    (500, 'Guardian'),
+    (1000, 'Legacy Builder'),
+)
+LEVEL_THRESHOLDS = tuple(points for points, _ in LEVELS)
+
+# goals completed -> badge
+GOAL_BADGES = {
+    1: '🎯 First Goal',
+    5: '🏅 Five Goals',
+    10: '🏆 Ten Goals',
+    25: '🌟 Twenty-Five Goals',
+}
+
+
+def level_for(points):
+    """(level_number, level name, points needed for the next level or None at the top)."""
+    index = bisect.bisect_right(LEVEL_THRESHOLDS, points) - 1
+    next_points = LEVEL_THRESHOLDS[index + 1] if index + 1 < len(LEVELS) else None
+    return index + 1, LEVELS[index][1], next_points
+
+
+class IndexedSkipList:
+    """
+    Sorted set of comparable keys with O(log n) insert, remove and rank.
+    Each forward link records how many elements it skips, so the position of a
+    key (and the key at a position) is found on the way down.
+    """
+
+    MAX_LEVEL = 32
+
+    def __init__(self, seed=None):
+        self._random = random.Random(seed)
+        self._head = [None, [None] * self.MAX_LEVEL, [1] * self.MAX_LEVEL]  # [key, next, width]
+        self._level = 1
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _path(self, key):
+        """Rightmost node before key on every level, and its position."""
+        update = [None] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node, position = self._head, 0
+        for level in reversed(range(self._level)):
+            while node[1][level] is not None and node[1][level][0] < key:
+                position += node[2][level]
+                node = node[1][level]
+            update[level] = node
+            positions[level] = position
+        return update, positions
+
+    def insert(self, key):
+        """Add a key (keys must be unique)."""
+        update, positions = self._path(key)
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                update[i] = self._head
+                positions[i] = 0
+                self._head[2][i] = self._size + 1
+            self._level = level
+
+        node = [key, [None] * level, [0] * level]
+        position = positions[0] + 1  # 1-based position of the new node
+        for i in range(level):
+            prev = update[i]
+            node[1][i] = prev[1][i]
+            prev[1][i] = node
+            skipped = position - positions[i]  # Distance from prev to the new node
+            node[2][i] = prev[2][i] - skipped + 1
+            prev[2][i] = skipped
+        for i in range(level, self._level):
+            update[i][2][i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """Remove a key; returns False if it was not present."""
+        update, _ = self._path(key)
+        node = update[0][1][0]
+        if node is None or node[0] != key:
+            return False
+        for i in range(self._level):
+            if update[i][1][i] is node:
+                update[i][2][i] += node[2][i] - 1
+                update[i][1][i] = node[1][i]
+            else:
+                update[i][2][i] -= 1
+        while self._level > 1 and self._head[1][self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+        return True
+
+    def rank(self, key):
+        """Number of keys less than key."""
+        _, positions = self._path(key)
+        return positions[0]
+
+    def slice(self, start, count):
+        """Up to count keys starting at 0-based position start."""
+        node, position = self._head, 0
+        target = start + 1
+        for level in reversed(range(self._level)):
+            while node[1][level] is not None and position + node[2][level] <= target:
+                position += node[2][level]
+                node = node[1][level]
+        keys = []
+        if position != target:
+            return keys
+        while node is not None and len(keys) < count:
+            keys.append(node[0])
+            node = node[1][0]
+        return keys
+
+
+class UserStats:
+    """Gamification state of one user."""
+
+    __slots__ = ('user_id', 'total_points', 'goals_completed', 'completed_goal_ids', 'badges',
+                 'streak_days', 'last_active')
+
+    def __init__(self, user_id, total_points=0, goals_completed=0, completed_goal_ids=None, badges=None,
+                 streak_days=0, last_active=None):
+        self.user_id = user_id
+        self.total_points = total_points
+        self.goals_completed = goals_completed
+        self.completed_goal_ids = set(completed_goal_ids or ())
+        self.badges = list(badges or ())
+        self.streak_days = streak_days
+        self.last_active = last_active
+
+    def leaderboard_key(self):
+        # Most points first; ties ordered by user id
+        return (-self.total_points, self.user_id)
+
+    def record_completion(self, goal_id, points, day):
+        """Apply a completed goal completed on day; returns the badges it earned."""
+        self.total_points += points
+        self.goals_completed += 1
+        self.completed_goal_ids.add(goal_id)
+        last_active = date.fromisoformat(self.last_active) if self.last_active else None
+        if last_active is None or day > last_active:
+            self.streak_days = self.streak_days + 1 if last_active == day - timedelta(days=1) else 1
+            self.last_active = day.isoformat()
+        new_badges = [GOAL_BADGES[self.goals_completed]] if self.goals_completed in GOAL_BADGES else []
+        self.badges.extend(new_badges)
+        return new_badges
+
+
+class GamificationStore:
+    """
+    In-memory gamification state with write-behind persistence.
+
+    Args:
+        db_path: SQLite file the state is loaded from and written behind to
+        flush_interval: Seconds between background writes of new completions
+            (and reloads of users changed by other processes)
+    """
+
+    def __init__(self, db_path, flush_interval=2.0):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._users = {}
+        self._leaderboard = IndexedSkipList()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One writer on the SQLite connection at a time
+        self._new_completions = []
+        self._seen_rowid = 0  # Last goal_completions row reflected in memory
+        self._stale = set()  # Users changed elsewhere but with completions of ours still pending
+        self._stats = {'flushes': 0, 'flush_failures': 0, 'rows_written': 0, 'users_reloaded': 0}
+        self._stop = threading.Event()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS gamification_users (
+                user_id TEXT PRIMARY KEY,
+                total_points INTEGER NOT NULL,
+                goals_completed INTEGER NOT NULL,
+                badges_json TEXT NOT NULL,
+                streak_days INTEGER NOT NULL,
+                last_active TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS goal_completions (
+                user_id TEXT NOT NULL,
+                goal_id TEXT NOT NULL,
+                points INTEGER NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (user_id, goal_id)
+            )
+        """)
+        self._db.commit()
+        self._load()
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='gamification-write-behind', daemon=True)
+        self._flusher.start()
+
+    def _load(self):
+        self._seen_rowid = self._db.execute('SELECT COALESCE(MAX(rowid), 0) FROM goal_completions').fetchone()[0]
+        for user in self._read_users().values():
+            self._users[user.user_id] = user
+            self._leaderboard.insert(user.leaderboard_key())
+
+    def _read_users(self, user_ids=None):
+        """Stored users (all, or just user_ids) with their completed goals, by user id."""
+        where, params = '', ()
+        if user_ids is not None:
+            params = tuple(user_ids)
+            where = f" WHERE user_id IN ({', '.join('?' * len(params))})"
+        completed = {}
+        for user_id, goal_id in self._db.execute('SELECT user_id, goal_id FROM goal_completions' + where, params):
+            completed.setdefault(user_id, []).append(goal_id)
+        return {
+            row[0]: UserStats(row[0], row[1], row[2], completed.get(row[0]), json.loads(row[3]), row[4], row[5])
+            for row in self._db.execute(
+                'SELECT user_id, total_points, goals_completed, badges_json, streak_days, last_active '
+                'FROM gamification_users' + where, params
+            )
+        }
+
+    def complete_goal(self, user_id, goal_id, points):
+        """
+        Award points for a completed goal (once per user and goal).
+
+        Returns:
+            Dict with points_awarded, already_completed, new_badges, leveled_up and the user's progress
+        """
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is None:
+                user = UserStats(user_id)
+                self._users[user_id] = user
+                self._leaderboard.insert(user.leaderboard_key())
+
+            if goal_id in user.completed_goal_ids:
+                return {'points_awarded': 0, 'already_completed': True, 'new_badges': [],
+                        'leveled_up': False, 'progress': self._progress(user)}
+
+            level_before = level_for(user.total_points)[0]
+            self._leaderboard.remove(user.leaderboard_key())
+            new_badges = user.record_completion(goal_id, points, date.today())
+            self._leaderboard.insert(user.leaderboard_key())
+
+            self._new_completions.append((user_id, goal_id, points, datetime.now().isoformat()))
+            return {'points_awarded': points, 'already_completed': False, 'new_badges': new_badges,
+                    'leveled_up': level_for(user.total_points)[0] > level_before,
+                    'progress': self._progress(user)}
+
+    def progress(self, user_id):
+        """A user's stats and leaderboard position (a user with no activity is a Newcomer)."""
+        with self._lock:
+            return self._progress(self._users.get(user_id) or UserStats(user_id))
+
+    def _progress(self, user):
+        level_number, level_name, next_level_points = level_for(user.total_points)
+        ranked = user.user_id in self._users
+        return {
+            'stats': {
+                'total_points': user.total_points,
+                'current_level': level_name,
+                'level_number': level_number,
+                'badges_earned': list(user.badges),
+                'goals_completed': user.goals_completed,
+                'goals_in_progress': 0,
+                'streak_days': user.streak_days,
+                'next_level_points': next_level_points
+            },
+            # Competition ranking: 1 + users with strictly more points
+            'leaderboard_position': self._leaderboard.rank((-user.total_points, '')) + 1 if ranked else None,
+            'leaderboard_size': len(self._leaderboard)
+        }
+
+    def leaderboard(self, limit=10, offset=0):
+        """Users by points, highest first."""
+        with self._lock:
+            entries = []
+            for points, user_id in self._leaderboard.slice(offset, limit):
+                entries.append({
+                    'user_id': user_id,
+                    'total_points': -points,
+                    'level': level_for(-points)[1],
+                    'position': self._leaderboard.rank((points, '')) + 1
+                })
+            return entries
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+            self.refresh()
+
+    def flush(self):
+        """Write new completions to SQLite."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            completions, self._new_completions = self._new_completions, []
+        if not completions:
+            return
+        written = 0
+        try:
+            with self._db:
+                for user_id, goal_id, points, completed_at in completions:
+                    if not self._db.execute(
+                        'INSERT OR IGNORE INTO goal_completions (user_id, goal_id, points, completed_at) VALUES (?, ?, ?, ?)',
+                        (user_id, goal_id, points, completed_at)
+                    ).rowcount:
+                        continue  # Another process recorded this goal first; refresh() corrects our copy
+                    # The insert took SQLite's write lock, so no other process can change
+                    # this user's row until we commit: read, apply and write it back
+                    row = self._db.execute(
+                        'SELECT total_points, goals_completed, badges_json, streak_days, last_active '
+                        'FROM gamification_users WHERE user_id = ?', (user_id,)
+                    ).fetchone()
+                    user = UserStats(user_id, row[0], row[1], None, json.loads(row[2]), row[3], row[4]) if row else UserStats(user_id)
+                    user.record_completion(goal_id, points, date.fromisoformat(completed_at[:10]))
+                    self._db.execute(
+                        """INSERT OR REPLACE INTO gamification_users
+                           (user_id, total_points, goals_completed, badges_json, streak_days, last_active, updated_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                        (user_id, user.total_points, user.goals_completed, json.dumps(user.badges),
+                         user.streak_days, user.last_active, datetime.now().isoformat())
+                    )
+                    written += 2
+            self._stats['flushes'] += 1
+            self._stats['rows_written'] += written
+        except sqlite3.Error as e:
+            print(f"Warning: Gamification write-behind failed, will retry: {e}")
+            self._stats['flush_failures'] += 1
+            with self._lock:
+                self._new_completions[:0] = completions
+
+    def refresh(self):
+        """
+        Reload users whose goals were completed since the last refresh, by this
+        process or another one sharing the database, so every process converges
+        on the stored points, badges and streaks.
+        """
+        with self._flush_lock:
+            try:
+                rows = self._db.execute(
+                    'SELECT rowid, user_id FROM goal_completions WHERE rowid > ? ORDER BY rowid', (self._seen_rowid,)
+                ).fetchall()
+                user_ids = self._stale | {user_id for _, user_id in rows}
+                users = self._read_users(user_ids) if user_ids else {}
+            except sqlite3.Error as e:
+                print(f"Warning: Gamification refresh failed, will retry: {e}")
+                return
+            if rows:
+                self._seen_rowid = rows[-1][0]
+
+            with self._lock:
+                # A user with a completion still queued would lose it from memory until
+                # the next flush; reload them once it has been written instead
+                pending = {completion[0] for completion in self._new_completions}
+                self._stale = user_ids & pending
+                for user_id in user_ids - pending:
+                    user = users.get(user_id)
+                    if user is None:
+                        continue
+                    current = self._users.get(user_id)
+                    if current is not None:
+                        self._leaderboard.remove(current.leaderboard_key())
+                    self._users[user_id] = user
+                    self._leaderboard.insert(user.leaderboard_key())
+                    self._stats['users_reloaded'] += 1
+
+    def stats(self):
+        """User count and write-behind counters, for /health."""
+        with self._lock:
+            pending_users = len({completion[0] for completion in self._new_completions})
+            return dict(self._stats, users=len(self._users), pending_users=pending_users)
+
+    def close(self):
+        """Stop the background writer and flush what is left."""
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+        self._db.close()
@@ -1,8 +1,96 @@
 """
 Goal Generator - Creates personalized goal cards based on quiz answers and account value.
 Uses total_account_value extracted by Textract as the budget.
+Goal types live in a registry with their allocation rule; a BudgetLedger keeps
+the running remaining budget, and generate_goals_batch allocates for many
+users at once with NumPy (falling back to the per-user path without it).
 """
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; batches then run user by user
+    np = None
+
+
+class GoalType:
+    """
+    A registered goal type: how much budget it takes and how its card reads.
+
+    The allocation is either capped at a share of the whole budget
+    (allocated = min(remaining, budget * budget_share), target = budget * budget_share)
+    or a share of what is left (allocated = remaining * remaining_share,
+    target = allocated * target_multiplier).
+
+    Args:
+        key: Goal type id used in selected_goals (e.g. 'pay_off_loans')
+        build_card: Callable(budget, target, allocated, remaining) -> goal card dict,
+            where remaining is the budget left before this goal
+        budget_share: Share of the total budget this goal targets
+        remaining_share: Share of the remaining budget this goal takes
+        target_multiplier: Target as a multiple of the allocation (remaining_share goals)
+    """
+
+    def __init__(self, key, build_card, budget_share=None, remaining_share=None, target_multiplier=1.0):
+        if (budget_share is None) == (remaining_share is None):
+            raise ValueError(f'Goal type {key} needs exactly one of budget_share or remaining_share')
+        self.key = key
+        self.build_card = build_card
+        self.budget_share = budget_share
+        self.remaining_share = remaining_share
+        self.target_multiplier = target_multiplier
+
+    def allocate(self, budget, remaining, minimum=min):
+        """
+        Target and allocated amount for a budget and what is left of it.
+        Works on floats, or elementwise on NumPy arrays with minimum=np.minimum.
+
+        Returns:
+            (target, allocated)
+        """
+        if self.budget_share is not None:
+            target = budget * self.budget_share
+            return target, minimum(remaining, target)
+        allocated = remaining * self.remaining_share
+        return allocated * self.target_multiplier, allocated
+
+
+# Goal type key -> GoalType, in registration order
+GOAL_TYPES = {}
+
+
+def register_goal_type(key, budget_share=None, remaining_share=None, target_multiplier=1.0):
+    """Decorator that registers a card builder as a goal type."""
+    def register(build_card):
+        GOAL_TYPES[key] = GoalType(key, build_card, budget_share=budget_share,
+                                   remaining_share=remaining_share, target_multiplier=target_multiplier)
+        return build_card
+    return register
+
+
+class BudgetLedger:
+    """
+    Running budget shared by the goals generated for one user.
+
+    Args:
+        budget: Total account value being allocated
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.allocated = 0.0
+
+    @property
+    def remaining(self):
+        return self.budget - self.allocated
+
+    def allocate(self, goal_type):
+        """Allocate a goal type from the remaining budget and build its card."""
+        remaining = self.remaining
+        target, allocated = goal_type.allocate(self.budget, remaining)
+        self.allocated += allocated
+        return goal_type.build_card(self.budget, target, allocated, remaining)
+
+
 def generate_goals(quiz_answers, total_account_value, selected_goals=None):
     """
     Generate goal cards based on quiz answers and account value.
@@ -15,42 +103,168 @@ def generate_goals(quiz_answers, total_account_value, selected_goals=None):
     Returns:
         List of goal card dictionaries
     """
-    goal_cards = []
-    
     # Extract selected goals from quiz answers
     if not selected_goals:
         selected_goals = extract_selected_goals(quiz_answers)
-    
-    budget = float(total_account_value) if total_account_value else 0
-    
-    # Process each selected goal
-    for goal_type in selected_goals:
-        if goal_type == 'pay_off_loans':
-            goal_card = generate_loan_payoff_goal(budget, goal_cards)
-            if goal_card:
-                goal_cards.append(goal_card)
-        
-        elif goal_type == 'home_down_payment':
-            goal_card = generate_home_down_payment_goal(budget, goal_cards)
-            if goal_card:
-                goal_cards.append(goal_card)
-        
-        elif goal_type == 'retirement':
-            goal_card = generate_retirement_goal(budget, goal_cards)
-            if goal_card:
-                goal_cards.append(goal_card)
-        
-        elif goal_type == 'emergency_fund':
-            goal_card = generate_emergency_fund_goal(budget, goal_cards)
-            if goal_card:
-                goal_cards.append(goal_card)
-        
-        elif goal_type == 'education':
-            goal_card = generate_education_goal(budget, goal_cards)
-            if goal_card:
-                goal_cards.append(goal_card)
-    
-    return goal_cards
+
+    ledger = BudgetLedger(float(total_account_value) if total_account_value else 0)
+    return [ledger.allocate(GOAL_TYPES[goal_type]) for goal_type in selected_goals if goal_type in GOAL_TYPES]
+
+
+class GoalAllocationBatch:
+    """
+    Allocations for many users, one row per user and one column per goal type.
+
+    Attributes:
+        goal_keys: Column order (registered goal type keys)
+        targets: Target amount per user and goal type (0 where not selected)
+        allocated: Allocated amount per user and goal type
+        remaining: Budget left per user after all goals
+        budgets: Account value per user
+        selected_goals: Goal type keys selected for each user
+    These are NumPy arrays when numpy is installed, nested lists otherwise.
+    """
+
+    def __init__(self, goal_keys, budgets, targets, allocated, remaining, selected_goals):
+        self.goal_keys = goal_keys
+        self.budgets = budgets
+        self.targets = targets
+        self.allocated = allocated
+        self.remaining = remaining
+        self.selected_goals = selected_goals
+
+    def __len__(self):
+        return len(self.selected_goals)
+
+    def cards(self, index):
+        """Goal cards for one user (same output as generate_goals)."""
+        return generate_goals([], self.budgets[index], self.selected_goals[index])
+
+
+def generate_goals_batch(quiz_answers_list, account_values, selected_goals_list=None):
+    """
+    Allocate goals for many users in one pass.
+
+    Users are grouped by their sequence of selected goals (the quiz yields only a
+    handful), and each group is allocated with array arithmetic, one goal type
+    at a time.
+
+    Args:
+        quiz_answers_list: Quiz answers per user
+        account_values: Total account value per user
+        selected_goals_list: Optional selected goal types per user (overrides the quiz)
+
+    Returns:
+        GoalAllocationBatch
+    """
+    selected_goals = [
+        tuple((selected_goals_list[i] if selected_goals_list and selected_goals_list[i] else None)
+              or extract_selected_goals(quiz_answers))
+        for i, quiz_answers in enumerate(quiz_answers_list)
+    ]
+    goal_keys = list(GOAL_TYPES)
+    column = {key: index for index, key in enumerate(goal_keys)}
+
+    if np is None:
+        return _generate_goals_batch_python(goal_keys, column, account_values, selected_goals)
+
+    budgets = np.nan_to_num(np.asarray(account_values, dtype=np.float64))
+    targets = np.zeros((len(budgets), len(goal_keys)))
+    allocated = np.zeros_like(targets)
+    remaining = budgets.copy()
+
+    groups = {}
+    for user, sequence in enumerate(selected_goals):
+        groups.setdefault(sequence, []).append(user)
+
+    for sequence, users in groups.items():
+        users = np.asarray(users)
+        group_budgets = budgets[users]
+        group_remaining = group_budgets.copy()
+        for goal_type in sequence:
+            if goal_type not in GOAL_TYPES:
+                continue
+            target, amount = GOAL_TYPES[goal_type].allocate(group_budgets, group_remaining, minimum=np.minimum)
+            targets[users, column[goal_type]] += target
+            allocated[users, column[goal_type]] += amount
+            group_remaining = group_remaining - amount
+        remaining[users] = group_remaining
+
+    return GoalAllocationBatch(goal_keys, budgets, targets, allocated, remaining, selected_goals)
+
+
+def _generate_goals_batch_python(goal_keys, column, account_values, selected_goals):
+    budgets, targets, allocated, remaining = [], [], [], []
+    for value, sequence in zip(account_values, selected_goals):
+        ledger = BudgetLedger(float(value) if value else 0)
+        user_targets = [0.0] * len(goal_keys)
+        user_allocated = [0.0] * len(goal_keys)
+        for goal_type in sequence:
+            if goal_type not in GOAL_TYPES:
+                continue
+            target, amount = GOAL_TYPES[goal_type].allocate(ledger.budget, ledger.remaining)
+            ledger.allocated += amount
+            user_targets[column[goal_type]] += target
+            user_allocated[column[goal_type]] += amount
+        budgets.append(ledger.budget)
+        targets.append(user_targets)
+        allocated.append(user_allocated)
+        remaining.append(ledger.remaining)
+    return GoalAllocationBatch(goal_keys, budgets, targets, allocated, remaining, selected_goals)
+
+
+def generate_goals_from_portfolio(portfolio_data, total_value):
+    """Generate goal cards from portfolio data."""
+    # This would use the portfolio data to generate relevant goals
+    # For now, return basic goal structure
+    return [
+        {
+            'id': 'goal_1',
+            'title': 'Portfolio Review',
+            'description': 'Review and understand your inherited portfolio',
+            'current_value': total_value,
+            'target_amount': total_value,
+            'timeline': 'Ongoing'
+        }
+    ]
+
+
+def goal_result(case_id, goal_cards, total_account_value):
+    """Response payload for one case's generated goals."""
+    budget_used = sum(g.get('allocated_amount', 0) for g in goal_cards)
+    return {
+        'status': 'success',
+        'case_id': case_id,
+        'total_account_value': total_account_value,
+        'goal_cards': goal_cards,
+        'budget_used': budget_used,
+        'budget_remaining': total_account_value - budget_used
+    }
+
+
+def goal_item_result(item):
+    """
+    Generate goals for one bulk item; runs in a process pool worker.
+    Items with quiz_answers or selected_goals use generate_goals, others
+    generate_goals_from_portfolio.
+
+    Args:
+        item: {'index', 'case_id', 'total_account_value', and 'portfolio_data'
+            or 'quiz_answers'/'selected_goals'}
+
+    Returns:
+        goal_result(...) plus 'index', or {'index', 'case_id', 'status': 'error', 'error'}
+    """
+    try:
+        total_account_value = item['total_account_value']
+        if item.get('quiz_answers') is not None or item.get('selected_goals'):
+            goal_cards = generate_goals(item.get('quiz_answers') or [], total_account_value, item.get('selected_goals'))
+        else:
+            goal_cards = generate_goals_from_portfolio(item.get('portfolio_data') or {}, total_account_value)
+        return {'index': item['index'], **goal_result(item.get('case_id'), goal_cards, total_account_value)}
+    except Exception as e:
+        return {'index': item.get('index'), 'case_id': item.get('case_id'), 'status': 'error',
+                'error': f'Failed to generate goals: {str(e)}'}
 
 
 def extract_selected_goals(quiz_answers):
@@ -83,18 +297,15 @@ def extract_selected_goals(quiz_answers):
     return selected_goals
 
 
-def generate_loan_payoff_goal(budget, existing_goals):
+@register_goal_type('pay_off_loans', budget_share=0.60)  # Assume 60% of account value for loans
+def generate_loan_payoff_goal(budget, target, allocated, remaining):
     """
     Generate loan payoff goal card.
     Logic: If user selects 'Pay off Loans' and has $50k, 
     card MUST say: 'Plan: We found $50,000. We can pay your loans and have $X left over.'
     """
-    # Estimate loan amount (in real app, this would come from user input or financial data)
-    estimated_loan_amount = budget * 0.6  # Assume 60% of account value for loans
-    
-    remaining_budget = budget - sum(g.get('allocated_amount', 0) for g in existing_goals)
-    available_for_loans = min(remaining_budget, estimated_loan_amount)
-    left_over = remaining_budget - available_for_loans
+    # target is the estimated loan amount (in real app, this would come from user input or financial data)
+    left_over = remaining - allocated
     
     return {
         'id': 'goal_loan_payoff',
@@ -105,8 +316,8 @@ def generate_loan_payoff_goal(budget, existing_goals):
         'points_reward': 100,
         'estimated_time': 'Immediate',
         'status': 'not_started',
-        'target_amount': estimated_loan_amount,
-        'allocated_amount': available_for_loans,
+        'target_amount': target,
+        'allocated_amount': allocated,
         'current_progress': 0,
         'steps': [
             'Review outstanding loan balances',
@@ -117,26 +328,23 @@ def generate_loan_payoff_goal(budget, existing_goals):
     }
 
 
-def generate_home_down_payment_goal(budget, existing_goals):
+@register_goal_type('home_down_payment', budget_share=0.20)  # 20% of total value
+def generate_home_down_payment_goal(budget, target, allocated, remaining):
     """
     Generate home down payment goal card.
     Logic: Calculate 20% of total value as suggested 'House Fund'.
     """
-    remaining_budget = budget - sum(g.get('allocated_amount', 0) for g in existing_goals)
-    suggested_down_payment = budget * 0.20  # 20% of total value
-    allocated_amount = min(remaining_budget, suggested_down_payment)
-    
     return {
         'id': 'goal_home_down_payment',
         'title': 'Home Down Payment Fund',
-        'description': f'Plan: We found ${budget:,.2f}. We suggest allocating ${suggested_down_payment:,.2f} (20%) for your home down payment fund.',
+        'description': f'Plan: We found ${budget:,.2f}. We suggest allocating ${target:,.2f} (20%) for your home down payment fund.',
         'category': 'housing',
         'priority': 'high',
         'points_reward': 125,
         'estimated_time': '5-7 years',
         'status': 'not_started',
-        'target_amount': suggested_down_payment,
-        'allocated_amount': allocated_amount,
+        'target_amount': target,
+        'allocated_amount': allocated,
         'current_progress': 0,
         'steps': [
             'Determine target home price',
@@ -147,22 +355,20 @@ def generate_home_down_payment_goal(budget, existing_goals):
     }
 
 
-def generate_retirement_goal(budget, existing_goals):
+@register_goal_type('retirement', remaining_share=0.50, target_multiplier=2)  # 50% for retirement, target is 2x
+def generate_retirement_goal(budget, target, allocated, remaining):
     """Generate retirement goal card."""
-    remaining_budget = budget - sum(g.get('allocated_amount', 0) for g in existing_goals)
-    retirement_allocation = remaining_budget * 0.50  # 50% for retirement
-    
     return {
         'id': 'goal_retirement',
         'title': 'Retirement Savings',
-        'description': f'Plan: We found ${budget:,.2f}. Allocating ${retirement_allocation:,.2f} for long-term retirement planning.',
+        'description': f'Plan: We found ${budget:,.2f}. Allocating ${allocated:,.2f} for long-term retirement planning.',
         'category': 'retirement',
         'priority': 'high',
         'points_reward': 150,
         'estimated_time': 'Long-term (10+ years)',
         'status': 'not_started',
-        'target_amount': retirement_allocation * 2,  # Target is 2x allocation
-        'allocated_amount': retirement_allocation,
+        'target_amount': target,
+        'allocated_amount': allocated,
         'current_progress': 0,
         'steps': [
             'Maximize IRA contributions',
@@ -173,23 +379,20 @@ def generate_retirement_goal(budget, existing_goals):
     }
 
 
-def generate_emergency_fund_goal(budget, existing_goals):
+@register_goal_type('emergency_fund', budget_share=0.10)  # 10% for emergency fund
+def generate_emergency_fund_goal(budget, target, allocated, remaining):
     """Generate emergency fund goal card."""
-    remaining_budget = budget - sum(g.get('allocated_amount', 0) for g in existing_goals)
-    emergency_target = budget * 0.10  # 10% for emergency fund
-    allocated_amount = min(remaining_budget, emergency_target)
-    
     return {
         'id': 'goal_emergency_fund',
         'title': 'Emergency Fund',
-        'description': f'Plan: We found ${budget:,.2f}. Setting aside ${allocated_amount:,.2f} for emergency expenses (3-6 months expenses).',
+        'description': f'Plan: We found ${budget:,.2f}. Setting aside ${allocated:,.2f} for emergency expenses (3-6 months expenses).',
         'category': 'safety',
         'priority': 'high',
         'points_reward': 75,
         'estimated_time': 'Immediate',
         'status': 'not_started',
-        'target_amount': emergency_target,
-        'allocated_amount': allocated_amount,
+        'target_amount': target,
+        'allocated_amount': allocated,
         'current_progress': 0,
         'steps': [
             'Calculate 3-6 months expenses',
@@ -200,22 +403,20 @@ def generate_emergency_fund_goal(budget, existing_goals):
     }
 
 
-def generate_education_goal(budget, existing_goals):
+@register_goal_type('education', remaining_share=0.15, target_multiplier=1.5)  # 15% for education
+def generate_education_goal(budget, target, allocated, remaining):
     """Generate education goal card."""
-    remaining_budget = budget - sum(g.get('allocated_amount', 0) for g in existing_goals)
-    education_allocation = remaining_budget * 0.15  # 15% for education
-    
     return {
         'id': 'goal_education',
         'title': 'Education Fund',
-        'description': f'Plan: We found ${budget:,.2f}. Allocating ${education_allocation:,.2f} for education expenses (529 plan or similar).',
+        'description': f'Plan: We found ${budget:,.2f}. Allocating ${allocated:,.2f} for education expenses (529 plan or similar).',
         'category': 'education',
         'priority': 'medium',
         'points_reward': 100,
         'estimated_time': '5-15 years',
         'status': 'not_started',
-        'target_amount': education_allocation * 1.5,
-        'allocated_amount': education_allocation,
+        'target_amount': target,
+        'allocated_amount': allocated,
         'current_progress': 0,
         'steps': [
             'Research 529 plan options',
@@ -0,0 +1,32 @@
+"""
+Gunicorn Config - Forking production server with AWS model preloading.
+The master loads the botocore models once (aws_clients.preload) before forking,
+so every worker inherits them and creates its clients in milliseconds. The app
+itself is still imported per worker: its background threads (upload queue,
+write-behind flush, rule pack watcher) must start in the process that uses them.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:application
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+import aws_clients
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+preload_app = False
+
+
+def on_starting(server):
+    """Load the AWS service models in the master (AWS_PRELOAD=False skips it)."""
+    if os.getenv('DEMO_MODE', 'True').lower() == 'true' or os.getenv('AWS_PRELOAD', 'True').lower() != 'true':
+        return
+    timings = aws_clients.preload(region_name=os.getenv('AWS_REGION', 'us-east-1'))
+    print(f"✓ Preloaded AWS models for {', '.join(timings)} in {sum(timings.values()):.2f}s")
@@ -0,0 +1,304 @@
+"""
+Metrics - Latency histograms and counters with a Prometheus text exposition.
+Request middleware, spans around our own parsing stages and a timing proxy
+around the AWS clients all feed one registry, so /metrics shows whether a slow
+upload is spent in Textract/Bedrock/S3 or in our code.
+Histograms use fixed buckets; p50/p95/p99 are interpolated from them.
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return [{'labels': dict(key), 'value': value} for key, value in self._values.items()]
+
+
+class Gauge:
+    """Last value set per label set."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return [{'labels': dict(key), 'value': value} for key, value in self._values.items()]
+
+
+class Histogram:
+    """Bucketed distribution (count, sum, bucket counts) per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def _quantile(self, counts, total, q):
+        """Linear interpolation inside the bucket holding the q-th observation."""
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index >= len(self.buckets):
+                    return lower  # Above the last bucket; report its bound
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return 0.0
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        samples = []
+        for key, values in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values[:-1]):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', key + (('le', str(bound)),), cumulative))
+            samples.append((f'{self.name}_sum', key, values[-1]))
+            samples.append((f'{self.name}_count', key, cumulative))
+        return samples
+
+    def snapshot(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        snapshot = []
+        for key, values in series.items():
+            counts, total_sum = values[:-1], values[-1]
+            count = sum(counts)
+            entry = {'labels': dict(key), 'count': count, 'sum': round(total_sum, 6),
+                     'avg': round(total_sum / count, 6) if count else 0.0}
+            for q in QUANTILES:
+                entry[f'p{int(q * 100)}'] = round(self._quantile(counts, count, q), 6)
+            snapshot.append(entry)
+        return snapshot
+
+
+class MetricsRegistry:
+    """Named metrics, rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text=''):
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name, help_text=''):
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=LATENCY_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, label_key, value in metric.samples():
+                lines.append(f'{name}{_format_labels(label_key)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """JSON-friendly view, with p50/p95/p99 for histograms."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {metric.name: {'type': metric.kind, 'series': metric.snapshot()} for metric in metrics}
+
+
+# Process-wide registry used by app.py and the helpers below
+registry = MetricsRegistry()
+
+span_seconds = registry.histogram('span_duration_seconds', 'Time spent in instrumented stages of our own code')
+aws_call_seconds = registry.histogram('aws_call_duration_seconds', 'AWS API call latency by service and operation')
+cache_lookups = registry.counter('cache_lookups_total', 'Cache lookups by cache and result (hit/miss)')
+http_request_seconds = registry.histogram('http_request_duration_seconds', 'Request latency by endpoint, method and status')
+http_request_bytes = registry.histogram('http_request_size_bytes', 'Request body size by endpoint', buckets=SIZE_BUCKETS)
+http_response_bytes = registry.histogram('http_response_size_bytes', 'Response body size (after compression) by endpoint',
+                                         buckets=SIZE_BUCKETS)
+startup_seconds = registry.gauge('startup_phase_seconds', 'Seconds spent in each cold-start phase (imports, setup, warm-up)')
+aws_client_init_seconds = registry.gauge('aws_client_init_seconds', 'Seconds spent creating each AWS client')
+
+
+@contextmanager
+def span(name):
+    """Time a block into span_duration_seconds{span=name}; failures are labelled outcome=error."""
+    start = time.perf_counter()
+    outcome = 'ok'
+    try:
+        yield
+    except BaseException:
+        outcome = 'error'
+        raise
+    finally:
+        span_seconds.observe(time.perf_counter() - start, span=name, outcome=outcome)
+
+
+@contextmanager
+def startup_phase(name):
+    """Time a block of startup work into startup_phase_seconds{phase=name}."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_seconds.set(time.perf_counter() - start, phase=name)
+
+
+def startup_report():
+    """{phase: seconds} for /health."""
+    return {sample['labels']['phase']: round(sample['value'], 4) for sample in startup_seconds.snapshot()}
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_cache_lookup(cache, hit):
+    cache_lookups.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+class InstrumentedClient:
+    """
+    Proxy around a boto3 (or stub) client that times every API call into
+    aws_call_duration_seconds{service, operation, outcome}.
+    aiobotocore clients work too: calls returning an awaitable are timed until it completes.
+
+    Args:
+        client: Client to wrap
+        service: Service label (e.g. 'textract')
+    """
+
+    def __init__(self, client, service):
+        self._client = client
+        self._service = service
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception:
+                self._observe(name, start, 'error')
+                raise
+            if inspect.isawaitable(result):
+                return self._observe_awaited(name, start, result)
+            self._observe(name, start, 'ok')
+            return result
+        return call
+
+    def _observe(self, operation, start, outcome):
+        aws_call_seconds.observe(time.perf_counter() - start, service=self._service,
+                                 operation=operation, outcome=outcome)
+
+    async def _observe_awaited(self, operation, start, awaitable):
+        outcome = 'ok'
+        try:
+            return await awaitable
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self._observe(operation, start, outcome)
+
+
+def instrument_client(client, service):
+    """Wrap a client in InstrumentedClient (None stays None)."""
+    return InstrumentedClient(client, service) if client is not None else None
@@ -0,0 +1,422 @@
+"""
+NIGO Rule Engine - Compiles LPL compliance rules into a single-pass matcher.
+Rules are loaded from a declarative rule pack (context/lpl_compliance_rules.json),
+compiled once, and hot-reloaded when the file changes.
+Every term used by the Echo agent is folded into one trie-shaped regular
+expression so a document is scanned once instead of once per rule.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+# Declarative rule pack (builds on lpl_compliance_rules.txt)
+DEFAULT_RULE_PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'context', 'lpl_compliance_rules.json')
+
+# A signal is a list of lowercase substrings ("terms"), a regex ("pattern"),
+# or a check derived from other matches ("sparse_context", "stale_date").
+SIGNAL_KINDS = ('terms', 'pattern', 'sparse_context', 'stale_date')
+
+
+def _required_field(field_key, signal, severity):
+    """Expand a legacy required-field entry into a full rule."""
+    message = f'Required field "{field_key}" not found in document.'
+    if severity == 'high':
+        message += ' This is a NIGO error that will delay account opening.'
+    return {
+        'id': f'required_field:{signal}',
+        'group': 'required_fields',
+        'unless': [signal],
+        'error': {
+            'type': 'missing_field',
+            'field': field_key,
+            'severity': severity,
+            'priority': severity.upper(),
+            'message': message,
+            'confidence': severity
+        }
+    }
+
+
+def _trie_regex(terms):
+    """
+    Build a regex alternation shaped like a prefix trie.
+    Shared prefixes are matched once and the longest term at a position wins.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and '' not in node:
+            return alternatives[0]
+        body = '(?:' + '|'.join(alternatives) + ')'
+        return body + '?' if '' in node else body
+
+    return build(trie)
+
+
+class CompiledRuleSet:
+    """
+    A set of NIGO rules compiled into one scanning automaton.
+
+    Every term referenced by any rule is merged into a single trie-shaped
+    regex, so ``evaluate`` walks the document once for all term checks
+    instead of once per term. Patterns (SSN, dates) are compiled once and
+    stop at their first useful match.
+
+    Rules fire when every signal in "when" is present and none in "unless" is.
+    Errors are reported in rule order; a later rule that reports the same
+    (type, field) as an earlier one is treated as a duplicate and dropped.
+    """
+
+    def __init__(self, signals, rules, version='unversioned', checksum=None, source=None):
+        self.signals = signals
+        self.rules = [_required_field(r['required_field'], r['signal'], r['severity'])
+                      if 'required_field' in r else r for r in rules]
+        self.version = version
+        self.checksum = checksum
+        self.source = source
+        self.loaded_at = datetime.now().isoformat()
+        self.total_checks = sum(1 for rule in self.rules if rule.get('group') == 'required_fields')
+        self._validate()
+
+        terms = sorted({
+            term.lower()
+            for signal in signals.values()
+            for term in signal.get('terms', []) + signal.get('sparse_context', [])
+        })
+
+        # A matched term implies every term it contains (e.g. "signature of"
+        # implies "signature"), at the offset of its first occurrence.
+        self._implied = {
+            outer: [(inner, outer.find(inner)) for inner in terms if inner in outer]
+            for outer in terms
+        }
+        # finditer consumes each match, so a term that starts inside a match
+        # and runs past its end (e.g. "signed" + "dob") must be checked by hand.
+        self._straddling = {
+            outer: [
+                (offset, inner)
+                for offset in range(1, len(outer))
+                for inner in terms
+                if len(inner) > len(outer) - offset and inner.startswith(outer[offset:])
+            ]
+            for outer in terms
+        }
+        self._scanner = re.compile(_trie_regex(terms)) if terms else None
+        self._patterns = {
+            name: re.compile(signal['pattern'])
+            for name, signal in signals.items() if 'pattern' in signal
+        }
+
+    def __reduce__(self):
+        # Sent to pool workers as the pack data, not the compiled regexes; a
+        # worker compiles each checksum once (see _compiled_rule_set)
+        return _compiled_rule_set, (self.signals, self.rules, self.version, self.checksum, self.source)
+
+    def _validate(self):
+        """Raise ValueError if the pack references unknown signals or is malformed."""
+        for name, signal in self.signals.items():
+            kinds = [kind for kind in SIGNAL_KINDS if kind in signal]
+            if len(kinds) != 1:
+                raise ValueError(f'Signal "{name}" must define exactly one of {", ".join(SIGNAL_KINDS)}')
+            if 'stale_date' in signal and signal['stale_date'] not in self.signals:
+                raise ValueError(f'Signal "{name}" refers to unknown signal "{signal["stale_date"]}"')
+        for rule in self.rules:
+            if 'error' not in rule:
+                raise ValueError(f'Rule "{rule.get("id", "?")}" has no error')
+            for name in rule.get('when', []) + rule.get('unless', []):
+                if name not in self.signals:
+                    raise ValueError(f'Rule "{rule.get("id", "?")}" refers to unknown signal "{name}"')
+
+    def describe(self):
+        """Summary of the loaded rule pack for health checks."""
+        return {
+            'version': self.version,
+            'checksum': self.checksum,
+            'source': self.source,
+            'loaded_at': self.loaded_at,
+            'rules': len(self.rules),
+            'signals': len(self.signals)
+        }
+
+    def scan(self, text_lower):
+        """Walk the text once and return the first position of every term found."""
+        first_seen = {}
+        if self._scanner is None:
+            return first_seen
+
+        implied = self._implied
+        straddling = self._straddling
+
+        def record(term, start):
+            for inner, offset in implied[term]:
+                position = start + offset
+                if position < first_seen.get(inner, position + 1):
+                    first_seen[inner] = position
+
+        for match in self._scanner.finditer(text_lower):
+            term, start = match.group(), match.start()
+            record(term, start)
+            for offset, inner in straddling[term]:
+                if text_lower.startswith(inner, start + offset):
+                    record(inner, start + offset)
+        return first_seen
+
+    def evaluate(self, extracted_text):
+        """Run every rule against the text and return the de-duplicated error list."""
+        text_lower = extracted_text.lower()
+        values = _SignalValues(self, text_lower, self.scan(text_lower))
+
+        errors = []
+        reported = set()
+        for rule in self.rules:
+            if not all(values[name] for name in rule.get('when', [])):
+                continue
+            if any(values[name] for name in rule.get('unless', [])):
+                continue
+            error = dict(rule['error'])
+            key = (error['type'], error.get('field'))
+            if key in reported:
+                continue
+            reported.add(key)
+            error['message'] = error['message'].format_map(values)
+            errors.append(error)
+        return errors
+
+    def signal_value(self, name, text_lower, first_seen, values):
+        """Resolve one signal to a truthy value (present) or a falsy one."""
+        signal = self.signals[name]
+        if 'terms' in signal:
+            return any(term.lower() in first_seen for term in signal['terms'])
+        if 'pattern' in signal:
+            return self._patterns[name].search(text_lower) is not None
+        if 'sparse_context' in signal:
+            return self._has_sparse_context(text_lower, first_seen, signal)
+        if 'stale_date' in signal:
+            source = signal['stale_date']
+            if not values[source]:
+                return None
+            dates = (m.group() for m in self._patterns[source].finditer(text_lower))
+            return self._first_stale_date(dates, signal)
+        return False
+
+    @staticmethod
+    def _has_sparse_context(text_lower, first_seen, signal):
+        """True if a term's first occurrence has too few surrounding words to be specific."""
+        window = signal.get('window', 50)
+        for term in signal['sparse_context']:
+            index = first_seen.get(term.lower())
+            if index is None:
+                continue
+            context = text_lower[max(0, index - window):index + window]
+            if len(context.split()) < signal.get('max_words', 10):
+                return True
+        return False
+
+    @staticmethod
+    def _first_stale_date(dates, signal):
+        """Return the first parseable date older than max_age_days, or None."""
+        cutoff = datetime.now() - timedelta(days=signal.get('max_age_days', 90))
+        for date_str in dates:
+            for fmt in signal['formats']:
+                try:
+                    date_obj = datetime.strptime(date_str, fmt)
+                except ValueError:
+                    continue
+                if date_obj < cutoff:
+                    return date_str
+                break
+        return None
+
+
+class _SignalValues(dict):
+    """Signal values computed on first use, so patterns only run when a rule needs them."""
+
+    def __init__(self, rule_set, text_lower, first_seen):
+        super().__init__()
+        self._rule_set = rule_set
+        self._text_lower = text_lower
+        self._first_seen = first_seen
+
+    def __missing__(self, name):
+        value = self._rule_set.signal_value(name, self._text_lower, self._first_seen, self)
+        self[name] = value
+        return value
+
+
+def load_rule_pack(path=DEFAULT_RULE_PACK_PATH):
+    """
+    Load and compile a declarative rule pack.
+
+    Args:
+        path: Path to the JSON rule pack
+
+    Returns:
+        CompiledRuleSet (raises ValueError or OSError if the pack is invalid)
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        pack = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Rule pack {path} is not valid JSON: {e}')
+    return CompiledRuleSet(
+        pack.get('signals', {}),
+        pack.get('rules', []),
+        version=pack.get('version', 'unversioned'),
+        checksum=hashlib.sha256(raw).hexdigest()[:12],
+        source=path
+    )
+
+
+# The active rule set is swapped by reference, so readers never see a
+# partially-built set; the lock only serializes concurrent reloads.
+_active_rule_set = None
+_active_mtime = None
+_failed_pack = None  # (path, mtime) of the last pack that failed to load, reported once
+_reload_lock = threading.Lock()
+_watcher = None
+
+
+def get_rule_set():
+    """Return the active compiled rule set, loading the default pack on first use."""
+    if _active_rule_set is None:
+        reload_rule_pack(force=True)
+    return _active_rule_set
+
+
+def reload_rule_pack(path=None, force=False):
+    """
+    Recompile the rule pack if the file changed and swap it in atomically.
+    A pack that fails to compile is reported and the previous set stays active.
+
+    Returns:
+        True if a new rule set was swapped in
+    """
+    global _active_rule_set, _active_mtime, _failed_pack
+    with _reload_lock:
+        path = path or (_active_rule_set.source if _active_rule_set else DEFAULT_RULE_PACK_PATH)
+        mtime = None
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            if not force and _active_rule_set is not None and mtime == _active_mtime:
+                return False
+            # Don't recompile a broken file until it changes again
+            if not force and _active_rule_set is not None and (path, mtime) == _failed_pack:
+                return False
+            rule_set = load_rule_pack(path)
+        except (OSError, ValueError, re.error) as e:
+            if _active_rule_set is None:
+                raise
+            if (path, mtime) != _failed_pack:
+                print(f"⚠ Warning: NIGO rule pack not reloaded, keeping version {_active_rule_set.version}: {e}")
+                _failed_pack = (path, mtime)
+            return False
+
+        _active_mtime = mtime
+        _failed_pack = None
+        if _active_rule_set is not None and rule_set.checksum == _active_rule_set.checksum:
+            return False
+        _active_rule_set = rule_set
+        print(f"✓ NIGO rule pack loaded: version {rule_set.version} ({rule_set.checksum})")
+        return True
+
+
+def start_rule_pack_watcher(path=DEFAULT_RULE_PACK_PATH, interval=5.0):
+    """
+    Load the rule pack and poll the file for changes on a daemon thread.
+    Safe to call once per worker process; later calls are no-ops.
+    """
+    global _watcher
+    if _active_rule_set is None or _active_rule_set.source != path:
+        reload_rule_pack(path, force=True)
+    if _watcher is not None or interval <= 0:
+        return _watcher
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            reload_rule_pack(path)
+
+    _watcher = threading.Thread(target=watch, name='nigo-rule-pack-watcher', daemon=True)
+    _watcher.start()
+    return _watcher
+
+
+def evaluate_nigo_rules(extracted_text, rule_set=None):
+    """
+    Evaluate the NIGO rules against extracted document text.
+
+    Args:
+        extracted_text: Text extracted from the document
+        rule_set: CompiledRuleSet to use (defaults to the active rule pack)
+
+    Returns:
+        Tuple of (errors, total_checks, rule_set)
+    """
+    rule_set = rule_set or get_rule_set()
+    return rule_set.evaluate(extracted_text), rule_set.total_checks, rule_set
+
+
+def analyze_nigo(extracted_text, rule_set=None):
+    """
+    Evaluate a document and summarize the result (errors, confidence score, NIGO status).
+
+    Args:
+        extracted_text: Text extracted from the document
+        rule_set: CompiledRuleSet to use (defaults to the active rule pack)
+
+    Returns:
+        Analysis dict as returned by app.detect_nigo_errors
+    """
+    errors, total_checks, rule_set = evaluate_nigo_rules(extracted_text, rule_set)
+
+    # Calculate confidence score for overall document
+    passed_checks = total_checks - len(errors)
+    confidence_score = (passed_checks / total_checks) * 100 if total_checks > 0 else 0
+
+    return {
+        'errors': errors,
+        'confidence_score': round(confidence_score, 1),
+        'total_checks': total_checks,
+        'passed_checks': passed_checks,
+        'rules_version': rule_set.version,
+        'nigo_status': 'NIGO' if len([e for e in errors if e['severity'] == 'high']) > 0 else 'REVIEW' if len(errors) > 0 else 'CLEAN'
+    }
+
+
+# Rule sets received by this process from a pool's parent, by checksum
+_received_rule_sets = {}
+
+
+def _compiled_rule_set(signals, rules, version, checksum, source):
+    """Unpickle a CompiledRuleSet, reusing the one already compiled for its checksum."""
+    rule_set = _received_rule_sets.get(checksum) if checksum else None
+    if rule_set is None:
+        rule_set = CompiledRuleSet(signals, rules, version=version, checksum=checksum, source=source)
+        if checksum:
+            _received_rule_sets.clear()
+            _received_rule_sets[checksum] = rule_set
+    return rule_set
+
+
+def analyze_nigo_in_worker(extracted_text, rule_set):
+    """
+    analyze_nigo for a process pool worker, with the rule set the parent is
+    using. Workers never load or reload the pack themselves, so they always
+    agree with the parent and never touch the reload lock.
+    """
+    return analyze_nigo(extracted_text, rule_set)
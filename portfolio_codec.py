@@ -0,0 +1,97 @@
+"""
+Portfolio Codec - Compact at-rest encoding for uploaded portfolios.
+Stored portfolios are compressed compact JSON (or msgpack, when installed)
+instead of pretty-printed JSON, and the OCR text is split out: it is stored
+once under its SHA-256 and the portfolio carries an extracted_text_ref.
+"""
+
+import gzip
+import hashlib
+import json
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; compressed JSON is always available
+    msgpack = None
+
+
+TEXT_FIELD = 'extracted_text'
+TEXT_REF_FIELD = 'extracted_text_ref'
+
+# format -> (key suffix, content type)
+FORMATS = {
+    'json': ('.json.gz', 'application/json'),
+    'msgpack': ('.msgpack.gz', 'application/msgpack'),
+}
+
+
+def resolve_format(fmt):
+    """The requested format if it can be used, otherwise 'json'."""
+    if fmt == 'msgpack' and msgpack is None:
+        print("⚠ Warning: msgpack is not installed; storing portfolios as compressed JSON")
+        return 'json'
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown portfolio format: {fmt} (expected json or msgpack)")
+    return fmt
+
+
+def encode(obj, fmt='json'):
+    """Serialize and gzip an object."""
+    if fmt == 'msgpack':
+        raw = msgpack.packb(obj, use_bin_type=True)
+    else:
+        raw = json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+    return gzip.compress(raw, compresslevel=6)
+
+
+def decode(data, fmt='json'):
+    """Inverse of encode()."""
+    raw = gzip.decompress(data)
+    if fmt == 'msgpack':
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
+
+
+def text_digest(text):
+    """Hex SHA-256 of a text (its content address)."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def compress_text(text):
+    """zlib-compressed UTF-8 bytes of a text."""
+    return zlib.compress(text.encode(), 6)
+
+
+def decompress_text(blob):
+    """Inverse of compress_text()."""
+    return zlib.decompress(blob).decode()
+
+
+def detach_text(portfolio_data):
+    """
+    Split the OCR text out of a portfolio.
+
+    Returns:
+        (portfolio copy with extracted_text replaced by extracted_text_ref, text);
+        text is None if the portfolio had none inline
+    """
+    if not isinstance(portfolio_data, dict) or TEXT_FIELD not in portfolio_data:
+        return portfolio_data, None
+    portfolio_data = dict(portfolio_data)
+    text = portfolio_data.pop(TEXT_FIELD) or ''
+    portfolio_data[TEXT_REF_FIELD] = {'sha256': text_digest(text), 'length': len(text)}
+    return portfolio_data, text
+
+
+def attach_text(portfolio_data, text):
+    """Portfolio copy with the OCR text inline again."""
+    portfolio_data = dict(portfolio_data)
+    portfolio_data[TEXT_FIELD] = text
+    return portfolio_data
+
+
+def text_ref_digest(portfolio_data):
+    """SHA-256 a portfolio's text is stored under, or None."""
+    ref = (portfolio_data or {}).get(TEXT_REF_FIELD) or {}
+    return ref.get('sha256')
@@ -0,0 +1,138 @@
+"""
+Process Pool - Shared process pool for CPU-bound batch work.
+The executor is created on first use. Workers come from a forkserver (spawn
+where that is unavailable), never a plain fork: the app process runs threads
+(upload workers, the write-behind flusher, the Textract watcher) whose locks a
+forked child could inherit held. Workers only import the module a task lives
+in, so worker functions must live in light modules (e.g. goal_generator,
+nigo_rules), never app.py; a pool that breaks (a worker died) is replaced on
+the next call.
+"""
+
+import multiprocessing
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _mp_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+_main_lock = threading.Lock()
+
+
+@contextmanager
+def _main_hidden():
+    """
+    Keep new workers from re-running the __main__ module. Under `python app.py`
+    (or `python -m app`) a new worker would otherwise import app.py, starting
+    its stores and threads, before running a task. Workers are only started
+    from submit, so that's the only place this is needed.
+    """
+    main = sys.modules.get('__main__')
+    if main is None or not (hasattr(main, '__file__') or getattr(main, '__spec__', None)):
+        yield
+        return
+    with _main_lock:
+        spec, main_file = main.__spec__, main.__dict__.pop('__file__', None)
+        main.__spec__ = None
+        try:
+            yield
+        finally:
+            main.__spec__ = spec
+            if main_file is not None:
+                main.__file__ = main_file
+
+
+class ProcessPool:
+    """
+    Lazily created ProcessPoolExecutor.
+
+    Args:
+        max_workers: Worker processes; 0 runs work inline in the calling thread
+        name: Name used in log messages
+    """
+
+    def __init__(self, max_workers, name='process-pool'):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {'items': 0, 'restarts': 0}
+
+    def _get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._stats['restarts'] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args):
+        """
+        Run fn(*args) in a worker; returns a concurrent.futures.Future.
+        A future that fails with BrokenProcessPool has the pool replaced.
+        """
+        self._stats['items'] += 1
+        if not self.max_workers:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        executor = self._get()
+        try:
+            with _main_hidden():
+                future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._reset(executor)
+            raise
+        future.add_done_callback(lambda f: self._check_broken(f, executor))
+        return future
+
+    def _check_broken(self, future, executor):
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            print(f"⚠ Warning: {self.name} broke (a worker exited); it will be restarted")
+            self._reset(executor)
+
+    def map(self, fn, items, chunksize=1):
+        """
+        Ordered results of fn over a list of items, yielded as they complete in order.
+        fn should catch its own exceptions; a broken pool raises BrokenProcessPool.
+        """
+        self._stats['items'] += len(items)
+        if not self.max_workers:
+            yield from map(fn, items)
+            return
+
+        executor = self._get()
+        try:
+            with _main_hidden():
+                results = executor.map(fn, items, chunksize=chunksize)
+            yield from results
+        except BrokenProcessPool:
+            print(f"⚠ Warning: {self.name} broke (a worker exited); it will be restarted")
+            self._reset(executor)
+            raise
+
+    def stats(self):
+        """Worker count and counters, for /health."""
+        return dict(self._stats, workers=self.max_workers, started=self._executor is not None)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
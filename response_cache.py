@@ -0,0 +1,127 @@
+"""
+Response Cache - TTL/LRU cache for generated Bedrock responses.
+The Mentor explains the same handful of concepts over and over; answers are
+keyed by a hash of the exact prompt, so repeat clicks on the same holdings
+skip Bedrock without one client's answer ever reaching another.
+Memory tier with LRU eviction, optionally backed by SQLite on disk.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def mentor_cache_key(prompt, model_id, prompt_version=''):
+    """
+    Hex SHA-256 over the exact prompt sent to Bedrock, the model and the prompt version.
+    The prompt carries the client's holdings and balances, so only a request for the
+    same concept with the same context can share an entry.
+    """
+    material = json.dumps([prompt, model_id, prompt_version], separators=(',', ':'))
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of JSON-serializable values.
+
+    Args:
+        max_entries: Entries kept in memory before the least recently used is evicted
+        ttl: Seconds an entry stays valid
+        db_path: Optional SQLite file for a persistent tier shared across restarts/workers
+    """
+
+    def __init__(self, max_entries=5000, ttl=86400, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    def get(self, key):
+        """Return the cached value for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return entry[0]
+                del self._memory[key]
+                self._stats['expired'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM response_cache WHERE cache_key = ?', (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self._stats['disk_hits'] += 1
+                    return value
+                if row is not None:
+                    self._db.execute('DELETE FROM response_cache WHERE cache_key = ?', (key,))
+                    self._db.commit()
+                    self._stats['expired'] += 1
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key, value, ttl=None):
+        """Store a value for ttl seconds (defaults to the cache's ttl)."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO response_cache (cache_key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value, separators=(',', ':')), expires_at)
+                )
+                self._db.commit()
+            self._remember(key, value, expires_at)
+        return value
+
+    def _remember(self, key, value, expires_at):
+        self._memory.pop(key, None)
+        self._memory[key] = (value, expires_at)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers; returns how many memory entries were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._memory.items() if expires_at <= now]
+            for key in expired:
+                del self._memory[key]
+            if self._db is not None:
+                self._db.execute('DELETE FROM response_cache WHERE expires_at <= ?', (now,))
+                self._db.commit()
+            return len(expired)
+
+    def stats(self):
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            stats = dict(self._stats, memory_entries=len(self._memory))
+            if self._db is not None:
+                stats['disk_entries'] = self._db.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+            return stats
@@ -0,0 +1,90 @@
+"""
+Responses - Payload projection and compression for API responses.
+Endpoints return a compact default payload; callers opt into extra sections
+(e.g. the raw Textract response) with ?include= and trim the payload with ?fields=.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+# Keys always kept by a fields= projection so clients can tell success from failure
+ALWAYS_INCLUDED_FIELDS = ('status', 'error')
+
+
+def parse_list_param(value):
+    """Split a comma-separated query parameter into a set of names."""
+    return {item.strip() for item in (value or '').split(',') if item.strip()}
+
+
+def project_payload(payload, fields=None, include=None, optional=None):
+    """
+    Shape a response payload.
+
+    Args:
+        payload: Full response dict
+        fields: Set of top-level keys to keep (None keeps everything)
+        include: Set of optional sections the caller asked for
+        optional: Dict of section name -> (key, value) added only when included
+
+    Returns:
+        The projected dict
+    """
+    payload = dict(payload)
+    for section, (key, value) in (optional or {}).items():
+        if section in (include or ()):
+            payload[key] = value
+    if fields:
+        payload = {k: v for k, v in payload.items() if k in fields or k in ALWAYS_INCLUDED_FIELDS}
+    return payload
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best supported content encoding from an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, accept_encoding, min_size=1024, level=6):
+    """
+    Compress a Flask response body in place if the client accepts it.
+    Skips small, streamed, already-encoded and non-2xx responses.
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=min(level, 11))
+    else:
+        compressed = gzip.compress(body, compresslevel=level)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
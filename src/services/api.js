@@ -33,7 +33,7 @@ export const summarizePortfolio = async (portfolioData, modelId = null) => {
 };
 
 // Upload Portfolio - Upload document, extract with Textract, summarize with Bedrock, and store in S3
-export const uploadPortfolio = async (file) => {
+export const uploadPortfolio = async (file, onProgress = null) => {
   // Expects a File object (PDF, PNG, JPG)
   if (!(file instanceof File)) {
     throw new Error('Please upload a portfolio document file (PDF, PNG, or JPG)');
@@ -47,9 +47,31 @@ export const uploadPortfolio = async (file) => {
       'Content-Type': 'multipart/form-data',
     },
   });
+  // The upload is processed in the background; poll the case until it finishes
+  if (response.status === 202) {
+    return waitForCase(response.data.case_id, onProgress);
+  }
   return response.data;
 };
 
+// Upload case status - stage/progress while processing, full result once SUCCEEDED
+export const getCaseStatus = async (caseId) => {
+  const response = await api.get(`/api/cases/${caseId}/status`);
+  return response.data;
+};
+
+const waitForCase = async (caseId, onProgress, intervalMs = 1000) => {
+  while (true) {
+    const status = await getCaseStatus(caseId);
+    onProgress?.(status);
+    if (status.case_status === 'SUCCEEDED') return status;
+    if (status.case_status === 'FAILED') {
+      throw new Error(status.error || 'Portfolio upload failed');
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+};
+
 // The Mentor - Financial Education
 export const explainConcept = async (concept, context = {}) => {
   const response = await api.post('/api/mentor/explain', {
@@ -59,12 +81,56 @@ export const explainConcept = async (concept, context = {}) => {
   return response.data;
 };
 
-// Goals
-export const generateGoals = async (caseId, portfolioData, totalAccountValue) => {
-  const response = await api.post(`/api/goals/generate/${caseId}`, {
-    portfolio_data: portfolioData,
-    total_account_value: totalAccountValue,
+// Goals - portfolioData/totalAccountValue may be omitted for an uploaded case
+export const generateGoals = async (caseId, portfolioData = null, totalAccountValue = null) => {
+  const payload = {};
+  if (portfolioData) payload.portfolio_data = portfolioData;
+  if (totalAccountValue) payload.total_account_value = totalAccountValue;
+  const response = await api.post(`/api/goals/generate/${caseId}`, payload);
+  return response.data;
+};
+
+// Goals for many cases at once; onResult(line) is called for each NDJSON line as it arrives
+export const generateGoalsBulk = async (caseIds, onResult = null) => {
+  const response = await fetch(`${API_BASE_URL}/api/goals/generate/bulk`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/x-ndjson' },
+    body: caseIds.map((caseId) => JSON.stringify(caseId)).join('\n'),
   });
+  if (!response.ok) throw new Error(`Request failed with status ${response.status}`);
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const results = [];
+  let buffer = '';
+  let summary = null;
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    for (const line of lines.filter(Boolean)) {
+      const result = JSON.parse(line);
+      if (result.done) {
+        summary = result;
+      } else {
+        results.push(result);
+        onResult?.(result);
+      }
+    }
+  }
+  return { results, summary };
+};
+
+// Cases
+export const listCases = async (limit = 50, offset = 0) => {
+  const response = await api.get(`/api/cases?limit=${limit}&offset=${offset}`);
+  return response.data;
+};
+
+export const getCase = async (caseId) => {
+  const response = await api.get(`/api/cases/${caseId}`);
   return response.data;
 };
 
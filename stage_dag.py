@@ -0,0 +1,133 @@
+"""
+Stage DAG - Run dependent pipeline stages concurrently.
+Stages declare the stages they depend on; independent stages (e.g. the
+Bedrock summary and the S3 write of an upload) run at the same time on a
+bounded executor. Optional stages may fail or time out without failing the
+run, and every stage's wall-clock time is recorded.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+class Stage:
+    """
+    One unit of work in a StageRun.
+
+    Args:
+        name: Unique stage name
+        fn: Callable(inputs) -> result, where inputs maps each dependency name to its result
+        deps: Names of stages that must finish first
+        timeout: Seconds to wait for the stage (None waits forever)
+        required: If False, a failure or timeout is recorded and the run continues
+    """
+
+    def __init__(self, name, fn, deps=(), timeout=None, required=True):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.required = required
+
+
+class StageRun:
+    """Results, errors and timings of a finished run."""
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.status = {}
+        self.timings_ms = {}
+        self.total_ms = 0.0
+
+    def metadata(self):
+        """Per-stage status and timings, for response metadata."""
+        stages = {}
+        for name, status in self.status.items():
+            stage = {'status': status, 'ms': self.timings_ms.get(name)}
+            if name in self.errors:
+                stage['error'] = self.errors[name]
+            stages[name] = stage
+        return {'stages': stages, 'total_ms': self.total_ms}
+
+
+def _elapsed_ms(start):
+    return round((time.monotonic() - start) * 1000, 1)
+
+
+def run_stages(stages, executor):
+    """
+    Run stages in dependency order, independent ones concurrently.
+
+    A stage runs once all of its dependencies have succeeded and is skipped if
+    any of them failed. A timed-out stage is abandoned, not interrupted: its
+    thread finishes in the background and its result is discarded.
+
+    Args:
+        stages: List of Stage
+        executor: concurrent.futures executor that runs the stage functions
+
+    Returns:
+        StageRun
+
+    Raises:
+        The original exception of the first required stage that fails
+        (TimeoutError if it timed out)
+    """
+    run = StageRun()
+    run_start = time.monotonic()
+    pending = {stage.name: stage for stage in stages}
+    running = {}  # future -> (stage, start, deadline)
+
+    while pending or running:
+        unfinished = set(pending) | {stage.name for stage, _, _ in running.values()}
+        for name, stage in list(pending.items()):
+            if any(dep in unfinished for dep in stage.deps):
+                continue
+            del pending[name]
+            failed_deps = [dep for dep in stage.deps if dep not in run.results]
+            if failed_deps:
+                run.status[name] = 'skipped'
+                run.errors[name] = f"dependency failed: {', '.join(failed_deps)}"
+                continue
+            start = time.monotonic()
+            deadline = start + stage.timeout if stage.timeout is not None else None
+            inputs = {dep: run.results[dep] for dep in stage.deps}
+            running[executor.submit(stage.fn, inputs)] = (stage, start, deadline)
+
+        if not running:
+            if pending and len(pending) == len(unfinished):
+                raise ValueError(f"Stage dependency cycle: {', '.join(sorted(pending))}")
+            continue
+
+        deadlines = [deadline for _, _, deadline in running.values() if deadline is not None]
+        wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+        done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            stage, start, _ = running.pop(future)
+            run.timings_ms[stage.name] = _elapsed_ms(start)
+            try:
+                run.results[stage.name] = future.result()
+                run.status[stage.name] = 'ok'
+            except Exception as e:
+                run.status[stage.name] = 'failed'
+                run.errors[stage.name] = str(e)
+                if stage.required:
+                    run.total_ms = _elapsed_ms(run_start)
+                    raise
+
+        now = time.monotonic()
+        for future, (stage, start, deadline) in list(running.items()):
+            if deadline is not None and now >= deadline and not future.done():
+                running.pop(future)
+                future.cancel()
+                run.timings_ms[stage.name] = _elapsed_ms(start)
+                run.status[stage.name] = 'timeout'
+                run.errors[stage.name] = f'timed out after {stage.timeout}s'
+                if stage.required:
+                    run.total_ms = _elapsed_ms(run_start)
+                    raise TimeoutError(f'Stage {stage.name} timed out after {stage.timeout}s')
+
+    run.total_ms = _elapsed_ms(run_start)
+    return run
@@ -0,0 +1,383 @@
+"""
+Storage - Pluggable backends for stored portfolio documents.
+Local filesystem, SQLite blob and S3 backends share one put/get interface.
+The S3 backend checks (or creates) its bucket once instead of before every
+upload, and sends large payloads as multipart uploads. WriteBehindStorage
+wraps any backend to take writes off the request path and flush them in batches.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+
+
+class StorageBackend:
+    """Interface implemented by every storage backend."""
+
+    name = 'base'
+
+    def prepare(self):
+        """One-time setup done at startup rather than per write (e.g. the S3 bucket check)."""
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        """Store bytes under a key; returns the key."""
+        raise NotImplementedError
+
+    def put_many(self, items):
+        """Store a batch of (key, data, content_type) tuples."""
+        for key, data, content_type in items:
+            self.put(key, data, content_type)
+
+    def get(self, key):
+        """Return the bytes stored under a key, or None."""
+        raise NotImplementedError
+
+    def stats(self):
+        """Backend name and counters, for /health."""
+        return {'backend': self.name}
+
+    def close(self):
+        """Release connections and flush pending writes."""
+
+
+def _as_bytes(data):
+    return data.encode() if isinstance(data, str) else bytes(data)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files under a root directory; keys map to relative paths.
+
+    Args:
+        root: Directory that holds the stored objects
+    """
+
+    name = 'local'
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f'Storage key escapes the storage root: {key}')
+        return path
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a half-written object
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_as_bytes(data))
+        os.replace(tmp_path, path)
+        return key
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def stats(self):
+        return {'backend': self.name, 'root': self.root}
+
+
+class SQLiteBlobStorage(StorageBackend):
+    """
+    Objects stored as BLOBs in a SQLite table (one file, no object store needed).
+
+    Args:
+        db_path: SQLite file
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                key TEXT PRIMARY KEY,
+                content_type TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        self.put_many([(key, data, content_type)])
+        return key
+
+    def put_many(self, items):
+        """Write a whole batch in one transaction."""
+        now = datetime.now().isoformat()
+        rows = [(key, content_type, _as_bytes(data), len(_as_bytes(data)), now)
+                for key, data, content_type in items]
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO blobs (key, content_type, data, size, updated_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT data FROM blobs WHERE key = ?', (key,)).fetchone()
+        return bytes(row[0]) if row else None
+
+    def stats(self):
+        with self._lock:
+            count, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+        return {'backend': self.name, 'objects': count, 'bytes': size}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in an S3 bucket.
+
+    Args:
+        client: boto3 S3 client
+        bucket: Bucket name
+        region: Region used if the bucket has to be created
+        multipart_threshold: Payloads of at least this many bytes use multipart upload
+        part_size: Multipart part size in bytes (S3 minimum is 5 MB)
+    """
+
+    name = 's3'
+
+    def __init__(self, client, bucket, region=None, multipart_threshold=8 * 1024 * 1024,
+                 part_size=8 * 1024 * 1024):
+        self.client = client
+        self.bucket = bucket
+        self.region = region
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self._bucket_ready = False
+        self._bucket_lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # put() runs on any upload thread
+        self._stats = {'puts': 0, 'multipart_puts': 0, 'bucket_checks': 0}
+
+    def prepare(self):
+        self.ensure_bucket()
+
+    def ensure_bucket(self):
+        """Check for (or create) the bucket once; later calls are free."""
+        if self._bucket_ready:
+            return
+        with self._bucket_lock:
+            if self._bucket_ready:
+                return
+            with self._stats_lock:
+                self._stats['bucket_checks'] += 1
+            try:
+                self.client.head_bucket(Bucket=self.bucket)
+            except ClientError:
+                # Bucket doesn't exist, create it (us-east-1 takes no LocationConstraint)
+                kwargs = {}
+                if self.region and self.region != 'us-east-1':
+                    kwargs['CreateBucketConfiguration'] = {'LocationConstraint': self.region}
+                self.client.create_bucket(Bucket=self.bucket, **kwargs)
+            self._bucket_ready = True
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        self.ensure_bucket()
+        data = _as_bytes(data)
+        multipart = len(data) >= self.multipart_threshold
+        if multipart:
+            self._put_multipart(key, data, content_type)
+        else:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type)
+        with self._stats_lock:
+            self._stats['puts'] += 1
+            if multipart:
+                self._stats['multipart_puts'] += 1
+        return key
+
+    def _put_multipart(self, key, data, content_type):
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type
+        )['UploadId']
+        try:
+            parts = []
+            for number, offset in enumerate(range(0, len(data), self.part_size), start=1):
+                response = self.client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number,
+                    Body=data[offset:offset + self.part_size]
+                )
+                parts.append({'ETag': response['ETag'], 'PartNumber': number})
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            # Don't leave orphaned parts accruing storage charges
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def get(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return dict(stats, backend=self.name, bucket=self.bucket, bucket_ready=self._bucket_ready)
+
+
+class WriteBehindStorage(StorageBackend):
+    """
+    Asynchronous, batched writes in front of another backend.
+    put() returns at once; a background thread hands queued writes to the
+    backend's put_many in batches. Reads see pending writes. A failed batch
+    stays pending (and readable) and is retried with backoff; only after
+    max_retries is it dropped, counted as failed and reported in last_error.
+
+    Args:
+        backend: StorageBackend that receives the writes
+        batch_size: Most writes flushed in one put_many call
+        flush_interval: Seconds the flusher waits to fill a batch
+        max_retries: Extra attempts for a failed batch
+        retry_delay: First retry delay in seconds (doubles per retry)
+    """
+
+    def __init__(self, backend, batch_size=32, flush_interval=0.05, max_retries=3, retry_delay=1.0):
+        self.backend = backend
+        self.name = backend.name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue()
+        self._pending = {}  # key -> (data, content_type) not yet written
+        self._pending_lock = threading.Lock()  # Also guards _stats (updated by request threads and the flusher)
+        self._stats = {'queued': 0, 'written': 0, 'retries': 0, 'failed': 0, 'batches': 0, 'last_error': None}
+        self._thread = threading.Thread(target=self._flush_loop, name='storage-write-behind', daemon=True)
+        self._thread.start()
+
+    def prepare(self):
+        self.backend.prepare()
+
+    def put(self, key, data, content_type='application/octet-stream'):
+        with self._pending_lock:
+            self._pending[key] = (data, content_type)
+            self._stats['queued'] += 1
+        self._queue.put(key)
+        return key
+
+    def get(self, key):
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return _as_bytes(pending[0])
+        return self.backend.get(key)
+
+    def _flush_loop(self):
+        while True:
+            keys = [self._queue.get()]
+            if keys[0] is None:
+                self._queue.task_done()
+                return
+            deadline = time.monotonic() + self.flush_interval
+            while len(keys) < self.batch_size:
+                try:
+                    key = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if key is None:
+                    self._queue.put(None)  # Stop after this batch
+                    self._queue.task_done()
+                    break
+                keys.append(key)
+            self._write_batch(keys)
+            for _ in keys:
+                self._queue.task_done()
+
+    def _write_batch(self, keys):
+        for attempt in range(self.max_retries + 1):
+            with self._pending_lock:
+                # A key queued twice is written once, with its latest value
+                items = {key: self._pending[key] for key in keys if key in self._pending}
+            try:
+                self.backend.put_many([(key, data, content_type) for key, (data, content_type) in items.items()])
+                with self._pending_lock:
+                    self._stats['written'] += len(items)
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Warning: Write-behind storage batch dropped after {attempt + 1} attempts "
+                          f"({len(items)} objects: {', '.join(items)}): {e}")
+                    with self._pending_lock:
+                        self._stats['failed'] += len(items)
+                        self._stats['last_error'] = str(e)
+                    break
+                print(f"Warning: Write-behind storage batch failed ({len(items)} objects), retrying: {e}")
+                with self._pending_lock:
+                    self._stats['retries'] += 1
+                time.sleep(self.retry_delay * (2 ** attempt))
+        with self._pending_lock:
+            self._stats['batches'] += 1
+            for key, value in items.items():
+                if self._pending.get(key) is value:
+                    del self._pending[key]
+
+    def flush(self):
+        """Block until every queued write has been attempted."""
+        self._queue.join()
+
+    def stats(self):
+        with self._pending_lock:
+            write_behind = dict(self._stats, pending=self._queue.qsize())
+        return dict(self.backend.stats(), write_behind=write_behind)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.backend.close()
+
+
+def create_storage(kind, s3_client=None, bucket=None, region=None, root=None, db_path=None,
+                   multipart_threshold=8 * 1024 * 1024, write_behind=False):
+    """
+    Build the configured storage backend.
+
+    Args:
+        kind: 'local', 'sqlite' or 's3'
+        s3_client, bucket, region, multipart_threshold: S3 settings
+        root: Directory for 'local'
+        db_path: SQLite file for 'sqlite'
+        write_behind: Wrap the backend in WriteBehindStorage
+
+    Returns:
+        StorageBackend, or None for 's3' without a client (demo mode)
+    """
+    if kind == 'local':
+        backend = LocalStorage(root)
+    elif kind == 'sqlite':
+        backend = SQLiteBlobStorage(db_path)
+    elif kind == 's3':
+        if s3_client is None:
+            return None
+        backend = S3Storage(s3_client, bucket, region=region, multipart_threshold=multipart_threshold)
+    else:
+        raise ValueError(f"Unknown storage backend: {kind} (expected local, sqlite or s3)")
+    return WriteBehindStorage(backend) if write_behind else backend
@@ -0,0 +1,131 @@
+"""
+Streaming - Server-Sent Events helpers and incremental Goal Card parsing.
+Bedrock output is pushed to the browser token by token; Goal Cards are
+emitted as soon as each complete JSON object in the "goal_cards" array arrives,
+instead of after the whole generation finishes.
+"""
+
+import json
+import re
+
+
+GOAL_CARDS_KEY_PATTERN = re.compile(r'"goal_cards"\s*:\s*\[')
+
+
+def sse_event(event, data):
+    """
+    Format one Server-Sent Event.
+
+    Args:
+        event: Event name (e.g. 'token', 'goal_card', 'done', 'error')
+        data: JSON-serializable payload
+
+    Returns:
+        The event as a str ready to write to the response
+    """
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def demo_token_stream(text, words_per_chunk=3):
+    """Split text into small word chunks, to stream mock responses like a model would."""
+    words = re.findall(r'\S+\s*', text)
+    for start in range(0, len(words), words_per_chunk):
+        yield ''.join(words[start:start + words_per_chunk])
+
+
+class GoalCardStreamParser:
+    """
+    Incremental parser for the "goal_cards" array in streamed model output.
+
+    feed() takes text as it arrives and returns the Goal Cards whose JSON
+    objects closed in that chunk. Chunks are kept in a list (joined only when
+    .text is read), and the scan buffer holds just the unscanned tail: the
+    last few characters while looking for the key, then the open card object.
+    Each character is scanned once, so the cost is linear in the response
+    length regardless of chunk size.
+    """
+
+    # Characters kept while searching, so a key split across chunks is still found
+    KEY_OVERLAP = 32
+
+    def __init__(self):
+        self.cards = []
+        self._chunks = []
+        self._buffer = ''        # Unconsumed tail of the text
+        self._pos = 0            # Next character of _buffer to scan
+        self._in_array = False   # Inside the goal_cards array
+        self._done = False       # Array closed; ignore the rest
+        self._depth = 0          # Brace depth inside the array
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+
+    @property
+    def text(self):
+        """All text fed so far."""
+        if len(self._chunks) > 1:
+            self._chunks = [''.join(self._chunks)]
+        return self._chunks[0] if self._chunks else ''
+
+    def feed(self, chunk):
+        """
+        Add streamed text.
+
+        Returns:
+            List of Goal Card dicts completed by this chunk
+        """
+        self._chunks.append(chunk)
+        completed = []
+        if self._done:
+            return completed
+        self._buffer += chunk
+
+        if not self._in_array:
+            match = GOAL_CARDS_KEY_PATTERN.search(self._buffer)
+            if not match:
+                self._buffer = self._buffer[-self.KEY_OVERLAP:]
+                return completed
+            self._in_array = True
+            self._buffer = self._buffer[match.end():]
+            self._pos = 0
+
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._object_start = index
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    try:
+                        card = json.loads(buffer[self._object_start:index + 1])
+                    except ValueError:
+                        card = None
+                    if isinstance(card, dict):
+                        self.cards.append(card)
+                        completed.append(card)
+                    self._object_start = None
+            elif char == ']' and self._depth == 0:
+                self._done = True
+                self._buffer = ''
+                return completed
+
+        # Keep only the open card object (if any) for the next chunk
+        if self._object_start is None:
+            self._buffer = ''
+        else:
+            self._buffer = buffer[self._object_start:]
+            self._object_start = 0
+        self._pos = len(self._buffer)
+        return completed
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# The modules under test live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing app opens its databases and upload directory under DATA_DIR; keep them out of the tree
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='heritage-hub-tests-'))
+os.environ.setdefault('DEMO_MODE', 'True')
+os.environ.setdefault('NIGO_RULES_RELOAD_INTERVAL', '0')
@@ -0,0 +1,69 @@
+"""
+Tests for bedrock_invoker.BedrockInvoker's limiter slot accounting.
+"""
+
+import asyncio
+import io
+import json
+
+from botocore.exceptions import ClientError
+
+from bedrock_invoker import AIMDLimiter, BedrockInvoker
+
+
+def throttle():
+    return ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'slow down'}}, 'InvokeModel')
+
+
+class HangingAsyncClient:
+    """aiobotocore stand-in whose invoke_model never returns until cancelled."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def invoke_model(self, **kwargs):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+class FlakyClient:
+    """boto3 stand-in that throttles the first `throttles` calls."""
+
+    def __init__(self, throttles):
+        self.throttles = throttles
+
+    def invoke_model(self, **kwargs):
+        if self.throttles:
+            self.throttles -= 1
+            raise throttle()
+        return {'body': io.BytesIO(json.dumps({'ok': True}).encode())}
+
+
+def test_cancelled_async_invoke_releases_its_slot():
+    limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+    invoker = BedrockInvoker(None, limiter=limiter)
+    client = HangingAsyncClient()
+
+    async def main():
+        task = asyncio.create_task(invoker.invoke_async(client, 'amazon.titan-text-express-v1', {}))
+        await client.started.wait()
+        assert limiter.stats()['in_flight'] == 1
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
+    assert limiter.stats()['in_flight'] == 0
+    assert limiter.acquire(timeout=0)
+
+
+def test_throttled_retries_release_every_slot():
+    limiter = AIMDLimiter(initial_limit=2)
+    invoker = BedrockInvoker(FlakyClient(throttles=2), limiter=limiter, base_delay=0, max_delay=0)
+
+    assert invoker.invoke('amazon.titan-text-express-v1', {}) == {'ok': True}
+    stats = limiter.stats()
+    assert stats['in_flight'] == 0
+    assert stats['throttled'] == 2
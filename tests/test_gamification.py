@@ -0,0 +1,69 @@
+"""
+Tests for gamification.GamificationStore shared by several processes (one store per worker).
+"""
+
+import pytest
+
+from gamification import GamificationStore
+
+
+@pytest.fixture
+def stores(tmp_path):
+    # Two stores on one file stand in for two gunicorn workers
+    db_path = str(tmp_path / 'gamification.db')
+    first, second = GamificationStore(db_path, flush_interval=3600), GamificationStore(db_path, flush_interval=3600)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def stats(store, user_id):
+    return store.progress(user_id)['stats']
+
+
+def test_workers_do_not_overwrite_each_others_points(stores):
+    first, second = stores
+    first.complete_goal('alice', 'goal_a', 50)
+    second.complete_goal('alice', 'goal_b', 75)
+    second.flush()
+    first.flush()  # Used to write alice's stale row (50 points) over the other worker's 75
+
+    for store in stores:
+        store.refresh()
+        assert stats(store, 'alice')['total_points'] == 125
+        assert stats(store, 'alice')['goals_completed'] == 2
+
+    reopened = GamificationStore(first.db_path, flush_interval=3600)
+    try:
+        assert stats(reopened, 'alice')['total_points'] == 125
+        assert stats(reopened, 'alice')['badges_earned'] == ['🎯 First Goal']
+    finally:
+        reopened.close()
+
+
+def test_goal_completed_in_two_workers_counts_once(stores):
+    first, second = stores
+    first.complete_goal('bob', 'goal_a', 50)
+    second.complete_goal('bob', 'goal_a', 50)
+    first.flush()
+    second.flush()
+    second.refresh()
+
+    assert stats(second, 'bob')['total_points'] == 50
+    assert stats(second, 'bob')['goals_completed'] == 1
+
+
+def test_refresh_picks_up_other_workers_and_keeps_pending_completions(stores):
+    first, second = stores
+    first.complete_goal('carol', 'goal_a', 100)
+    first.flush()
+    second.complete_goal('carol', 'goal_b', 10)  # Queued, not yet written
+
+    second.refresh()
+    assert stats(second, 'carol')['total_points'] == 10  # Not reloaded over the queued completion
+
+    second.flush()
+    second.refresh()
+    assert stats(second, 'carol')['total_points'] == 110
+    assert second.progress('carol')['leaderboard_position'] == 1
+    assert second.leaderboard() == [{'user_id': 'carol', 'total_points': 110, 'level': 'Planner', 'position': 1}]
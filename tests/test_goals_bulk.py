@@ -0,0 +1,29 @@
+"""
+Tests for item validation in /api/goals/generate/bulk (app.generate_goals_bulk).
+"""
+
+import json
+
+import app
+
+
+def bulk(items):
+    response = app.app.test_client().post('/api/goals/generate/bulk', json={'items': items})
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_non_string_case_ids_are_per_item_errors():
+    lines = bulk([{'case_id': ['x']}, {'case_id': {}}, '', {'case_id': 7},
+                  {'portfolio_data': {'holdings': []}, 'total_account_value': 1000}])
+
+    assert [line.get('status') for line in lines[:-1]] == ['error'] * 4 + ['success']
+    assert all('case_id must be a non-empty string' in line['error'] for line in lines[:4])
+    assert lines[-1] == {'done': True, 'count': 5, 'errors': 4, 'truncated': False}
+
+
+def test_case_id_is_optional_only_with_portfolio_data_and_value():
+    lines = bulk([{'portfolio_data': {'holdings': []}}])
+
+    assert lines[0]['status'] == 'error'
+    assert lines[-1]['errors'] == 1
@@ -0,0 +1,57 @@
+"""
+Tests for the Mentor response cache key (app.explain_concept).
+"""
+
+import pytest
+
+import app
+from response_cache import ResponseCache
+
+
+class EchoBedrock:
+    """BedrockInvoker stand-in that answers with the prompt it was sent."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke_text(self, model_id, prompt, max_tokens=4000, system=None, **generation):
+        self.prompts.append(prompt)
+        return f'answer {len(self.prompts)}: {prompt}'
+
+
+@pytest.fixture
+def mentor(monkeypatch):
+    bedrock = EchoBedrock()
+    monkeypatch.setitem(app.app.config, 'DEMO_MODE', False)
+    monkeypatch.setattr(app, 'bedrock', bedrock)
+    monkeypatch.setattr(app, 'mentor_cache', ResponseCache(max_entries=100, ttl=60))
+    client = app.app.test_client()
+
+    def explain(context):
+        return client.post('/api/mentor/explain', json={'concept': 'diversification', 'context': context}).get_json()
+
+    return explain, bedrock
+
+
+def holdings(*values):
+    return {'holdings': [{'name': 'Acme Growth Fund', 'type': 'mutual_fund', 'value': value} for value in values]}
+
+
+def test_contexts_differing_only_in_amounts_do_not_share_an_entry(mentor):
+    explain, bedrock = mentor
+    first = explain(holdings(250000.0))
+    second = explain(holdings(1200.5))
+
+    assert len(bedrock.prompts) == 2
+    assert second['cached'] is False
+    assert '250000' in first['explanation'] and '250000' not in second['explanation']
+
+
+def test_same_context_is_served_from_the_cache(mentor):
+    explain, bedrock = mentor
+    first = explain(holdings(5000.0))
+    second = explain(holdings(5000.0))
+
+    assert len(bedrock.prompts) == 1
+    assert second['cached'] is True
+    assert second['explanation'] == first['explanation']
@@ -0,0 +1,104 @@
+"""
+Tests for holdings extraction from Textract FORMS/TABLES output (app.py, textract_blocks.py).
+"""
+
+import pytest
+
+import app
+from aws_stubs import StubTextractClient
+from textract_blocks import BlockIndex, parse_amount
+
+
+def analyze(*lines):
+    """Textract FORMS/TABLES response for a one-page statement (via the local stub)."""
+    response = StubTextractClient(pages=['\n'.join(lines)]).analyze_document(
+        Document={'Bytes': b''}, FeatureTypes=['TABLES', 'FORMS'])
+    return response, app.extract_text_from_textract(response)
+
+
+def parse(*lines):
+    response, text = analyze(*lines)
+    return app.parse_portfolio_from_textract(response, text, 'statement.pdf')
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$1,234.56', 1234.56),
+    ('(1,234.56)', -1234.56),
+    ('-$50.00', -50.0),
+    ('$ 12,000.00 as of 3/31/2024', 12000.0),
+    ('(800) 555-1234', None),
+    ('Call 800-555-1234', None),
+    ('4417-2290-31', None),
+    ('3/31/2024', None),
+    ('(800)', 800.0),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+def test_form_field_with_account_number_is_not_a_holding():
+    portfolio = parse(
+        'Roth IRA Account Number: 4417-2290-31',
+        'Roth IRA balance $12,000.00'
+    )
+
+    assert portfolio['extraction_method'] == 'text'
+    assert portfolio['total_value'] == 12000.0
+    assert [h['value'] for h in portfolio['holdings']] == [12000.0]
+
+
+def test_form_field_with_currency_value_is_a_holding():
+    portfolio = parse(
+        'Roth IRA: $12,000.00',
+        'Brokerage Account Balance: 8500'
+    )
+
+    assert portfolio['extraction_method'] == 'forms'
+    assert sorted(h['value'] for h in portfolio['holdings']) == [8500.0, 12000.0]
+
+
+def test_phone_numbers_and_negative_balances_are_not_holdings():
+    portfolio = parse(
+        'Brokerage Account Service Line: (800) 555-1234',
+        'Traditional IRA Balance: ($1,200.00)',
+        'Roth IRA balance $12,000.00'
+    )
+
+    assert portfolio['extraction_method'] == 'text'
+    assert [h['value'] for h in portfolio['holdings']] == [12000.0]
+
+
+def test_holdings_table_is_read_as_positions():
+    portfolio = parse(
+        'Holding | Market Value',
+        'Roth IRA - Large Cap Value | $125,000.00',
+        'Brokerage Account - ETFs | $50,000.00',
+        'Total | $175,000.00'
+    )
+
+    assert portfolio['extraction_method'] == 'tables'
+    assert [h['value'] for h in portfolio['holdings']] == [125000.0, 50000.0]
+    assert portfolio['holdings'][0]['type'] == 'Roth IRA'
+
+
+def test_transaction_activity_table_is_not_read_as_positions():
+    lines = (
+        'Roth IRA balance $12,000.00',
+        'Date | Description | Amount | Balance',
+        '03/01/2024 | Roth IRA contribution | $500.00 | $12,000.00',
+        '03/15/2024 | Account fee | ($25.00) | $11,975.00'
+    )
+    portfolio = parse(*lines)
+
+    assert portfolio['extraction_method'] == 'text'
+    assert [h['value'] for h in portfolio['holdings']] == [12000.0]
+    assert app.extract_structured_account_value(BlockIndex.from_response(analyze(*lines)[0])) is None
+
+
+def test_table_without_holding_names_is_skipped():
+    response, _ = analyze(
+        'Description | Value',
+        'Dividends received | $1,250.00'
+    )
+
+    assert app.holdings_from_block_index(BlockIndex.from_response(response)) == ([], None)
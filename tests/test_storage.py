@@ -0,0 +1,152 @@
+"""
+Tests for storage.S3Storage and storage.WriteBehindStorage against the local S3 stub.
+"""
+
+import threading
+
+import pytest
+
+from aws_stubs import StubS3Client
+from storage import S3Storage, StorageBackend, WriteBehindStorage
+
+
+class CountingS3Client(StubS3Client):
+    """S3 stub that counts calls and can fail a multipart part."""
+
+    def __init__(self, fail_part=None):
+        super().__init__()
+        self.fail_part = fail_part
+        self.calls = {}
+
+    def _count(self, operation):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def head_bucket(self, **kwargs):
+        self._count('head_bucket')
+        return super().head_bucket(**kwargs)
+
+    def put_object(self, **kwargs):
+        self._count('put_object')
+        return super().put_object(**kwargs)
+
+    def upload_part(self, PartNumber, **kwargs):
+        self._count('upload_part')
+        if PartNumber == self.fail_part:
+            raise ConnectionError('connection reset')
+        return super().upload_part(PartNumber=PartNumber, **kwargs)
+
+    def abort_multipart_upload(self, **kwargs):
+        self._count('abort_multipart_upload')
+        return super().abort_multipart_upload(**kwargs)
+
+
+class MemoryStorage(StorageBackend):
+    """Backend that records batches, fails the first `failures` of them and can block writes."""
+
+    name = 'memory'
+
+    def __init__(self, failures=0):
+        self.objects = {}
+        self.batches = []
+        self.failures = failures
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def put_many(self, items):
+        self.unblocked.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('storage unavailable')
+        self.batches.append([key for key, _, _ in items])
+        for key, data, _ in items:
+            self.objects[key] = data
+
+    def get(self, key):
+        return self.objects.get(key)
+
+
+def test_bucket_is_checked_once():
+    client = CountingS3Client()
+    storage = S3Storage(client, 'portfolios')
+    for number in range(3):
+        storage.put(f'portfolios/case_{number}.json', b'{}')
+
+    assert client.calls['head_bucket'] == 1
+    assert 'portfolios' in client.buckets
+    assert storage.stats()['bucket_checks'] == 1
+
+
+def test_payloads_at_the_threshold_use_multipart():
+    client = CountingS3Client()
+    storage = S3Storage(client, 'portfolios', multipart_threshold=10, part_size=4)
+    storage.put('small.json', b'123456789')
+    storage.put('large.json', b'0123456789')
+
+    assert client.calls['put_object'] == 1
+    assert client.calls['upload_part'] == 3
+    assert storage.get('large.json') == b'0123456789'
+    assert storage.stats()['multipart_puts'] == 1
+
+
+def test_failed_multipart_upload_is_aborted():
+    client = CountingS3Client(fail_part=2)
+    storage = S3Storage(client, 'portfolios', multipart_threshold=10, part_size=4)
+
+    with pytest.raises(ConnectionError):
+        storage.put('large.json', b'0123456789')
+    assert client.calls['abort_multipart_upload'] == 1
+    assert client.multipart_uploads == {}
+    assert storage.get('large.json') is None
+
+
+def test_get_of_a_missing_key_returns_none():
+    storage = S3Storage(StubS3Client(), 'portfolios')
+    storage.prepare()
+
+    assert storage.get('portfolios/missing.json') is None
+
+
+def test_write_behind_reads_its_own_writes_and_flushes():
+    backend = MemoryStorage()
+    backend.unblocked.clear()
+    storage = WriteBehindStorage(backend, flush_interval=0.01)
+
+    storage.put('a', b'first')
+    storage.put('b', b'second')
+    storage.put('a', b'latest')
+    assert storage.get('a') == b'latest'  # Still pending: the backend is blocked
+    assert backend.objects == {}
+
+    backend.unblocked.set()
+    storage.flush()
+    assert backend.objects == {'a': b'latest', 'b': b'second'}
+    assert storage.get('b') == b'second'
+    assert storage.stats()['write_behind']['written'] == 2
+    storage.close()
+
+
+def test_write_behind_retries_a_failed_batch():
+    backend = MemoryStorage(failures=2)
+    storage = WriteBehindStorage(backend, retry_delay=0.001)
+
+    storage.put('portfolios/case.json', b'{}')
+    storage.flush()
+
+    assert backend.objects == {'portfolios/case.json': b'{}'}
+    stats = storage.stats()['write_behind']
+    assert (stats['retries'], stats['failed'], stats['written']) == (2, 0, 1)
+    storage.close()
+
+
+def test_write_behind_gives_up_after_max_retries():
+    backend = MemoryStorage(failures=10)
+    storage = WriteBehindStorage(backend, max_retries=2, retry_delay=0.001)
+
+    storage.put('portfolios/case.json', b'{}')
+    storage.flush()
+
+    stats = storage.stats()['write_behind']
+    assert (stats['retries'], stats['failed'], stats['written']) == (2, 1, 0)
+    assert stats['last_error'] == 'storage unavailable'
+    assert storage.get('portfolios/case.json') is None
+    storage.close()
@@ -0,0 +1,35 @@
+"""
+Tests for streaming.GoalCardStreamParser.
+"""
+
+import json
+
+import pytest
+
+from streaming import GoalCardStreamParser
+
+
+CARDS = [{'title': f'Card {i}', 'purpose': 'braces } { and "quotes" \\ ] in strings', 'steps': [1, {'a': 2}]}
+         for i in range(5)]
+RESPONSE = 'Here you go: {"summary": "ok", "goal_cards": ' + json.dumps(CARDS) + ', "after": {"x": 1}}'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, len(RESPONSE)])
+def test_cards_are_emitted_whatever_the_chunking(chunk_size):
+    parser = GoalCardStreamParser()
+    emitted = []
+    for start in range(0, len(RESPONSE), chunk_size):
+        emitted.extend(parser.feed(RESPONSE[start:start + chunk_size]))
+
+    assert emitted == CARDS
+    assert parser.cards == CARDS
+    assert parser.text == RESPONSE
+
+
+def test_scan_buffer_stays_bounded():
+    parser = GoalCardStreamParser()
+    for char in 'x' * 10000 + RESPONSE:
+        parser.feed(char)
+        assert len(parser._buffer) <= max(GoalCardStreamParser.KEY_OVERLAP, len(json.dumps(CARDS[0])) + 1)
+
+    assert parser.cards == CARDS
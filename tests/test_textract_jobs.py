@@ -0,0 +1,130 @@
+"""
+Tests for textract_jobs.TextractJobPipeline against the local Textract/S3 stubs.
+"""
+
+import pytest
+
+from aws_stubs import StubS3Client, StubTextractClient
+from case_store import CaseRepository
+from textract_jobs import TextractJobPipeline
+
+
+STATEMENT = 'Portfolio Statement\nRoth IRA: $12,000.00\nBrokerage: $8,500.00\nSignature of client'
+
+
+class FailingTextractClient(StubTextractClient):
+    """Stub whose jobs end in Textract's FAILED state."""
+
+    def get_document_analysis(self, JobId, **kwargs):
+        self.calls['get_document_analysis'] += 1
+        return {'JobStatus': 'FAILED', 'StatusMessage': 'Unsupported document format'}
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    repository = CaseRepository(str(tmp_path / 'cases.db'))
+    yield repository
+    repository.close()
+
+
+def run_job(textract_client, s3_client, jobs, document=STATEMENT.encode(), **kwargs):
+    pipeline = TextractJobPipeline(textract_client, s3_client, 'test-bucket', jobs,
+                                   poll_interval=0.001, max_poll_interval=0.001, **kwargs)
+    job_id = pipeline.submit(document, 'statement.pdf')
+    pipeline.shutdown(wait=True)
+    return pipeline, job_id
+
+
+def test_job_pages_in_every_block(jobs):
+    s3_client = StubS3Client()
+    textract_client = StubTextractClient(s3_client=s3_client, page_size=3)
+    pipeline, job_id = run_job(textract_client, s3_client, jobs)
+
+    job = pipeline.get(job_id)
+    expected = StubTextractClient(pages=[STATEMENT]).analyze_document(
+        Document={'Bytes': b''}, FeatureTypes=['TABLES', 'FORMS'])['Blocks']
+    assert job['status'] == 'SUCCEEDED'
+    assert job['pages'] == 1
+    assert len(job['result']['Blocks']) == len(expected)
+    # One poll until complete, then a NextToken page per three blocks
+    assert textract_client.calls['get_document_analysis'] == 1 + -(-len(expected) // 3)
+
+
+def test_job_polls_until_complete(jobs):
+    s3_client = StubS3Client()
+    textract_client = StubTextractClient(s3_client=s3_client, polls_until_complete=4)
+    seen = []
+
+    def on_complete(blocks, job):
+        seen.append(job['status'])
+        lines = [block['Text'] for block in blocks if block['BlockType'] == 'LINE']
+        return {'lines': lines}
+
+    pipeline, job_id = run_job(textract_client, s3_client, jobs, on_complete=on_complete)
+
+    job = pipeline.get(job_id)
+    assert job['status'] == 'SUCCEEDED'
+    assert job['completed_at'] is not None
+    assert job['result']['lines'] == STATEMENT.split('\n')
+    assert seen == ['PROCESSING']
+    assert textract_client.calls['get_document_analysis'] == 5
+
+
+def test_failed_job_reports_error(jobs):
+    s3_client = StubS3Client()
+    pipeline, job_id = run_job(FailingTextractClient(s3_client=s3_client), s3_client, jobs)
+
+    job = pipeline.get(job_id)
+    assert job['status'] == 'FAILED'
+    assert job['error'] == 'Unsupported document format'
+    assert job['result'] is None
+
+
+def test_job_that_cannot_start_fails(jobs):
+    s3_client = StubS3Client()
+    # Without S3 access the stub cannot read the staged document
+    pipeline, job_id = run_job(StubTextractClient(s3_client=None), s3_client, jobs)
+
+    job = pipeline.get(job_id)
+    assert job['status'] == 'FAILED'
+    assert 'InvalidS3ObjectException' in job['error']
+
+
+@pytest.mark.parametrize('textract_client', [StubTextractClient, FailingTextractClient])
+def test_staged_input_is_deleted(jobs, textract_client):
+    s3_client = StubS3Client()
+    run_job(textract_client(s3_client=s3_client), s3_client, jobs)
+
+    assert s3_client.buckets['test-bucket'] == {}
+
+
+def test_job_is_visible_to_other_processes(jobs, tmp_path):
+    s3_client = StubS3Client()
+    _, job_id = run_job(StubTextractClient(s3_client=s3_client), s3_client, jobs)
+
+    # Another worker process opens its own repository on the same cases.db
+    other = TextractJobPipeline(StubTextractClient(), StubS3Client(), 'test-bucket',
+                                CaseRepository(str(tmp_path / 'cases.db')))
+    assert other.get(job_id)['status'] == 'SUCCEEDED'
+    assert other.get('job_unknown') is None
+    other.shutdown()
+
+
+def test_old_finished_jobs_are_pruned(jobs):
+    for number in range(4):
+        jobs.create_job(f'job_{number}', 'statement.pdf')
+        jobs.update_job(f'job_{number}', status='SUCCEEDED', submitted_at=f'2024-01-0{number + 1}T00:00:00')
+    jobs.create_job('job_running', 'statement.pdf', status='IN_PROGRESS')
+
+    assert jobs.prune_jobs(keep=2) == 2
+    remaining = [job_id for job_id in ('job_0', 'job_1', 'job_2', 'job_3', 'job_running') if jobs.get_job(job_id)]
+    assert remaining == ['job_2', 'job_3', 'job_running']
+
+
+def test_failed_job_calls_on_failed(jobs):
+    s3_client = StubS3Client()
+    failures = []
+    _, job_id = run_job(FailingTextractClient(s3_client=s3_client), s3_client, jobs,
+                        on_failed=lambda job, error: failures.append((job['job_id'], job['status'], str(error))))
+
+    assert failures == [(job_id, 'FAILED', 'Unsupported document format')]
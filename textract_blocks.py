@@ -0,0 +1,142 @@
+"""
+Textract Blocks - One-pass index over a Textract block graph.
+Resolves LINE text, FORMS key/value pairs and TABLES cells by block Id with
+dict lookups, so structured values come from real form fields and table rows
+instead of regexes over flattened text.
+"""
+
+import re
+
+
+# A standalone number: not part of an account number, date or id ("4417-2290-31", "3/31/2024")
+AMOUNT_PATTERN = re.compile(
+    r'(?<![\w/.-])(?P<open>\()?(?P<minus>-)?(?P<dollar>\$)?\s*(?P<digits>\d{1,3}(?:,\d{3})+|\d+)(?P<cents>\.\d+)?'
+    r'(?P<close>\))?(?![\w/-]|\.\d)'
+)
+PHONE_PATTERN = re.compile(r'(?:\(\d{3}\)|\b\d{3})[\s.-]*\d{3}[\s.-]\d{4}\b')
+CURRENCY_PATTERN = re.compile(r'\$\s*\d|\b\d{1,3}(?:,\d{3})+(?:\.\d{2})?\b|\b\d+\.\d{2}\b')
+
+
+def parse_amount(text):
+    """
+    Parse a currency string like '$1,234.56' or '(1,234.56)'; returns None if there is no amount.
+    Phone numbers, dates and hyphenated ids are not amounts, and parentheses
+    only mark a negative around something shaped like money.
+    """
+    match = AMOUNT_PATTERN.search(PHONE_PATTERN.sub(' ', text or ''))
+    if not match:
+        return None
+    value = float(match.group('digits').replace(',', '') + (match.group('cents') or ''))
+    money_shaped = bool(match.group('dollar') or match.group('cents') or ',' in match.group('digits'))
+    negative = match.group('minus') or (match.group('open') and match.group('close') and money_shaped)
+    return -value if negative else value
+
+
+def looks_like_currency(text):
+    """True if text contains a dollar amount or a number shaped like one (12,000 or 12000.00)."""
+    return CURRENCY_PATTERN.search(PHONE_PATTERN.sub(' ', text or '')) is not None
+
+
+class BlockIndex:
+    """
+    Index of a Textract response built in a single pass over its blocks.
+
+    Only the fields needed to resolve relationships are kept (word text,
+    selection status, child/value ids, cell coordinates), so a streamed
+    multi-page response never has to be held in memory as raw blocks.
+    """
+
+    def __init__(self, blocks):
+        self.lines = []        # (page, text, confidence) in document order
+        self._words = {}       # Id -> text for WORD / SELECTION_ELEMENT blocks
+        self._keys = []        # KEY_VALUE_SET blocks with EntityTypes KEY
+        self._values = {}      # Id -> child ids for VALUE blocks
+        self._tables = []      # (page, child cell ids)
+        self._cells = {}       # Id -> (row, column, child ids)
+
+        for block in blocks:
+            block_type = block['BlockType']
+            if block_type == 'LINE':
+                self.lines.append((block.get('Page', 1), block['Text'], block.get('Confidence')))
+            elif block_type == 'WORD':
+                self._words[block['Id']] = block['Text']
+            elif block_type == 'SELECTION_ELEMENT':
+                self._words[block['Id']] = '[X]' if block.get('SelectionStatus') == 'SELECTED' else '[ ]'
+            elif block_type == 'KEY_VALUE_SET':
+                if 'KEY' in block.get('EntityTypes', []):
+                    self._keys.append({
+                        'page': block.get('Page', 1),
+                        'confidence': block.get('Confidence'),
+                        'children': _related(block, 'CHILD'),
+                        'values': _related(block, 'VALUE')
+                    })
+                else:
+                    self._values[block['Id']] = _related(block, 'CHILD')
+            elif block_type == 'TABLE':
+                self._tables.append((block.get('Page', 1), _related(block, 'CHILD')))
+            elif block_type == 'CELL':
+                self._cells[block['Id']] = (block['RowIndex'], block['ColumnIndex'], _related(block, 'CHILD'))
+
+    @classmethod
+    def from_response(cls, response):
+        """Build an index from a Textract response dict."""
+        return cls((response or {}).get('Blocks', []))
+
+    def text(self):
+        """Flattened LINE text, one line per row (same as extract_text_from_textract)."""
+        return '\n'.join(text for _, text, _ in self.lines).strip()
+
+    def _join(self, ids):
+        return ' '.join(self._words[i] for i in ids if i in self._words)
+
+    def key_values(self):
+        """
+        Resolve FORMS key/value pairs.
+        Returns a list of dicts with key, value, page and confidence.
+        """
+        pairs = []
+        for key in self._keys:
+            value_words = []
+            for value_id in key['values']:
+                value_words.extend(self._values.get(value_id, []))
+            pairs.append({
+                'key': self._join(key['children']).strip().rstrip(':').strip(),
+                'value': self._join(value_words).strip(),
+                'page': key['page'],
+                'confidence': key['confidence']
+            })
+        return pairs
+
+    def tables(self):
+        """
+        Resolve TABLES into row-major grids of cell text.
+        Returns a list of dicts with page and rows (list of lists of str).
+        """
+        tables = []
+        for page, cell_ids in self._tables:
+            grid = {}
+            columns = 0
+            for cell_id in cell_ids:
+                cell = self._cells.get(cell_id)
+                if cell is None:
+                    continue
+                row, column, children = cell
+                grid.setdefault(row, {})[column] = self._join(children).strip()
+                columns = max(columns, column)
+            rows = [[grid[r].get(c, '') for c in range(1, columns + 1)] for r in sorted(grid)]
+            tables.append({'page': page, 'rows': rows})
+        return tables
+
+    @property
+    def has_structure(self):
+        """True if the response contains any FORMS or TABLES output."""
+        return bool(self._keys or self._tables)
+
+
+def _related(block, relationship_type):
+    """Ids of a block's relationships of one type."""
+    ids = []
+    for relationship in block.get('Relationships', []):
+        if relationship['Type'] == relationship_type:
+            ids.extend(relationship['Ids'])
+    return ids
@@ -0,0 +1,189 @@
+"""
+Textract Cache - Content-addressed cache for Textract results.
+Responses are keyed by the SHA-256 of the document bytes plus the Textract
+API and FeatureTypes, so re-uploads of the same document skip AWS entirely.
+Two tiers: an in-memory LRU bounded by size, backed by SQLite on disk.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from metrics import record_cache_lookup
+
+
+def cache_key(document_bytes, feature_types=None, api='analyze_document'):
+    """
+    Build the content address for a Textract call.
+
+    Args:
+        document_bytes: Raw bytes of the uploaded document
+        feature_types: Textract FeatureTypes (order does not matter)
+        api: Textract API name ('analyze_document' or 'detect_document_text')
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256(document_bytes)
+    digest.update(b'\0' + api.encode())
+    digest.update(b'\0' + ','.join(sorted(feature_types or [])).encode())
+    return digest.hexdigest()
+
+
+class TextractCache:
+    """
+    Two-tier cache of Textract responses.
+
+    Cached responses are shared between requests and must be treated as
+    read-only by callers.
+    """
+
+    def __init__(self, db_path, max_memory_bytes=64 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()  # key -> (response, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS textract_cache (
+                cache_key TEXT PRIMARY KEY,
+                response BLOB NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, key):
+        """Return the cached response for a key, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[0]
+
+            row = self._db.execute(
+                'SELECT response FROM textract_cache WHERE cache_key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+
+            payload = zlib.decompress(row[0])
+            response = json.loads(payload)
+            self._remember(key, response, len(payload))
+            self._stats['disk_hits'] += 1
+            return response
+
+    def put(self, key, response):
+        """Store a Textract response under its content address."""
+        # Per-call metadata (request id, retries) is not part of the content
+        response = {k: v for k, v in response.items() if k != 'ResponseMetadata'}
+        payload = json.dumps(response, separators=(',', ':')).encode()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO textract_cache (cache_key, response, size_bytes, created_at) VALUES (?, ?, ?, ?)',
+                (key, zlib.compress(payload), len(payload), datetime.now().isoformat())
+            )
+            self._db.commit()
+            self._remember(key, response, len(payload))
+        return response
+
+    def _remember(self, key, response, size):
+        """Add to the memory tier, evicting least-recently-used entries past the size limit."""
+        if size > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[key] = (response, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._stats['evictions'] += 1
+
+    def stats(self):
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            disk_entries = self._db.execute('SELECT COUNT(*) FROM textract_cache').fetchone()[0]
+            return dict(
+                self._stats,
+                memory_entries=len(self._memory),
+                memory_bytes=self._memory_bytes,
+                disk_entries=disk_entries
+            )
+
+
+def cached_textract_call(cache, client, api, document_bytes, feature_types=None):
+    """
+    Call Textract through the cache.
+
+    Args:
+        cache: TextractCache (or None to always call AWS)
+        client: boto3 Textract client
+        api: 'analyze_document' or 'detect_document_text'
+        document_bytes: Raw document bytes
+        feature_types: FeatureTypes for analyze_document
+
+    Returns:
+        Tuple of (response, cache_hit)
+    """
+    kwargs = {'Document': {'Bytes': document_bytes}}
+    if feature_types:
+        kwargs['FeatureTypes'] = feature_types
+
+    if cache is None:
+        return getattr(client, api)(**kwargs), False
+
+    key = cache_key(document_bytes, feature_types, api)
+    response = cache.get(key)
+    record_cache_lookup('textract', response is not None)
+    if response is not None:
+        return response, True
+
+    response = getattr(client, api)(**kwargs)
+    return cache.put(key, response), False
+
+
+async def cached_textract_call_async(cache, client, api, document_bytes, feature_types=None):
+    """
+    cached_textract_call for the async serving mode (asgi.py).
+
+    Args:
+        cache: TextractCache (or None to always call AWS)
+        client: aiobotocore Textract client
+        api: 'analyze_document' or 'detect_document_text'
+        document_bytes: Raw document bytes
+        feature_types: FeatureTypes for analyze_document
+
+    Returns:
+        Tuple of (response, cache_hit)
+    """
+    kwargs = {'Document': {'Bytes': document_bytes}}
+    if feature_types:
+        kwargs['FeatureTypes'] = feature_types
+
+    if cache is None:
+        return await getattr(client, api)(**kwargs), False
+
+    # Hashing and the SQLite tier block, so they run off the event loop
+    key = await asyncio.to_thread(cache_key, document_bytes, feature_types, api)
+    response = await asyncio.to_thread(cache.get, key)
+    record_cache_lookup('textract', response is not None)
+    if response is not None:
+        return response, True
+
+    response = await getattr(client, api)(**kwargs)
+    return await asyncio.to_thread(cache.put, key, response), False
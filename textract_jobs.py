@@ -0,0 +1,140 @@
+"""
+Textract Jobs - Asynchronous multi-page document analysis.
+Large PDFs are staged in S3 and analyzed with StartDocumentAnalysis instead of
+the synchronous, size-limited analyze_document call. A background worker pool
+polls each job and streams its blocks, following NextToken pagination, into
+the same text extraction / portfolio parsing flow as the synchronous path.
+Job state lives in cases.db (case_store.CaseRepository), so every worker
+process can report on a job, and staged inputs are deleted once a job ends.
+"""
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class TextractJobPipeline:
+    """
+    Runs Textract document-analysis jobs on a background worker pool.
+
+    Args:
+        textract_client: boto3 Textract client (or aws_stubs.StubTextractClient)
+        s3_client: boto3 S3 client used to stage documents for Textract
+        bucket: S3 bucket for staged documents
+        jobs: case_store.CaseRepository holding the job records
+        on_complete: Callable(blocks, job) -> result dict, run on the worker;
+            blocks is a lazy iterator that pages results in from Textract
+        on_failed: Optional callable(job, error), run on the worker when a job fails
+        max_workers: Number of concurrent jobs
+        poll_interval: Seconds between status polls (doubles up to max_poll_interval)
+        timeout: Seconds before a job is abandoned
+        max_jobs: Finished jobs kept for polling; older ones are deleted
+    """
+
+    def __init__(self, textract_client, s3_client, bucket, jobs, on_complete=None, on_failed=None, max_workers=4,
+                 poll_interval=1.0, max_poll_interval=10.0, timeout=900,
+                 feature_types=('TABLES', 'FORMS'), max_jobs=1000):
+        self.textract_client = textract_client
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.jobs = jobs
+        self.on_complete = on_complete
+        self.on_failed = on_failed
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.feature_types = list(feature_types)
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='textract-job')
+
+    def submit(self, document_bytes, filename, job_id=None):
+        """
+        Queue a document for asynchronous analysis.
+
+        Returns:
+            The job id to poll with get()
+        """
+        job_id = job_id or f"job_{uuid.uuid4().hex[:16]}"
+        self.jobs.create_job(job_id, filename)
+        self.jobs.prune_jobs(self.max_jobs)
+        self._executor.submit(self._run, job_id, document_bytes, filename)
+        return job_id
+
+    def get(self, job_id):
+        """Return a job, or None if unknown (whichever process submitted it)."""
+        return self.jobs.get_job(job_id)
+
+    def _update(self, job_id, **fields):
+        self.jobs.update_job(job_id, **fields)
+
+    def _run(self, job_id, document_bytes, filename):
+        s3_key = f"textract-input/{job_id}/{filename}"
+        staged = False
+        try:
+            self._update(job_id, status='STAGING')
+            self.s3_client.put_object(Bucket=self.bucket, Key=s3_key, Body=document_bytes)
+            staged = True
+
+            started = self.textract_client.start_document_analysis(
+                DocumentLocation={'S3Object': {'Bucket': self.bucket, 'Name': s3_key}},
+                FeatureTypes=self.feature_types
+            )
+            self._update(job_id, status='IN_PROGRESS', textract_job_id=started['JobId'])
+
+            first_page = self._wait(started['JobId'])
+            pages = first_page.get('DocumentMetadata', {}).get('Pages')
+            self._update(job_id, status='PROCESSING', pages=pages)
+
+            # Blocks stream in page by page as NextToken results are fetched
+            blocks = self._iter_blocks(started['JobId'], first_page)
+            if self.on_complete:
+                result = self.on_complete(blocks, self.get(job_id))
+            else:
+                result = {'DocumentMetadata': first_page.get('DocumentMetadata', {}), 'Blocks': list(blocks)}
+            self._update(job_id, status='SUCCEEDED', result=result, completed_at=datetime.now().isoformat())
+        except Exception as e:
+            print(f"Warning: Textract job {job_id} failed: {e}")
+            self._update(job_id, status='FAILED', error=str(e), completed_at=datetime.now().isoformat())
+            if self.on_failed:
+                self.on_failed(self.get(job_id), e)
+        finally:
+            if staged:
+                self._delete_staged(s3_key)
+
+    def _delete_staged(self, s3_key):
+        """Remove a job's staged input; Textract has read it by the time the job ends."""
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket, Key=s3_key)
+        except Exception as e:
+            print(f"Warning: Could not delete staged Textract input {s3_key}: {e}")
+
+    def _wait(self, textract_job_id):
+        """Poll until the Textract job finishes; returns the first page of results."""
+        deadline = time.monotonic() + self.timeout
+        delay = self.poll_interval
+        while True:
+            page = self.textract_client.get_document_analysis(JobId=textract_job_id, MaxResults=1000)
+            status = page['JobStatus']
+            if status in ('SUCCEEDED', 'PARTIAL_SUCCESS'):
+                return page
+            if status == 'FAILED':
+                raise RuntimeError(page.get('StatusMessage', 'Textract job failed'))
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f'Textract job {textract_job_id} did not finish within {self.timeout}s')
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
+
+    def _iter_blocks(self, textract_job_id, page):
+        """Yield every block of a finished job, fetching each NextToken page on demand."""
+        while True:
+            yield from page.get('Blocks', [])
+            if not page.get('NextToken'):
+                return
+            page = self.textract_client.get_document_analysis(
+                JobId=textract_job_id, MaxResults=1000, NextToken=page['NextToken']
+            )
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,133 @@
+"""
+Upload Queue - Persistent background queue for portfolio uploads.
+Uploads are written to disk and recorded in the existing `cases` table of
+backend/data/cases.db, then processed by a local worker pool. The request
+returns a case_id at once; clients poll the case for its stage and result.
+Queued (and abandoned running) cases are picked up again after a restart.
+A stored document is deleted once its case succeeds or fails.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+class UploadQueue:
+    """
+    Queue of upload jobs, persisted in the cases table and run on a thread pool.
+
+    Args:
+        cases: case_store.CaseRepository
+        upload_dir: Directory where uploaded documents are stored
+        process: Callable(document_bytes, filename, case_id, progress) -> result dict;
+            progress(stage, percent) records how far the case has got
+        max_workers: Number of uploads processed concurrently
+        stale_after: Seconds after which a RUNNING case with no progress is assumed
+            abandoned (e.g. the server restarted) and is re-queued
+    """
+
+    def __init__(self, cases, upload_dir, process, max_workers=4, stale_after=600):
+        self.cases = cases
+        self.upload_dir = upload_dir
+        self.process = process
+        self.stale_after = stale_after
+
+        os.makedirs(upload_dir, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload')
+
+    def store_document(self, case_id, filename, document_bytes):
+        """Write an uploaded document under upload_dir/<case_id>/; returns its path."""
+        case_dir = os.path.join(self.upload_dir, case_id)
+        os.makedirs(case_dir, exist_ok=True)
+        file_path = os.path.join(case_dir, os.path.basename(filename))
+        with open(file_path, 'wb') as f:
+            f.write(document_bytes)
+        return file_path
+
+    def enqueue(self, case_id, filename, document_bytes):
+        """
+        Store an uploaded document and queue it for processing.
+
+        Returns:
+            The case_id
+        """
+        file_path = self.store_document(case_id, filename, document_bytes)
+        self.cases.create(case_id, filename, file_path)
+        self._executor.submit(self._run, case_id)
+        return case_id
+
+    def run_inline(self, case_id, filename, document_bytes):
+        """
+        Store and process an upload in the calling thread (?sync=true), recording
+        it as a RUNNING case like a queued one. If the process stops mid-way,
+        recover() picks the case up again.
+
+        Returns:
+            The result dict (exceptions from process are recorded and re-raised)
+        """
+        file_path = self.store_document(case_id, filename, document_bytes)
+        self.cases.create(case_id, filename, file_path, status='RUNNING', stage='starting')
+        return self._process(case_id, filename, document_bytes, file_path)
+
+    def recover(self):
+        """
+        Re-submit queued cases and running cases that stopped reporting progress.
+
+        Returns:
+            Number of cases re-queued
+        """
+        cutoff = (datetime.now() - timedelta(seconds=self.stale_after)).isoformat()
+        self.cases.requeue_stale(cutoff)
+        case_ids = self.cases.ids_with_status('QUEUED')
+        for case_id in case_ids:
+            self._executor.submit(self._run, case_id)
+        return len(case_ids)
+
+    def _run(self, case_id):
+        # Claim the case; another worker (or process) may already have it
+        if not self.cases.claim(case_id):
+            return
+
+        case = self.cases.get(case_id)
+        try:
+            with open(case['file_path'], 'rb') as f:
+                document_bytes = f.read()
+        except OSError as e:
+            print(f"Warning: Upload {case_id} failed: {e}")
+            self.cases.update(case_id, status='FAILED', error=str(e))
+            return
+        try:
+            self._process(case_id, case['filename'], document_bytes, case['file_path'])
+        except Exception as e:
+            print(f"Warning: Upload {case_id} failed: {e}")
+
+    def _process(self, case_id, filename, document_bytes, file_path):
+        """Run process() for a claimed case, record its result or failure and delete its document."""
+        try:
+            result = self.process(
+                document_bytes, filename, case_id,
+                lambda stage, percent: self.cases.update(case_id, stage=stage, progress=percent)
+            )
+        except Exception as e:
+            self.cases.update(case_id, status='FAILED', error=str(e))
+            self._delete_document(file_path)
+            raise
+        self.cases.save_result(case_id, result)
+        self._delete_document(file_path)
+        return result
+
+    def _delete_document(self, file_path):
+        """Remove a finished case's document and its (now empty) case directory."""
+        try:
+            os.remove(file_path)
+            os.rmdir(os.path.dirname(file_path))
+        except OSError as e:
+            print(f"Warning: Could not delete upload {file_path}: {e}")
+
+    def stats(self):
+        """Case counts by status."""
+        return self.cases.counts_by_status()
+
+    def shutdown(self, wait=True):
+        """Stop accepting uploads and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)